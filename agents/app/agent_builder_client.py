@@ -1,11 +1,23 @@
 from __future__ import annotations
 
+import gzip
 import json
-from typing import Any
-from urllib import error, parse, request
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from typing import TYPE_CHECKING, Any
+from urllib import parse
 
 from .config import Settings
+from .metrics import AGENT_BUILDER_OUTCOMES, AGENT_BUILDER_PAYLOAD_BYTES, record_outcome
 from .models import IncidentInput, IncidentRunResult
+from .profiling import span
+from .resilience import CircuitBreaker, RetryPolicy, is_retryable_status
+from .serialization import agent_builder_batch_body, agent_builder_body
+
+if TYPE_CHECKING:
+    import urllib3
 
 MAX_ERROR_BODY_CHARS = 500
 
@@ -15,6 +27,93 @@ class AgentBuilderService:
 
     def __init__(self, settings: Settings) -> None:
         self.settings = settings
+        self._pool_manager: urllib3.PoolManager | None = None
+        self._pool_lock = threading.Lock()
+        self.retry_policy = RetryPolicy.from_settings(settings)
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._breakers_lock = threading.Lock()
+
+    def _build_pool(self) -> "urllib3.PoolManager":
+        """One keep-alive connection pool per Agent Builder host, shared by all dispatches.
+
+        ``block=True`` makes ``agent_builder_max_connections`` a hard cap: a dispatch waits
+        up to ``request_timeout_seconds`` for a free connection instead of opening (and then
+        discarding) an extra one.
+        """
+        import urllib3
+
+        return urllib3.PoolManager(
+            num_pools=4,
+            maxsize=self.settings.agent_builder_max_connections,
+            block=True,
+            retries=False,
+            timeout=urllib3.Timeout(total=self.settings.request_timeout_seconds),
+            headers={"Connection": "keep-alive" if self.settings.agent_builder_keepalive else "close"},
+        )
+
+    @property
+    def _pool(self) -> "urllib3.PoolManager":
+        """Built on first dispatch (or by ``warm_up``), which keeps urllib3 out of app import."""
+        if self._pool_manager is None:
+            with self._pool_lock:
+                if self._pool_manager is None:
+                    self._pool_manager = self._build_pool()
+        return self._pool_manager
+
+    @_pool.setter
+    def _pool(self, value: "urllib3.PoolManager") -> None:
+        self._pool_manager = value
+
+    def warm_up(self, connections: int) -> dict[str, Any]:
+        """Open up to ``connections`` keep-alive connections to the dispatch host in parallel.
+
+        Each one sends a ``HEAD`` to the dispatch route. Any HTTP response, even a 405,
+        leaves a connected socket (with TLS done) in the pool. The breaker is not involved.
+        """
+        endpoint, _ = self._build_endpoint()
+        if not self.settings.agent_builder_enabled or endpoint is None or connections <= 0:
+            return {"status": "skipped"}
+
+        started = perf_counter()
+        pool = self._pool
+        count = min(connections, self.settings.agent_builder_max_connections)
+
+        def connect(_: int) -> bool:
+            try:
+                pool.request(
+                    "HEAD",
+                    endpoint,
+                    timeout=self.settings.request_timeout_seconds,
+                    pool_timeout=self.settings.request_timeout_seconds,
+                )
+            except Exception:
+                return False
+            return True
+
+        with ThreadPoolExecutor(max_workers=count, thread_name_prefix="agent-builder-warmup") as executor:
+            connected = sum(executor.map(connect, range(count)))
+        return {
+            "status": "ok" if connected else "error",
+            "connections": connected,
+            "duration_ms": round((perf_counter() - started) * 1000, 2),
+        }
+
+    def close(self) -> None:
+        if self._pool_manager is not None:
+            self._pool_manager.clear()
+
+    def _breaker(self, endpoint: str) -> CircuitBreaker:
+        with self._breakers_lock:
+            breaker = self._breakers.get(endpoint)
+            if breaker is None:
+                breaker = CircuitBreaker.from_settings(endpoint, self.settings)
+                self._breakers[endpoint] = breaker
+            return breaker
+
+    def breaker_stats(self) -> list[dict[str, Any]]:
+        with self._breakers_lock:
+            breakers = list(self._breakers.values())
+        return [breaker.stats() for breaker in breakers]
 
     @staticmethod
     def _truncate(value: str, max_chars: int = MAX_ERROR_BODY_CHARS) -> str:
@@ -22,7 +121,7 @@ class AgentBuilderService:
             return value
         return f"{value[:max_chars]}..."
 
-    def _build_endpoint(self) -> tuple[str | None, str | None]:
+    def _build_endpoint(self, route: str | None = None) -> tuple[str | None, str | None]:
         base_url = (self.settings.agent_builder_base_url or "").strip()
         if not base_url:
             return None, "agent_builder_not_configured"
@@ -31,96 +130,198 @@ class AgentBuilderService:
         if parsed.scheme not in {"http", "https"} or not parsed.netloc:
             return None, "invalid_agent_builder_base_url"
 
-        route = self.settings.agent_builder_route.strip() or "/"
+        route = (route if route is not None else self.settings.agent_builder_route).strip() or "/"
         if not route.startswith("/"):
             route = f"/{route}"
 
         return f"{base_url.rstrip('/')}{route}", None
 
-    def dispatch_incident(
-        self,
-        incident: IncidentInput,
-        result: IncidentRunResult,
-    ) -> dict[str, Any]:
-        endpoint, endpoint_error = self._build_endpoint()
+    def _resolve_endpoint(self, route: str) -> tuple[str | None, dict[str, Any] | None]:
+        """Return ``(endpoint, None)`` or ``(None, report)`` when dispatch cannot be attempted."""
+        endpoint, endpoint_error = self._build_endpoint(route)
 
         if not self.settings.agent_builder_enabled:
-            return {
+            return None, {
                 "enabled": False,
                 "status": "skipped",
                 "reason": "agent_builder_not_configured",
-                "integration_path": self.settings.agent_builder_route,
+                "integration_path": route,
             }
 
         if endpoint_error or not endpoint:
-            return {
+            return None, {
                 "enabled": True,
                 "status": "error",
                 "reason": endpoint_error or "invalid_agent_builder_endpoint",
-                "integration_path": self.settings.agent_builder_route,
+                "integration_path": route,
             }
 
-        payload = {
-            "incident": incident.model_dump(),
-            "workflow": result.model_dump(exclude={"elastic", "agent_builder"}),
+        return endpoint, None
+
+    def _post(
+        self,
+        endpoint: str,
+        route: str,
+        body: bytes,
+        extra_headers: dict[str, str] | None = None,
+    ) -> tuple[dict[str, Any], bytes]:
+        """POST ``body`` over the shared pool; returns the report and the raw response body."""
+        base: dict[str, Any] = {
+            "enabled": True,
+            "endpoint": endpoint,
+            "integration_path": route,
+            "timeout_seconds": self.settings.request_timeout_seconds,
         }
-        payload_bytes = json.dumps(payload).encode("utf-8")
-
-        req = request.Request(
-            endpoint,
-            data=payload_bytes,
-            method="POST",
-            headers={
-                "Authorization": f"Bearer {self.settings.agent_builder_api_key}",
-                "Content-Type": "application/json",
-            },
-        )
+
+        breaker = self._breaker(endpoint)
+        if not breaker.allow():
+            return {**base, "status": "error", "reason": "circuit_open", "breaker": breaker.name}, b""
+
+        attempts = 0
+        while True:
+            attempts += 1
+            report, data, retryable, failed = self._send(base, endpoint, body, extra_headers)
+            if not retryable or attempts >= self.retry_policy.max_attempts:
+                break
+            time.sleep(self.retry_policy.backoff(attempts))
+
+        # Transport errors, timeouts, 429 and 5xx count against the endpoint; other 4xx are our fault.
+        if failed:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        report["attempts"] = attempts
+        return report, data
+
+    def _send(
+        self,
+        base: dict[str, Any],
+        endpoint: str,
+        body: bytes,
+        extra_headers: dict[str, str] | None,
+    ) -> tuple[dict[str, Any], bytes, bool, bool]:
+        """One POST attempt; returns the report, the body and whether the failure is worth
+        retrying and whether it counts against the endpoint's breaker.
+
+        Only 429/5xx and errors before the request was sent are retried. A read timeout or
+        a dropped connection may come after the server accepted the incident, so it is not
+        re-sent, but it still counts as a dependency failure.
+        """
+        from urllib3.exceptions import ConnectTimeoutError, EmptyPoolError, HTTPError
 
         try:
-            with request.urlopen(req, timeout=self.settings.request_timeout_seconds) as resp:
-                return {
-                    "enabled": True,
-                    "status": "ok",
-                    "endpoint": endpoint,
-                    "response_status": resp.status,
-                    "integration_path": self.settings.agent_builder_route,
-                    "timeout_seconds": self.settings.request_timeout_seconds,
-                    "payload_bytes": len(payload_bytes),
-                }
-        except error.HTTPError as exc:
-            error_body = ""
-            try:
-                error_body = exc.read().decode("utf-8", errors="replace")
-            except Exception:
-                error_body = ""
+            resp = self._pool.request(
+                "POST",
+                endpoint,
+                body=body,
+                headers={
+                    "Authorization": f"Bearer {self.settings.agent_builder_api_key}",
+                    "Content-Type": "application/json",
+                    **(extra_headers or {}),
+                },
+                timeout=self.settings.request_timeout_seconds,
+                pool_timeout=self.settings.request_timeout_seconds,
+            )
+        except EmptyPoolError:
+            # Every connection stayed busy for a whole request timeout: the endpoint is too slow.
+            return {**base, "status": "error", "error": "connection_pool_exhausted"}, b"", False, True
+        except ConnectTimeoutError as exc:  # includes NewConnectionError: nothing was sent
+            return {**base, "status": "error", "error": f"connection_error: {exc}"}, b"", True, True
+        except HTTPError as exc:
+            return {**base, "status": "error", "error": f"connection_error: {exc}"}, b"", False, True
+        except Exception as exc:
+            return {**base, "status": "error", "error": str(exc) or type(exc).__name__}, b"", False, True
 
+        data = resp.data or b""
+        if resp.status >= 400:
+            error_body = data.decode("utf-8", errors="replace")
             response: dict[str, Any] = {
-                "enabled": True,
+                **base,
                 "status": "error",
-                "endpoint": endpoint,
-                "response_status": exc.code,
-                "error": str(exc.reason),
-                "integration_path": self.settings.agent_builder_route,
-                "timeout_seconds": self.settings.request_timeout_seconds,
+                "response_status": resp.status,
+                "error": str(resp.reason or resp.status),
             }
             if error_body:
                 response["error_body"] = self._truncate(error_body)
-            return response
-        except error.URLError as exc:
-            return {
-                "enabled": True,
-                "status": "error",
-                "endpoint": endpoint,
-                "error": f"connection_error: {exc.reason}",
-                "integration_path": self.settings.agent_builder_route,
-                "timeout_seconds": self.settings.request_timeout_seconds,
-            }
-        except Exception as exc:  # pragma: no cover - defensive path
-            return {
-                "enabled": True,
-                "status": "error",
-                "endpoint": endpoint,
-                "error": str(exc),
-                "integration_path": self.settings.agent_builder_route,
-                "timeout_seconds": self.settings.request_timeout_seconds,
+            retryable = is_retryable_status(resp.status)
+            return response, data, retryable, retryable
+
+        return {**base, "status": "ok", "response_status": resp.status}, data, False, False
+
+    def dispatch_incident(
+        self,
+        incident: IncidentInput,
+        result: IncidentRunResult,
+    ) -> dict[str, Any]:
+        route = self.settings.agent_builder_route
+        endpoint, unavailable = self._resolve_endpoint(route)
+        if unavailable is not None:
+            record_outcome(AGENT_BUILDER_OUTCOMES, unavailable, "dispatch")
+            return unavailable
+        assert endpoint is not None
+
+        payload_bytes = agent_builder_body(incident, result)
+        AGENT_BUILDER_PAYLOAD_BYTES.observe(len(payload_bytes), route=route)
+        with span("agent_builder", "dispatch"):
+            report, _ = self._post(endpoint, route, payload_bytes)
+        if report["status"] == "ok":
+            report["payload_bytes"] = len(payload_bytes)
+        record_outcome(AGENT_BUILDER_OUTCOMES, report, "dispatch")
+        return report
+
+    @staticmethod
+    def _per_incident_statuses(data: bytes) -> dict[str, str]:
+        """Map ``incident_id -> status`` when the batch response reports items individually."""
+        try:
+            body = json.loads(data) if data else {}
+        except ValueError:
+            return {}
+        results = body.get("results") if isinstance(body, dict) else None
+        if not isinstance(results, list):
+            return {}
+        return {
+            str(item["incident_id"]): str(item.get("status", "ok"))
+            for item in results
+            if isinstance(item, dict) and item.get("incident_id")
+        }
+
+    def dispatch_batch(
+        self,
+        items: list[tuple[IncidentInput, IncidentRunResult]],
+    ) -> list[dict[str, Any]]:
+        """Deliver several incidents in one (optionally gzip-compressed) request.
+
+        Returns one report per incident, in input order.
+        """
+        route = self.settings.agent_builder_batch_route
+        endpoint, unavailable = self._resolve_endpoint(route)
+        if unavailable is not None:
+            for _ in items:
+                record_outcome(AGENT_BUILDER_OUTCOMES, unavailable, "dispatch_batch")
+            return [dict(unavailable) for _ in items]
+        assert endpoint is not None
+
+        raw = agent_builder_batch_body(items)
+        AGENT_BUILDER_PAYLOAD_BYTES.observe(len(raw), route=route)
+        body = gzip.compress(raw) if self.settings.agent_builder_gzip else raw
+        headers = {"Content-Encoding": "gzip"} if self.settings.agent_builder_gzip else None
+
+        with span("agent_builder", "dispatch_batch"):
+            report, data = self._post(endpoint, route, body, headers)
+        report.update(
+            {
+                "batch_size": len(items),
+                "payload_bytes": len(raw),
+                "compressed_bytes": len(body),
             }
+        )
+        statuses = self._per_incident_statuses(data) if report["status"] == "ok" else {}
+
+        reports = []
+        for _, result in items:
+            item_report = dict(report)
+            item_report["incident_id"] = result.incident_id
+            item_report["status"] = statuses.get(result.incident_id, report["status"])
+            record_outcome(AGENT_BUILDER_OUTCOMES, item_report, "dispatch_batch")
+            reports.append(item_report)
+        return reports
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Protocol, Sequence
+
+from .models import AgentStep, IncidentInput
+from .profiling import in_current_context, span
+
+
+class GraphAgent(Protocol):
+    name: str
+    inputs: tuple[str, ...]
+
+    def run(self, incident: IncidentInput, **upstream: AgentStep) -> AgentStep: ...
+
+
+class AgentGraph:
+    """Runs agents as a DAG: each agent receives the steps named in its ``inputs``.
+
+    Every agent runs exactly once per ``run`` and its step is memoized for the agents that
+    depend on it. When several agents become ready at the same time, all but one are handed
+    to a shared thread pool and the last one runs on the calling thread, so a purely linear
+    chain never pays for a thread hop.
+
+    ``arun`` executes the same graph on the event loop: agents with an ``arun`` coroutine
+    are awaited (so I/O-bound agents hold no thread) and the others run inline.
+    """
+
+    def __init__(self, agents: Sequence[GraphAgent], max_workers: int = 4) -> None:
+        self.agents = {agent.name: agent for agent in agents}
+        if len(self.agents) != len(agents):
+            raise ValueError("agent names must be unique")
+        self.order = self._topological_order(agents)
+        self.max_workers = max_workers
+        self._executor: ThreadPoolExecutor | None = None
+
+    @staticmethod
+    def _topological_order(agents: Sequence[GraphAgent]) -> list[str]:
+        names = {agent.name for agent in agents}
+        for agent in agents:
+            missing = [dep for dep in agent.inputs if dep not in names]
+            if missing:
+                raise ValueError(f"agent {agent.name!r} depends on unknown agents: {missing}")
+
+        order: list[str] = []
+        pending = list(agents)
+        while pending:
+            ready = [agent for agent in pending if all(dep in order for dep in agent.inputs)]
+            if not ready:
+                raise ValueError(f"agent graph has a cycle: {[agent.name for agent in pending]}")
+            for agent in ready:
+                order.append(agent.name)
+                pending.remove(agent)
+        return order
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="agent-graph")
+        return self._executor
+
+    def _run_node(self, name: str, incident: IncidentInput, upstream: dict[str, AgentStep]) -> AgentStep:
+        with span("agent", name) as timing:
+            step = self.agents[name].run(incident, **upstream)
+        step.duration_ms = timing.duration_ms
+        return step
+
+    def run(
+        self,
+        incident: IncidentInput,
+        on_step: Callable[[AgentStep], None] | None = None,
+        seed: dict[str, AgentStep] | None = None,
+    ) -> dict[str, AgentStep]:
+        """Execute the graph for one incident; returns steps keyed by agent name.
+
+        ``on_step`` is called on the calling thread with each step as soon as it completes.
+        Steps in ``seed`` were computed elsewhere (e.g. batch triage) and are not re-run.
+        """
+        results: dict[str, AgentStep] = dict(seed or {})
+        if on_step is not None:
+            for name in self.order:
+                if name in results:
+                    on_step(results[name])
+        in_flight: dict[Future[AgentStep], str] = {}
+
+        while len(results) < len(self.order):
+            running = set(in_flight.values())
+            ready = [
+                name
+                for name in self.order
+                if name not in results
+                and name not in running
+                and all(dep in results for dep in self.agents[name].inputs)
+            ]
+
+            if ready:
+                inline, *parallel = ready
+                for name in parallel:
+                    run_node = in_current_context(self._run_node)
+                    future = self._pool().submit(run_node, name, incident, self._upstream(name, results))
+                    in_flight[future] = name
+                results[inline] = self._run_node(inline, incident, self._upstream(inline, results))
+                if on_step is not None:
+                    on_step(results[inline])
+                continue
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                step = results[in_flight.pop(future)] = future.result()
+                if on_step is not None:
+                    on_step(step)
+
+        return results
+
+    async def _arun_node(self, name: str, incident: IncidentInput, upstream: dict[str, AgentStep]) -> AgentStep:
+        agent = self.agents[name]
+        with span("agent", name) as timing:
+            arun = getattr(agent, "arun", None)
+            step = await arun(incident, **upstream) if arun is not None else agent.run(incident, **upstream)
+        step.duration_ms = timing.duration_ms
+        return step
+
+    async def arun(
+        self,
+        incident: IncidentInput,
+        on_step: Callable[[AgentStep], None] | None = None,
+        seed: dict[str, AgentStep] | None = None,
+    ) -> dict[str, AgentStep]:
+        """Async counterpart of ``run``; ready agents run concurrently as tasks on the current loop."""
+        results: dict[str, AgentStep] = dict(seed or {})
+        if on_step is not None:
+            for name in self.order:
+                if name in results:
+                    on_step(results[name])
+        in_flight: dict[asyncio.Task[AgentStep], str] = {}
+
+        try:
+            while len(results) < len(self.order):
+                running = set(in_flight.values())
+                for name in self.order:
+                    if (
+                        name not in results
+                        and name not in running
+                        and all(dep in results for dep in self.agents[name].inputs)
+                    ):
+                        task = asyncio.ensure_future(self._arun_node(name, incident, self._upstream(name, results)))
+                        in_flight[task] = name
+
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    step = results[in_flight.pop(task)] = task.result()
+                    if on_step is not None:
+                        on_step(step)
+        finally:
+            for task in in_flight:
+                task.cancel()
+
+        return results
+
+    def _upstream(self, name: str, results: dict[str, AgentStep]) -> dict[str, Any]:
+        return {dep: results[dep] for dep in self.agents[name].inputs}
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
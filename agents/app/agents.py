@@ -1,39 +1,127 @@
 from __future__ import annotations
 
+import asyncio
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from time import perf_counter
+from typing import Any, Callable, ClassVar, Protocol
 
+from .agent_graph import AgentGraph
 from .models import IncidentInput, AgentStep, IncidentRunResult
+from .profiling import in_current_context
+from .runbooks import RunbookCatalog
+from .signals import confidence_for, parse_signals, score_suspects
+
+# Distinct services diagnosed at once by ``IncidentWorkflow.run_many``.
+DIAGNOSIS_BATCH_WORKERS = 8
+
+# Runbook trigger matched for each triage suspect.
+SUSPECT_TRIGGERS = {
+    "recent_deploy": "latency_after_deploy",
+    "traffic_spike": "traffic_spike",
+}
+
+
+def _top_suspect(suspect_scores: dict[str, float], has_deploy: bool) -> str:
+    """Highest-scoring suspect; ties (e.g. no signals) go to the deploy, else the traffic spike."""
+    fallback = "recent_deploy" if has_deploy else "traffic_spike"
+    return max(suspect_scores, key=lambda suspect: (suspect_scores[suspect], suspect == fallback))
 
 
 @dataclass
 class TriageAgent:
+    inputs: ClassVar[tuple[str, ...]] = ()
     name: str = "triage"
 
     def run(self, incident: IncidentInput) -> AgentStep:
-        confidence = "high" if incident.severity in {"high", "critical"} else "medium"
-        suspects = ["recent_deploy"] if incident.recent_deploy_sha else ["traffic_spike"]
-        return AgentStep(
-            agent=self.name,
-            action="classify_incident",
-            output={
-                "confidence": confidence,
-                "suspects": suspects,
-                "priority": incident.severity,
-            },
-        )
+        return self.run_batch([incident])[0]
+
+    def run_batch(self, incidents: list[IncidentInput]) -> list[AgentStep]:
+        """Triage many incidents with one parse/score pass; ``run`` is the batch-of-one case."""
+        parsed = [parse_signals(incident.signals) for incident in incidents]
+        scores = score_suspects(parsed, [bool(incident.recent_deploy_sha) for incident in incidents])
+
+        steps = []
+        for incident, signals, suspect_scores in zip(incidents, parsed, scores):
+            suspect = _top_suspect(suspect_scores, bool(incident.recent_deploy_sha))
+            steps.append(
+                AgentStep(
+                    agent=self.name,
+                    action="classify_incident",
+                    output={
+                        "confidence": confidence_for(suspect_scores[suspect], incident.severity),
+                        "suspects": [suspect],
+                        "priority": incident.severity,
+                        "suspect_scores": suspect_scores,
+                        "signals": [signal.to_dict() for signal in signals],
+                    },
+                )
+            )
+        return steps
+
+
+class LogAnalytics(Protocol):
+    def run_diagnosis_queries(self, service: str) -> dict[str, Any]: ...
+
+
+class AsyncLogAnalytics(Protocol):
+    async def run_diagnosis_queries(self, service: str) -> dict[str, Any]: ...
+
+
+NOT_CONFIGURED = {"status": "skipped", "reason": "log_analytics_not_configured"}
 
 
 @dataclass
 class DiagnosisAgent:
+    """Builds the root-cause hypothesis, correlating live logs and latency when analytics are configured.
+
+    ``run`` (batch endpoint, sync graph) queries ``log_analytics``; ``arun`` (request
+    path) awaits ``async_log_analytics`` so the diagnosis budget is spent on the event loop.
+    """
+
+    inputs: ClassVar[tuple[str, ...]] = ("triage",)
     name: str = "diagnosis"
+    log_analytics: LogAnalytics | None = None
+    async_log_analytics: AsyncLogAnalytics | None = None
+
+    def _correlate(self, service: str) -> dict[str, Any]:
+        if self.log_analytics is None:
+            return dict(NOT_CONFIGURED)
+        return self.log_analytics.run_diagnosis_queries(service)
+
+    async def _acorrelate(self, service: str) -> dict[str, Any]:
+        if self.async_log_analytics is not None:
+            return await self.async_log_analytics.run_diagnosis_queries(service)
+        if self.log_analytics is None:
+            return dict(NOT_CONFIGURED)
+        return await asyncio.to_thread(self.log_analytics.run_diagnosis_queries, service)
+
+    def correlate_many(self, services: list[str]) -> dict[str, dict[str, Any]]:
+        """Diagnose each distinct service once, concurrently; the batch endpoint shares the reports."""
+        distinct = list(dict.fromkeys(services))
+        if self.log_analytics is None or len(distinct) <= 1:
+            return {service: self._correlate(service) for service in distinct}
+        workers = min(len(distinct), DIAGNOSIS_BATCH_WORKERS)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="diagnosis-batch") as pool:
+            futures = {service: pool.submit(in_current_context(self._correlate), service) for service in distinct}
+            return {service: future.result() for service, future in futures.items()}
 
     def run(self, incident: IncidentInput, triage: AgentStep) -> AgentStep:
+        return self._step(incident, triage, self._correlate(incident.service))
+
+    async def arun(self, incident: IncidentInput, triage: AgentStep) -> AgentStep:
+        return self._step(incident, triage, await self._acorrelate(incident.service))
+
+    def _step(self, incident: IncidentInput, triage: AgentStep, correlation: dict[str, Any]) -> AgentStep:
         hypothesis = (
             "Regression introduced in recent deploy"
             if "recent_deploy" in triage.output.get("suspects", [])
             else "Capacity saturation due to abnormal traffic"
         )
+        hot_hosts = [entry["host"] for entry in correlation.get("top_hosts", [])]
+        if hot_hosts:
+            hypothesis = f"{hypothesis}; errors concentrated on {', '.join(hot_hosts)}"
         query_plan = [
             "FROM logs-* | WHERE service == ? AND @timestamp > NOW()-15m",
             "FROM metrics-* | STATS p95=percentile(latency_ms,95) BY service",
@@ -45,21 +133,34 @@ class DiagnosisAgent:
                 "hypothesis": hypothesis,
                 "query_plan": query_plan,
                 "signals_seen": incident.signals,
+                "correlation": correlation,
             },
         )
 
 
 @dataclass
 class RemediationAgent:
+    inputs: ClassVar[tuple[str, ...]] = ("triage", "diagnosis")
     name: str = "remediation"
+    runbooks: RunbookCatalog | None = None
+
+    def _catalog_match(self, incident: IncidentInput, triage: AgentStep) -> dict[str, str] | None:
+        if self.runbooks is None:
+            return None
+        for suspect in triage.output.get("suspects", []):
+            runbook = self.runbooks.resolve(incident.service, SUSPECT_TRIGGERS.get(suspect, suspect))
+            if runbook is not None:
+                return {"id": runbook.id, "action": runbook.action, "risk": runbook.risk}
+        return None
 
-    def run(self, incident: IncidentInput, diagnosis: AgentStep) -> AgentStep:
-        if incident.severity in {"high", "critical"}:
-            action = "rollback_latest_deploy"
-            risk = "medium"
+    def run(self, incident: IncidentInput, triage: AgentStep, diagnosis: AgentStep) -> AgentStep:
+        runbook = self._catalog_match(incident, triage)
+        if runbook is not None:
+            action, risk, runbook_id = runbook["action"], runbook["risk"], runbook["id"]
+        elif incident.severity in {"high", "critical"}:
+            action, risk, runbook_id = "rollback_latest_deploy", "medium", None
         else:
-            action = "scale_service_replicas"
-            risk = "low"
+            action, risk, runbook_id = "scale_service_replicas", "low", None
 
         return AgentStep(
             agent=self.name,
@@ -67,6 +168,7 @@ class RemediationAgent:
             output={
                 "runbook_action": action,
                 "risk": risk,
+                "runbook_id": runbook_id,
                 "justification": diagnosis.output.get("hypothesis", "insufficient data"),
             },
         )
@@ -74,6 +176,7 @@ class RemediationAgent:
 
 @dataclass
 class CommunicationAgent:
+    inputs: ClassVar[tuple[str, ...]] = ("remediation",)
     name: str = "communication"
 
     def run(self, incident: IncidentInput, remediation: AgentStep) -> AgentStep:
@@ -93,21 +196,43 @@ class CommunicationAgent:
 
 
 class IncidentWorkflow:
-    def __init__(self) -> None:
+    """Runs the incident agents as a dependency graph; see ``AgentGraph``."""
+
+    def __init__(
+        self,
+        log_analytics: LogAnalytics | None = None,
+        runbooks: RunbookCatalog | None = None,
+        async_log_analytics: AsyncLogAnalytics | None = None,
+    ) -> None:
         self.triage = TriageAgent()
-        self.diagnosis = DiagnosisAgent()
-        self.remediation = RemediationAgent()
+        self.diagnosis = DiagnosisAgent(log_analytics=log_analytics, async_log_analytics=async_log_analytics)
+        self.remediation = RemediationAgent(runbooks=runbooks)
         self.communication = CommunicationAgent()
+        self.graph = AgentGraph([self.triage, self.diagnosis, self.remediation, self.communication])
+
+    def run(
+        self,
+        incident: IncidentInput,
+        on_step: Callable[[AgentStep], None] | None = None,
+        seed: dict[str, AgentStep] | None = None,
+    ) -> IncidentRunResult:
+        return self._result(incident, self.graph.run(incident, on_step, seed))
 
-    def run(self, incident: IncidentInput) -> IncidentRunResult:
-        step_1 = self.triage.run(incident)
-        step_2 = self.diagnosis.run(incident, step_1)
-        step_3 = self.remediation.run(incident, step_2)
-        step_4 = self.communication.run(incident, step_3)
+    async def arun(
+        self,
+        incident: IncidentInput,
+        on_step: Callable[[AgentStep], None] | None = None,
+    ) -> IncidentRunResult:
+        """Run the graph on the event loop; ``on_step`` is called on the loop as each step completes."""
+        return self._result(incident, await self.graph.arun(incident, on_step))
+
+    def _result(self, incident: IncidentInput, steps: dict[str, AgentStep]) -> IncidentRunResult:
+        remediation = steps[self.remediation.name]
+        communication = steps[self.communication.name]
 
         status = "mitigated" if incident.severity in {"low", "medium"} else "investigating"
         recommendation = (
-            f"Execute {step_3.output.get('runbook_action')} and validate latency/error recovery over 10 minutes."
+            f"Execute {remediation.output.get('runbook_action')} and validate latency/error recovery over 10 minutes."
         )
 
         return IncidentRunResult(
@@ -115,7 +240,37 @@ class IncidentWorkflow:
             service=incident.service,
             severity=incident.severity,
             status=status,
-            timeline=[step_1, step_2, step_3, step_4],
+            timeline=[steps[name] for name in self.graph.order],
             recommendation=recommendation,
-            stakeholder_update=step_4.output.get("message", ""),
+            stakeholder_update=communication.output.get("message", ""),
         )
+
+    def run_many(self, incidents: list[IncidentInput]) -> list[IncidentRunResult]:
+        """Run several incidents, triaging them together in one batch-scoring pass.
+
+        Diagnosis queries run once per distinct service (concurrently) and each report is
+        shared by every incident of that service; the remaining agents run per incident.
+        """
+        started = perf_counter()
+        triage_steps = self.triage.run_batch(incidents)
+        per_incident_ms = round((perf_counter() - started) * 1000 / max(1, len(incidents)), 2)
+        for step in triage_steps:
+            step.duration_ms = per_incident_ms
+
+        started = perf_counter()
+        correlations = self.diagnosis.correlate_many([incident.service for incident in incidents])
+        diagnosis_steps = [
+            self.diagnosis._step(incident, triage, correlations[incident.service])
+            for incident, triage in zip(incidents, triage_steps)
+        ]
+        per_incident_ms = round((perf_counter() - started) * 1000 / max(1, len(incidents)), 2)
+        for step in diagnosis_steps:
+            step.duration_ms = per_incident_ms
+
+        return [
+            self.run(incident, seed={self.triage.name: triage, self.diagnosis.name: diagnosis})
+            for incident, triage, diagnosis in zip(incidents, triage_steps, diagnosis_steps)
+        ]
+
+    def close(self) -> None:
+        self.graph.close()
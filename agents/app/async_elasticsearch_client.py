@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+import asyncio
+from time import monotonic, perf_counter
+from typing import TYPE_CHECKING, Any
+
+from .config import Settings
+from .elasticsearch_client import INCIDENT_MAPPINGS, RECENT_INCIDENTS_SIZE, BaseElasticsearchService
+from .models import IncidentInput, IncidentRunResult
+from .profiling import span
+from .resilience import acall_with_retry
+
+if TYPE_CHECKING:
+    from elasticsearch import AsyncElasticsearch
+
+
+class AsyncElasticsearchService(BaseElasticsearchService):
+    """asyncio counterpart of ``ElasticsearchService`` sharing one pooled ``AsyncElasticsearch``."""
+
+    def __init__(self, settings: Settings) -> None:
+        super().__init__(settings)
+        self._probe_task: asyncio.Task[None] | None = None
+
+    def _build_client(self) -> "AsyncElasticsearch":
+        from elasticsearch import AsyncElasticsearch
+
+        return AsyncElasticsearch(**self._client_options())
+
+    async def _ensure_index_ready(self) -> dict[str, Any]:
+        # Concurrent first requests may both create the index; the duplicate 400 is ignored.
+        if self._index_ready:
+            return self._cached_create_result()
+        with span("elastic", "create_index"):
+            body = await acall_with_retry(self._ensure_index, self.retry_policy, self._is_retryable)
+        self._index_ready = True
+        return {**body, "cached": False}
+
+    async def _probe_health(self) -> bool:
+        assert self.client is not None
+        try:
+            with span("elastic", "ping"):
+                ok = bool(await self.client.ping())
+        except Exception:
+            self._health = (False, monotonic())
+            raise
+        self._health = (ok, monotonic())
+        return ok
+
+    async def _health_ok(self) -> bool:
+        if self._health_is_fresh():
+            assert self._health is not None
+            return self._health[0]
+        return await self._probe_health()
+
+    async def _probe_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.settings.elastic_health_interval_seconds)
+            try:
+                await self._probe_health()
+            except Exception:
+                pass
+
+    def start_health_probe(self) -> None:
+        if not self.client or (self._probe_task and not self._probe_task.done()):
+            return
+        self._probe_task = asyncio.get_running_loop().create_task(self._probe_loop())
+
+    async def stop_health_probe(self) -> None:
+        task, self._probe_task = self._probe_task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def bootstrap(self) -> None:
+        """Warm the health cache and create the index ahead of the first request."""
+        if not self.client:
+            return
+        try:
+            if await self._probe_health():
+                await self._ensure_index_ready()
+        except Exception:
+            # The request path retries lazily and reports the failing phase.
+            pass
+
+    async def warm_up(self, connections: int) -> dict[str, Any]:
+        """Build the client, bootstrap the index and open up to ``connections`` pooled connections."""
+        started = perf_counter()
+        client = self.client
+        if client is None:
+            return self._warm_up_unavailable()
+        await self.bootstrap()
+        extra = max(0, min(connections, self.settings.elastic_connections_per_node) - 1)
+        pings = await asyncio.gather(*(client.ping() for _ in range(extra)), return_exceptions=True)
+        connected = int(bool(self._health and self._health[0]))
+        connected += sum(1 for ok in pings if ok is True)
+        return self._warm_up_report(started, connected)
+
+    async def close(self) -> None:
+        """Stop the probe and close the pool; the next use rebuilds the client lazily."""
+        await self.stop_health_probe()
+        with self._client_lock:
+            client, self._client = self._client, None
+            self._client_resolved = False
+        if client is not None:
+            await client.close()
+        self._index_ready = False
+        self._health = None
+
+    async def _preflight(self, started: float) -> tuple[dict[str, Any] | None, dict[str, Any]]:
+        try:
+            ping_ok = await self._health_ok()
+        except Exception as exc:  # pragma: no cover - defensive path
+            return self._phase_error(started, "ping", exc, dependency_failure=True), {}
+
+        if not ping_ok:
+            return self._phase_error(started, "ping", Exception("elastic_ping_failed"), dependency_failure=True), {}
+
+        try:
+            return None, await self._ensure_index_ready()
+        except Exception as exc:
+            return self._phase_error(started, "create_index", exc), {}
+
+    async def _ensure_index(self) -> dict[str, Any]:
+        assert self.client is not None
+        response = await self.client.options(ignore_status=400).indices.create(
+            index=self.settings.incidents_index,
+            mappings=INCIDENT_MAPPINGS,
+        )
+        return self._body(response)
+
+    async def _index_incident(
+        self,
+        incident: IncidentInput,
+        result: IncidentRunResult,
+    ) -> dict[str, Any]:
+        assert self.client is not None
+        response = await self.client.index(
+            index=self.settings.incidents_index,
+            id=result.incident_id,
+            document=self._build_document(incident, result),
+            refresh=self.settings.elastic_refresh,
+        )
+        return self._body(response)
+
+    async def _cached_read(self, phase: str, key: tuple[str, ...], fetch: Any, *args: Any) -> dict[str, Any]:
+        cached = self.analytics_cache.get(key)
+        if cached is not None:
+            return cached
+        with span("elastic", phase):
+            body = await acall_with_retry(lambda: fetch(*args), self.retry_policy, self._is_retryable)
+        self.analytics_cache.set(key, body)
+        return body
+
+    async def _search_recent(self, service: str) -> dict[str, Any]:
+        assert self.client is not None
+        response = await self.client.search(
+            index=self.settings.incidents_index,
+            size=RECENT_INCIDENTS_SIZE,
+            query={"term": {"service": {"value": service}}},
+            sort=[{"created_at": {"order": "desc"}}],
+        )
+        return self._body(response)
+
+    async def _run_esql(self, service: str, severity: str) -> dict[str, Any]:
+        assert self.client is not None
+        response = await self.client.esql.query(
+            query=self._incident_count_query,
+            params=[service, severity],
+        )
+        return self._with_local_write(self._body(response))
+
+    async def _run_diagnosis_query(self, phase: str, query: str, service: str, timeout: float) -> dict[str, Any]:
+        assert self.client is not None
+        with span("elastic", phase):
+            response = await asyncio.wait_for(
+                self.client.options(request_timeout=timeout).esql.query(
+                    query=query,
+                    params=[service],
+                    columnar=True,
+                ),
+                timeout,
+            )
+        return self._body(response)
+
+    async def run_diagnosis_queries(self, service: str) -> dict[str, Any]:
+        """Run log correlation and p95 latency concurrently, cancelling whatever misses the diagnosis budget."""
+        skipped = self._diagnosis_precheck(service)
+        if skipped is not None:
+            return skipped
+
+        started = perf_counter()
+        budget = self.settings.diagnosis_esql_budget_ms / 1000
+        phases = list(self._diagnosis_queries.items())
+        outcomes = await asyncio.gather(
+            *(self._run_diagnosis_query(phase, query, service, budget) for phase, query in phases),
+            return_exceptions=True,
+        )
+
+        bodies: dict[str, dict[str, Any]] = {}
+        failures: dict[str, BaseException] = {}
+        for (phase, _), outcome in zip(phases, outcomes):
+            if isinstance(outcome, BaseException):
+                failures[phase] = outcome
+            else:
+                bodies[phase] = outcome
+        return self._finish_diagnosis(service, started, bodies, failures)
+
+    async def record_incident_and_analyze(
+        self,
+        incident: IncidentInput,
+        result: IncidentRunResult,
+    ) -> dict[str, Any]:
+        if not self.client:
+            return self._skipped_response()
+
+        if not self.breaker.allow():
+            return self._circuit_open_response()
+
+        started = perf_counter()
+
+        preflight_error, create_result = await self._preflight(started)
+        if preflight_error:
+            return preflight_error
+
+        try:
+            with span("elastic", "index_document"):
+                index_result = await acall_with_retry(
+                    lambda: self._index_incident(incident, result),
+                    self.retry_policy,
+                    self._is_retryable,
+                )
+        except Exception as exc:
+            return self._phase_error(started, "index_document", exc)
+
+        self._apply_local_write(incident, result.incident_id)
+        search_result, esql_result = await asyncio.gather(
+            self._cached_read(
+                "search_recent", self._search_cache_key(incident.service), self._search_recent, incident.service
+            ),
+            self._cached_read(
+                "esql_query",
+                self._esql_cache_key(incident.service, incident.severity),
+                self._run_esql,
+                incident.service,
+                incident.severity,
+            ),
+            return_exceptions=True,
+        )
+
+        # Report search first when both fail, matching the sequential phase order.
+        if isinstance(search_result, Exception):
+            return self._phase_error(started, "search_recent", search_result)
+
+        if isinstance(esql_result, Exception):
+            return self._phase_error(started, "esql_query", esql_result)
+
+        self.breaker.record_success()
+        return self._analysis_report(
+            started, result.incident_id, create_result, index_result, search_result, esql_result
+        )
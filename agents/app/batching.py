@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import queue
+import threading
+from time import monotonic, perf_counter
+from typing import Any, Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class MicroBatcher(Generic[T]):
+    """Bounded in-process queue drained by a background thread in size/time-triggered batches.
+
+    Producers block for up to ``enqueue_timeout_ms`` when the queue is full (backpressure)
+    and the item is dropped after that. A batch is flushed once it reaches ``batch_size``
+    items or ``flush_interval_ms`` after its first item arrived, whichever comes first.
+    The worker thread starts with the first submit; after ``stop`` submits are rejected
+    until ``start`` or ``reopen`` is called.
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[list[T]], Any],
+        *,
+        name: str,
+        max_queue: int,
+        batch_size: int,
+        flush_interval_ms: int,
+        enqueue_timeout_ms: int,
+    ) -> None:
+        self._flush = flush
+        self.name = name
+        self.max_queue = max_queue
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(0, flush_interval_ms) / 1000
+        self.enqueue_timeout = max(0, enqueue_timeout_ms) / 1000
+        self._queue: queue.Queue[T] = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._closed = False
+        self._enqueued = 0
+        self._dropped = 0
+        self._rejected = 0
+        self._flushed = 0
+        self._batches = 0
+        self._flush_errors = 0
+        self._last_batch_size = 0
+        self._last_flush_ms = 0.0
+        self._max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def start(self) -> None:
+        """Start the worker, re-opening the batcher if it was stopped."""
+        with self._lock:
+            self._closed = False
+            self._start_worker()
+
+    def reopen(self) -> None:
+        """Accept work again after ``stop``; the worker starts with the next submit."""
+        with self._lock:
+            self._closed = False
+
+    def _start_worker(self) -> None:
+        # Called with ``_lock`` held.
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item: T) -> bool:
+        """Enqueue ``item``; returns ``False`` when the queue stayed full or the batcher is stopped."""
+        with self._lock:
+            if self._closed:
+                self._rejected += 1
+                return False
+            self._start_worker()
+        try:
+            if self.enqueue_timeout:
+                self._queue.put(item, timeout=self.enqueue_timeout)
+            else:
+                self._queue.put_nowait(item)
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+            return False
+
+        with self._lock:
+            self._enqueued += 1
+        if self._closed:
+            # ``stop`` ran while this item was being enqueued; flush it if the worker is gone.
+            self._drain_if_stopped()
+        return True
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Stop accepting work and flush everything already queued.
+
+        The worker drains the queue before it exits. If it is still flushing when
+        ``timeout`` expires it is left to finish in the background; the queue is only
+        drained on the calling thread once the worker has exited.
+        """
+        with self._lock:
+            self._closed = True
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        self._drain_if_stopped()
+
+    def _drain_if_stopped(self) -> None:
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            self._drain()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            batch = self._collect()
+            if batch:
+                self._flush_batch(batch)
+        self._drain()
+
+    def _collect(self) -> list[T]:
+        try:
+            first = self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+
+        batch = [first]
+        deadline = monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _drain(self) -> None:
+        while True:
+            batch: list[T] = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return
+            self._flush_batch(batch)
+
+    def _flush_batch(self, batch: list[T]) -> None:
+        started = perf_counter()
+        failed = False
+        try:
+            self._flush(batch)
+        except Exception:
+            failed = True
+
+        elapsed_ms = (perf_counter() - started) * 1000
+        with self._lock:
+            self._batches += 1
+            self._flushed += len(batch)
+            self._flush_errors += int(failed)
+            self._last_batch_size = len(batch)
+            self._last_flush_ms = elapsed_ms
+            self._max_flush_ms = max(self._max_flush_ms, elapsed_ms)
+            self._total_flush_ms += elapsed_ms
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "running": self.running,
+                "closed": self._closed,
+                "queue_depth": self.depth,
+                "max_queue": self.max_queue,
+                "batch_size": self.batch_size,
+                "flush_interval_ms": round(self.flush_interval * 1000, 2),
+                "enqueued": self._enqueued,
+                "dropped": self._dropped,
+                "rejected": self._rejected,
+                "flushed": self._flushed,
+                "batches": self._batches,
+                "flush_errors": self._flush_errors,
+                "last_batch_size": self._last_batch_size,
+                "last_flush_ms": round(self._last_flush_ms, 2),
+                "max_flush_ms": round(self._max_flush_ms, 2),
+                "avg_flush_ms": round(self._total_flush_ms / self._batches, 2) if self._batches else 0.0,
+            }
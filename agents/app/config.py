@@ -2,6 +2,17 @@ from __future__ import annotations
 
 import os
 from dataclasses import dataclass
+from pathlib import Path
+
+REFRESH_POLICIES = ("wait_for", "false", "true")
+DEFAULT_RUNBOOKS_PATH = Path(__file__).resolve().parents[2] / "data" / "sample_runbooks.json"
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in {"1", "true", "yes", "on"}
 
 
 @dataclass(frozen=True)
@@ -18,9 +29,49 @@ class Settings:
     agent_builder_api_key: str | None
     agent_builder_route: str
     request_timeout_seconds: int
+    elastic_bulk_chunk_size: int = 500
+    elastic_refresh: str = "wait_for"
+    elastic_health_interval_seconds: float = 15.0
+    elastic_connections_per_node: int = 32
+    analytics_cache_ttl_seconds: float = 5.0
+    analytics_cache_max_entries: int = 1024
+    agent_builder_max_connections: int = 10
+    agent_builder_keepalive: bool = True
+    agent_builder_dispatch_mode: str = "sync"
+    agent_builder_dispatch_workers: int = 8
+    agent_builder_dispatch_max_pending: int = 10000
+    agent_builder_dispatch_history: int = 10000
+    agent_builder_batch_route: str = "/api/incident/execute-batch"
+    agent_builder_batch_size: int = 50
+    agent_builder_batch_window_ms: int = 200
+    agent_builder_gzip: bool = True
+    retry_max_attempts: int = 3
+    retry_base_delay_ms: int = 100
+    retry_max_delay_ms: int = 2000
+    breaker_failure_threshold: int = 5
+    breaker_reset_seconds: float = 30.0
+    diagnosis_esql_budget_ms: int = 800
+    diagnosis_top_hosts: int = 3
+    diagnosis_failure_ttl_seconds: float = 2.0
+    runbooks_path: str | None = None
+    runbooks_reload_interval_seconds: float = 2.0
+    dedup_window_seconds: float = 0.0
+    dedup_max_entries: int = 10000
+    dedup_flush_ms: int = 1000
+    warmup_connections: int = 4
+    warmup_timeout_seconds: float = 2.0
+    elastic_write_mode: str = "sync"
+    write_behind_max_queue: int = 10000
+    write_behind_batch_size: int = 200
+    write_behind_flush_ms: int = 250
+    write_behind_enqueue_timeout_ms: int = 50
 
     @classmethod
     def from_env(cls) -> "Settings":
+        elastic_refresh = os.getenv("ELASTIC_REFRESH", "wait_for").strip().lower()
+        if elastic_refresh not in REFRESH_POLICIES:
+            raise ValueError(f"ELASTIC_REFRESH must be one of {', '.join(REFRESH_POLICIES)}")
+
         return cls(
             elastic_cloud_id=os.getenv("ELASTIC_CLOUD_ID"),
             elastic_api_key=os.getenv("ELASTIC_API_KEY"),
@@ -32,6 +83,42 @@ class Settings:
             agent_builder_api_key=os.getenv("AGENT_BUILDER_API_KEY"),
             agent_builder_route=os.getenv("AGENT_BUILDER_ROUTE", "/api/incident/execute"),
             request_timeout_seconds=int(os.getenv("REQUEST_TIMEOUT_SECONDS", "10")),
+            elastic_bulk_chunk_size=int(os.getenv("ELASTIC_BULK_CHUNK_SIZE", "500")),
+            elastic_refresh=elastic_refresh,
+            elastic_health_interval_seconds=float(os.getenv("ELASTIC_HEALTH_INTERVAL_SECONDS", "15")),
+            elastic_connections_per_node=int(os.getenv("ELASTIC_CONNECTIONS_PER_NODE", "32")),
+            analytics_cache_ttl_seconds=float(os.getenv("ANALYTICS_CACHE_TTL_SECONDS", "5")),
+            analytics_cache_max_entries=int(os.getenv("ANALYTICS_CACHE_MAX_ENTRIES", "1024")),
+            agent_builder_max_connections=int(os.getenv("AGENT_BUILDER_MAX_CONNECTIONS", "10")),
+            agent_builder_keepalive=_env_flag("AGENT_BUILDER_KEEPALIVE", True),
+            agent_builder_dispatch_mode=os.getenv("AGENT_BUILDER_DISPATCH_MODE", "sync").strip().lower(),
+            agent_builder_dispatch_workers=int(os.getenv("AGENT_BUILDER_DISPATCH_WORKERS", "8")),
+            agent_builder_dispatch_max_pending=int(os.getenv("AGENT_BUILDER_DISPATCH_MAX_PENDING", "10000")),
+            agent_builder_dispatch_history=int(os.getenv("AGENT_BUILDER_DISPATCH_HISTORY", "10000")),
+            agent_builder_batch_route=os.getenv("AGENT_BUILDER_BATCH_ROUTE", "/api/incident/execute-batch"),
+            agent_builder_batch_size=int(os.getenv("AGENT_BUILDER_BATCH_SIZE", "50")),
+            agent_builder_batch_window_ms=int(os.getenv("AGENT_BUILDER_BATCH_WINDOW_MS", "200")),
+            agent_builder_gzip=_env_flag("AGENT_BUILDER_GZIP", True),
+            retry_max_attempts=int(os.getenv("RETRY_MAX_ATTEMPTS", "3")),
+            retry_base_delay_ms=int(os.getenv("RETRY_BASE_DELAY_MS", "100")),
+            retry_max_delay_ms=int(os.getenv("RETRY_MAX_DELAY_MS", "2000")),
+            breaker_failure_threshold=int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5")),
+            breaker_reset_seconds=float(os.getenv("BREAKER_RESET_SECONDS", "30")),
+            diagnosis_esql_budget_ms=int(os.getenv("DIAGNOSIS_ESQL_BUDGET_MS", "800")),
+            diagnosis_top_hosts=int(os.getenv("DIAGNOSIS_TOP_HOSTS", "3")),
+            diagnosis_failure_ttl_seconds=float(os.getenv("DIAGNOSIS_FAILURE_TTL_SECONDS", "2")),
+            runbooks_path=os.getenv("RUNBOOKS_PATH", str(DEFAULT_RUNBOOKS_PATH)),
+            runbooks_reload_interval_seconds=float(os.getenv("RUNBOOKS_RELOAD_INTERVAL_SECONDS", "2")),
+            dedup_window_seconds=float(os.getenv("DEDUP_WINDOW_SECONDS", "0")),
+            dedup_max_entries=int(os.getenv("DEDUP_MAX_ENTRIES", "10000")),
+            dedup_flush_ms=int(os.getenv("DEDUP_FLUSH_MS", "1000")),
+            warmup_connections=int(os.getenv("WARMUP_CONNECTIONS", "4")),
+            warmup_timeout_seconds=float(os.getenv("WARMUP_TIMEOUT_SECONDS", "2")),
+            elastic_write_mode=os.getenv("ELASTIC_WRITE_MODE", "sync").strip().lower(),
+            write_behind_max_queue=int(os.getenv("WRITE_BEHIND_MAX_QUEUE", "10000")),
+            write_behind_batch_size=int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "200")),
+            write_behind_flush_ms=int(os.getenv("WRITE_BEHIND_FLUSH_MS", "250")),
+            write_behind_enqueue_timeout_ms=int(os.getenv("WRITE_BEHIND_ENQUEUE_TIMEOUT_MS", "50")),
         )
 
     @property
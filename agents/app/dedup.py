@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from itertools import islice
+from time import monotonic
+from typing import TYPE_CHECKING, Any
+
+from .batching import MicroBatcher
+from .config import Settings
+from .models import IncidentInput, IncidentRunResult
+from .signals import parse_signal
+
+if TYPE_CHECKING:
+    from .elasticsearch_client import ElasticsearchService
+
+
+STORED_STATUSES = {"ok", "queued"}
+# A bump that reaches Elastic before its document (write-behind mode) is retried on later flushes.
+BUMP_MAX_ATTEMPTS = 5
+DOCUMENT_MISSING_STATUS = 404
+
+
+def incident_fingerprint(incident: IncidentInput) -> str:
+    """Stable key for "the same alert": service, severity and the signal shapes, not their values.
+
+    ``"p95 latency > 2.5s"`` and ``"p95 latency > 2.7s"`` normalize to the same
+    ``p95_latency:>`` entry, so a storm of re-fired alerts shares one fingerprint.
+    """
+    shapes = sorted({f"{signal.metric}:{signal.operator or ''}" for signal in map(parse_signal, incident.signals)})
+    key = "|".join([incident.service, incident.severity, *shapes])
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class _Entry:
+    first_seen: float
+    result: IncidentRunResult | None = None
+    abandoned: bool = False
+    occurrences: int = 1
+    occurrence_update: str = "skipped"
+    waiters: list[asyncio.Future[None]] = field(default_factory=list)
+
+    @property
+    def settled(self) -> bool:
+        return self.result is not None or self.abandoned
+
+
+@dataclass(frozen=True)
+class DedupClaim:
+    fingerprint: str
+    duplicate: bool
+    result: IncidentRunResult | None = None
+    occurrences: int = 1
+    occurrence_update: str = "skipped"
+
+    @property
+    def pending(self) -> bool:
+        """A duplicate whose primary was still running when the wait timed out."""
+        return self.duplicate and self.result is None
+
+
+def _wake(waiter: asyncio.Future[None]) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class IncidentDeduplicator:
+    """Coalesces repeated alerts within ``dedup_window_seconds`` onto the first incident.
+
+    The first alert for a fingerprint runs the full workflow; later ones within the window
+    reuse its result, skip both integrations and only bump ``occurrence_count`` on the
+    stored document. Bumps are coalesced per incident and flushed as scripted ``_bulk``
+    updates, so a 300-alert storm costs a handful of writes instead of 300.
+
+    Duplicates of a primary that is still running wait on the event loop (one future per
+    waiter), so a storm does not tie up the threadpool the primary itself needs.
+    """
+
+    def __init__(self, settings: Settings, elastic_service: "ElasticsearchService") -> None:
+        self.settings = settings
+        self.elastic_service = elastic_service
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._primaries = 0
+        self._duplicates = 0
+        self._timed_out = 0
+        self._bump_failures = 0
+        self._bump_retries = 0
+        self._bumps: MicroBatcher[tuple[str, int, int]] = MicroBatcher(
+            self._flush_bumps,
+            name="incident-occurrence-bumps",
+            max_queue=settings.dedup_max_entries,
+            batch_size=settings.dedup_max_entries,
+            flush_interval_ms=settings.dedup_flush_ms,
+            enqueue_timeout_ms=0,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.settings.dedup_window_seconds > 0
+
+    def _evict_settled(self) -> None:
+        # Oldest first, skipping entries whose primary is still running: ``complete`` and
+        # ``abandon`` must find those, so the table may briefly exceed the cap.
+        excess = len(self._entries) - self.settings.dedup_max_entries
+        if excess <= 0:
+            return
+        evictable = list(islice((key for key, entry in self._entries.items() if entry.settled), excess))
+        for fingerprint in evictable:
+            del self._entries[fingerprint]
+
+    async def claim(self, incident: IncidentInput) -> DedupClaim:
+        """Register ``incident`` as a primary or attach it to the live incident with its fingerprint.
+
+        A duplicate that arrives while the primary is still running waits for its result
+        for up to ``request_timeout_seconds``. On timeout it stays a duplicate (its
+        occurrence is bumped once the primary finishes) and the claim is ``pending``. If
+        the primary fails, its waiters claim again and one of them becomes the new primary.
+        """
+        fingerprint = incident_fingerprint(incident)
+        now = monotonic()
+        waiter: asyncio.Future[None] | None = None
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+            # An entry whose primary is still running never expires, so ``complete`` finds it.
+            expired = entry is not None and entry.settled and now - entry.first_seen > self.settings.dedup_window_seconds
+            if entry is None or expired:
+                self._entries[fingerprint] = _Entry(first_seen=now)
+                self._entries.move_to_end(fingerprint)
+                self._evict_settled()
+                self._primaries += 1
+                return DedupClaim(fingerprint, duplicate=False)
+            entry.occurrences += 1
+            occurrences = entry.occurrences
+            if not entry.settled:
+                waiter = asyncio.get_running_loop().create_future()
+                entry.waiters.append(waiter)
+            elif entry.result is not None:
+                # The primary already finished, so this occurrence can be bumped right away.
+                self._duplicates += 1
+                return self._duplicate_claim(fingerprint, entry, occurrences, self._queue_bump(entry, 1))
+
+        if waiter is not None:
+            try:
+                await asyncio.wait_for(waiter, self.settings.request_timeout_seconds)
+            except asyncio.TimeoutError:
+                with self._lock:
+                    self._duplicates += 1
+                    self._timed_out += 1
+                return DedupClaim(fingerprint, duplicate=True, occurrences=occurrences, occurrence_update="pending")
+
+        if entry.result is None:
+            # The primary was abandoned.
+            return await self.claim(incident)
+        with self._lock:
+            self._duplicates += 1
+        return self._duplicate_claim(fingerprint, entry, occurrences, entry.occurrence_update)
+
+    @staticmethod
+    def _duplicate_claim(fingerprint: str, entry: _Entry, occurrences: int, occurrence_update: str) -> DedupClaim:
+        return DedupClaim(
+            fingerprint,
+            duplicate=True,
+            result=entry.result,
+            occurrences=occurrences,
+            occurrence_update=occurrence_update,
+        )
+
+    def _queue_bump(self, entry: _Entry, count: int) -> str:
+        """Queue ``count`` occurrences for the stored document; called with ``_lock`` held."""
+        assert entry.result is not None
+        # Only a primary whose document was written (or queued) has anything to bump.
+        if count <= 0 or self.elastic_service.client is None:
+            return "skipped"
+        if (entry.result.elastic or {}).get("status") not in STORED_STATUSES:
+            return "skipped"
+        return "queued" if self._bumps.submit((entry.result.incident_id, count, 1)) else "dropped"
+
+    def _release(self, entry: _Entry) -> None:
+        waiters, entry.waiters = entry.waiters, []
+        for waiter in waiters:
+            try:
+                waiter.get_loop().call_soon_threadsafe(_wake, waiter)
+            except RuntimeError:  # the waiter's event loop has already closed
+                pass
+
+    def complete(self, claim: DedupClaim, result: IncidentRunResult) -> None:
+        with self._lock:
+            entry = self._entries.get(claim.fingerprint)
+            if entry is None or entry.settled:
+                return
+            entry.result = result
+            # Duplicates that arrived during the run, including any that stopped waiting.
+            entry.occurrence_update = self._queue_bump(entry, entry.occurrences - 1)
+            self._release(entry)
+
+    def abandon(self, claim: DedupClaim) -> None:
+        """Release waiting duplicates when the primary run failed; the next alert starts fresh."""
+        with self._lock:
+            entry = self._entries.get(claim.fingerprint)
+            if entry is None or entry.settled:
+                return
+            entry.abandoned = True
+            del self._entries[claim.fingerprint]
+            self._release(entry)
+
+    def duplicate_result(self, claim: DedupClaim) -> IncidentRunResult:
+        assert claim.result is not None
+        skipped = {"status": "skipped", "reason": "duplicate_incident"}
+        return claim.result.model_copy(
+            update={
+                "elastic": {
+                    "enabled": self.elastic_service.client is not None,
+                    **skipped,
+                    "occurrence_update": claim.occurrence_update,
+                },
+                "agent_builder": {"enabled": self.settings.agent_builder_enabled, **skipped},
+                "dedup": self._dedup_block(claim),
+                "profile": None,
+            }
+        )
+
+    def pending_response(self, claim: DedupClaim) -> dict[str, Any]:
+        """Body for a duplicate whose primary has not finished yet; its occurrence is still counted."""
+        return {
+            "status": "pending",
+            "reason": "duplicate_primary_pending",
+            "dedup": self._dedup_block(claim),
+        }
+
+    @staticmethod
+    def _dedup_block(claim: DedupClaim) -> dict[str, Any]:
+        return {
+            "fingerprint": claim.fingerprint,
+            "duplicate_of": claim.result.incident_id if claim.result is not None else None,
+            "occurrences": claim.occurrences,
+        }
+
+    def _flush_bumps(self, batch: list[tuple[str, int, int]]) -> None:
+        counts: Counter[str] = Counter()
+        attempts: dict[str, int] = {}
+        for incident_id, count, attempt in batch:
+            counts[incident_id] += count
+            attempts[incident_id] = max(attempts.get(incident_id, 1), attempt)
+
+        report = self.elastic_service.bump_occurrences(dict(counts))
+        failed = report.get("failed", len(counts) if report.get("status") == "error" else 0)
+        retried = 0
+        for error in report.get("errors", []):
+            incident_id = error.get("incident_id")
+            attempt = attempts.get(incident_id, BUMP_MAX_ATTEMPTS)
+            # In write-behind mode the document may still be queued; try again on a later flush.
+            if error.get("response_status") == DOCUMENT_MISSING_STATUS and attempt < BUMP_MAX_ATTEMPTS:
+                if self._bumps.submit((incident_id, counts[incident_id], attempt + 1)):
+                    retried += 1
+        with self._lock:
+            self._bump_failures += failed - retried
+            self._bump_retries += retried
+
+    def start(self) -> None:
+        """Accept occurrence bumps again after ``stop``."""
+        self._bumps.reopen()
+
+    def stop(self, timeout: float | None = None) -> None:
+        self._bumps.stop(timeout)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "window_seconds": self.settings.dedup_window_seconds,
+                "tracked": len(self._entries),
+                "primaries": self._primaries,
+                "duplicates": self._duplicates,
+                "timed_out": self._timed_out,
+                "bump_failures": self._bump_failures,
+                "bump_retries": self._bump_retries,
+                "bumps": self._bumps.stats(),
+            }
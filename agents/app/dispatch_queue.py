@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import threading
+import uuid
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime
+from typing import Any
+
+from .agent_builder_client import AgentBuilderService
+from .batching import MicroBatcher
+from .config import Settings
+from .models import IncidentInput, IncidentRunResult
+
+
+class DispatchTracker:
+    """Runs Agent Builder dispatches on background workers and remembers each delivery outcome.
+
+    In ``async`` mode every incident is delivered on its own by a worker pool; in ``batch``
+    mode incidents are coalesced by size/time window into one gzip-compressed request.
+    The most recent ``agent_builder_dispatch_history`` records are kept so callers can poll
+    ``GET /dispatches/{id}`` after the API has already answered with ``status: queued``.
+    """
+
+    def __init__(self, settings: Settings, agent_builder_service: AgentBuilderService) -> None:
+        self.settings = settings
+        self.agent_builder_service = agent_builder_service
+        self._executor: ThreadPoolExecutor | None = None
+        self._closed = False
+        self._records: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._rejected = 0
+        self._batcher: MicroBatcher[tuple[str, IncidentInput, IncidentRunResult]] = MicroBatcher(
+            self._deliver_batch,
+            name="agent-builder-batch",
+            max_queue=settings.agent_builder_dispatch_max_pending,
+            batch_size=settings.agent_builder_batch_size,
+            flush_interval_ms=settings.agent_builder_batch_window_ms,
+            enqueue_timeout_ms=0,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return (
+            self.settings.agent_builder_dispatch_mode in {"async", "batch"}
+            and self.settings.agent_builder_enabled
+        )
+
+    def _pool(self) -> ThreadPoolExecutor | None:
+        """The delivery pool, created on first use; ``None`` once the tracker is stopped."""
+        with self._lock:
+            if self._executor is None and not self._closed:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.settings.agent_builder_dispatch_workers,
+                    thread_name_prefix="agent-builder-dispatch",
+                )
+            return self._executor
+
+    @property
+    def _integration_path(self) -> str:
+        if self.settings.agent_builder_dispatch_mode == "batch":
+            return self.settings.agent_builder_batch_route
+        return self.settings.agent_builder_route
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now(UTC).isoformat()
+
+    def _remember(self, record: dict[str, Any]) -> None:
+        self._records[record["dispatch_id"]] = record
+        while len(self._records) > self.settings.agent_builder_dispatch_history:
+            self._records.popitem(last=False)
+
+    def _update(self, dispatch_id: str, **changes: Any) -> None:
+        with self._lock:
+            record = self._records.get(dispatch_id)
+            if record is not None:
+                record.update(changes)
+
+    def submit(self, incident: IncidentInput, result: IncidentRunResult) -> dict[str, Any]:
+        with self._lock:
+            if self._pending >= self.settings.agent_builder_dispatch_max_pending:
+                self._rejected += 1
+                return {
+                    "enabled": True,
+                    "status": "error",
+                    "reason": "dispatch_queue_full",
+                    "integration_path": self._integration_path,
+                }
+            dispatch_id = str(uuid.uuid4())
+            self._remember(
+                {
+                    "dispatch_id": dispatch_id,
+                    "incident_id": result.incident_id,
+                    "status": "queued",
+                    "queued_at": self._now(),
+                    "completed_at": None,
+                    "result": None,
+                }
+            )
+            self._pending += 1
+
+        if self.settings.agent_builder_dispatch_mode == "batch":
+            accepted = self._batcher.submit((dispatch_id, incident, result))
+        else:
+            pool = self._pool()
+            accepted = pool is not None
+            if pool is not None:
+                try:
+                    pool.submit(self._deliver, dispatch_id, incident, result)
+                except RuntimeError:  # ``stop`` shut the pool down meanwhile
+                    accepted = False
+        if not accepted:
+            with self._lock:
+                self._pending -= 1
+            self._update(dispatch_id, status="dropped", completed_at=self._now())
+            return {
+                "enabled": True,
+                "status": "error",
+                "reason": "dispatch_dropped",
+                "dispatch_id": dispatch_id,
+                "integration_path": self._integration_path,
+            }
+        return {
+            "enabled": True,
+            "status": "queued",
+            "dispatch_id": dispatch_id,
+            "integration_path": self._integration_path,
+        }
+
+    def _deliver(self, dispatch_id: str, incident: IncidentInput, result: IncidentRunResult) -> None:
+        self._update(dispatch_id, status="running")
+        try:
+            report = self.agent_builder_service.dispatch_incident(incident, result)
+        except Exception as exc:  # pragma: no cover - dispatch_incident reports its own errors
+            report = {"enabled": True, "status": "error", "error": str(exc)}
+        finally:
+            with self._lock:
+                self._pending -= 1
+        self._update(dispatch_id, status=report.get("status", "error"), completed_at=self._now(), result=report)
+
+    def _deliver_batch(self, batch: list[tuple[str, IncidentInput, IncidentRunResult]]) -> None:
+        for dispatch_id, _, _ in batch:
+            self._update(dispatch_id, status="running")
+        try:
+            reports = self.agent_builder_service.dispatch_batch([(incident, result) for _, incident, result in batch])
+        except Exception as exc:  # pragma: no cover - dispatch_batch reports its own errors
+            reports = [{"enabled": True, "status": "error", "error": str(exc)} for _ in batch]
+        finally:
+            with self._lock:
+                self._pending -= len(batch)
+        completed_at = self._now()
+        for (dispatch_id, _, _), report in zip(batch, reports):
+            self._update(dispatch_id, status=report.get("status", "error"), completed_at=completed_at, result=report)
+
+    def get(self, dispatch_id: str) -> dict[str, Any] | None:
+        with self._lock:
+            record = self._records.get(dispatch_id)
+            return dict(record) if record is not None else None
+
+    def start(self) -> None:
+        """Accept dispatches again after ``stop``; the pool is rebuilt on the next submit."""
+        with self._lock:
+            self._closed = False
+        self._batcher.reopen()
+
+    def stop(self) -> None:
+        """Wait for queued deliveries to finish; used on shutdown."""
+        with self._lock:
+            self._closed = True
+            executor, self._executor = self._executor, None
+        self._batcher.stop()
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            by_status = Counter(record["status"] for record in self._records.values())
+            return {
+                "mode": self.settings.agent_builder_dispatch_mode,
+                "workers": self.settings.agent_builder_dispatch_workers,
+                "pending": self._pending,
+                "batch": self._batcher.stats() if self.settings.agent_builder_dispatch_mode == "batch" else None,
+                "rejected": self._rejected,
+                "tracked": len(self._records),
+                "by_status": dict(by_status),
+            }
@@ -1,35 +1,163 @@
 from __future__ import annotations
 
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import UTC, datetime
-from time import perf_counter
-from typing import Any
-
-from elasticsearch import Elasticsearch
+from time import monotonic, perf_counter
+from typing import TYPE_CHECKING, Any
 
+from .cache import TTLCache
 from .config import Settings
+from .esql_frame import EsqlFrame
 from .models import IncidentInput, IncidentRunResult
+from .profiling import in_current_context, span
+from .resilience import CircuitBreaker, RetryPolicy, call_with_retry, is_retryable_status
 
+if TYPE_CHECKING:
+    from elasticsearch import Elasticsearch
 
-class ElasticsearchService:
-    """Handles Elastic Cloud indexing, search, and ES|QL execution for incidents."""
+RECENT_INCIDENTS_SIZE = 5
+
+INCIDENT_MAPPINGS: dict[str, Any] = {
+    "properties": {
+        "incident_id": {"type": "keyword"},
+        "service": {"type": "keyword"},
+        "severity": {"type": "keyword"},
+        "summary": {"type": "text"},
+        "status": {"type": "keyword"},
+        "signals": {"type": "keyword"},
+        "recommendation": {"type": "text"},
+        "stakeholder_update": {"type": "text"},
+        "created_at": {"type": "date"},
+        "occurrence_count": {"type": "integer"},
+        "last_seen_at": {"type": "date"},
+    }
+}
+
+# Folds coalesced duplicate alerts into the stored incident without re-indexing it.
+OCCURRENCE_BUMP_SCRIPT = (
+    "ctx._source.occurrence_count = (ctx._source.occurrence_count == null ? 1 : ctx._source.occurrence_count)"
+    " + params.count; ctx._source.last_seen_at = params.seen_at"
+)
+
+
+def __getattr__(name: str) -> Any:
+    # ``elasticsearch.helpers`` stays importable as ``app.elasticsearch_client.helpers``
+    # without importing the client library when this module is loaded.
+    if name == "helpers":
+        from elasticsearch import helpers
+
+        return helpers
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class BaseElasticsearchService(ABC):
+    """Client-agnostic state and report shaping shared by the sync and async services.
+
+    The client is built on first use (or by ``warm_up`` during startup) rather than in
+    the constructor, so importing the app stays cheap. Tests can assign ``client``
+    directly.
+    """
 
     def __init__(self, settings: Settings) -> None:
         self.settings = settings
-        self.client = self._build_client() if settings.elastic_enabled else None
+        self._client: Any = None
+        self._client_resolved = False
+        self._client_lock = threading.Lock()
+        self.client_error: str | None = None
+        self._index_ready = False
+        self._health: tuple[bool, float] | None = None
+        self.analytics_cache = TTLCache(
+            settings.analytics_cache_ttl_seconds,
+            settings.analytics_cache_max_entries,
+        )
+        # Failed diagnoses are remembered briefly so a degraded cluster is not re-queried per incident.
+        self.diagnosis_failure_cache = TTLCache(
+            settings.diagnosis_failure_ttl_seconds,
+            settings.analytics_cache_max_entries,
+        )
+        self.retry_policy = RetryPolicy.from_settings(settings)
+        self.breaker = CircuitBreaker.from_settings("elasticsearch", settings)
+
+    @abstractmethod
+    def _build_client(self) -> Any: ...
+
+    @property
+    def client(self) -> Any:
+        if self._client_resolved:
+            return self._client
+        with self._client_lock:
+            if not self._client_resolved:
+                self.client_error = None
+                if self.settings.elastic_enabled:
+                    try:
+                        self._client = self._build_client()
+                    except ValueError as exc:
+                        # A malformed cloud id or URL: reported on every call instead of failing startup.
+                        self.client_error = str(exc)
+                self._client_resolved = True
+        return self._client
+
+    @client.setter
+    def client(self, value: Any) -> None:
+        with self._client_lock:
+            self._client = value
+            self._client_resolved = True
+            self.client_error = None
+
+    @property
+    def client_built(self) -> bool:
+        return self._client_resolved and self._client is not None
+
+    @property
+    def index_ready(self) -> bool:
+        return self._index_ready
 
-    def _build_client(self) -> Elasticsearch:
+    def mark_index_ready(self) -> None:
+        """Adopt a bootstrap done by another service for the same cluster and index."""
+        self._index_ready = True
+
+    def _warm_up_unavailable(self) -> dict[str, Any]:
+        if self.client_error is not None:
+            return {"status": "error", "error": self.client_error}
+        return {"status": "skipped"}
+
+    def _warm_up_report(self, started: float, connected: int) -> dict[str, Any]:
+        return {
+            "status": "ok" if connected else "error",
+            "connections": connected,
+            "index_ready": self._index_ready,
+            "duration_ms": round((perf_counter() - started) * 1000, 2),
+        }
+
+    def _client_options(self) -> dict[str, Any]:
+        options: dict[str, Any] = {
+            "api_key": self.settings.elastic_api_key,
+            "request_timeout": self.settings.request_timeout_seconds,
+            "connections_per_node": self.settings.elastic_connections_per_node,
+            # Retries are owned by the resilience layer so backoff and the breaker see every attempt.
+            "max_retries": 0,
+        }
         if self.settings.elastic_cloud_id:
-            return Elasticsearch(
-                cloud_id=self.settings.elastic_cloud_id,
-                api_key=self.settings.elastic_api_key,
-                request_timeout=self.settings.request_timeout_seconds,
-            )
+            options["cloud_id"] = self.settings.elastic_cloud_id
+        else:
+            options["hosts"] = [self.settings.elastic_url]
+        return options
 
-        return Elasticsearch(
-            hosts=[self.settings.elastic_url],
-            api_key=self.settings.elastic_api_key,
-            request_timeout=self.settings.request_timeout_seconds,
-        )
+    def _skipped_response(self) -> dict[str, Any]:
+        if self.client_error is not None:
+            return {
+                "enabled": True,
+                "status": "error",
+                "reason": "elastic_client_error",
+                "error": self.client_error,
+            }
+        return {
+            "enabled": False,
+            "status": "skipped",
+            "reason": "elastic_not_configured",
+        }
 
     @staticmethod
     def _body(response: Any) -> dict[str, Any]:
@@ -50,34 +178,119 @@ class ElasticsearchService:
             payload["error"] = str(exc)
         return payload
 
-    def _ensure_index(self) -> dict[str, Any]:
-        assert self.client is not None
-        response = self.client.options(ignore_status=400).indices.create(
-            index=self.settings.incidents_index,
-            mappings={
-                "properties": {
-                    "incident_id": {"type": "keyword"},
-                    "service": {"type": "keyword"},
-                    "severity": {"type": "keyword"},
-                    "summary": {"type": "text"},
-                    "status": {"type": "keyword"},
-                    "signals": {"type": "keyword"},
-                    "recommendation": {"type": "text"},
-                    "stakeholder_update": {"type": "text"},
-                    "created_at": {"type": "date"},
-                }
-            },
-        )
-        return self._body(response)
+    def _circuit_open_response(self) -> dict[str, Any]:
+        return {
+            "enabled": True,
+            "status": "error",
+            "reason": "circuit_open",
+            "breaker": self.breaker.name,
+        }
 
-    def _index_incident(
+    @staticmethod
+    def _is_index_not_found(exc: Exception) -> bool:
+        return "index_not_found" in f"{getattr(exc, 'error', '')} {exc}"
+
+    @staticmethod
+    def _is_retryable(exc: Exception) -> bool:
+        """429, 5xx and connection errors are retried; timeouts are not, so an outage costs one timeout."""
+        status = getattr(exc, "status_code", None)
+        if isinstance(status, int):
+            return is_retryable_status(status)
+        from elastic_transport import ConnectionError as TransportConnectionError
+
+        return isinstance(exc, TransportConnectionError)
+
+    @staticmethod
+    def _is_dependency_failure(exc: Exception) -> bool:
+        """Connection errors, timeouts, 429 and 5xx mean Elastic is degraded; other errors are ours."""
+        status = getattr(exc, "status_code", None)
+        if isinstance(status, int):
+            return is_retryable_status(status)
+        from elastic_transport import TransportError
+
+        return isinstance(exc, TransportError)
+
+    @staticmethod
+    def _bulk_item_is_dependency_failure(item: dict[str, Any]) -> bool:
+        """A failed ``_bulk`` item is Elastic's fault on 429/5xx or when no status came back at all."""
+        status = item.get("response_status")
+        return not isinstance(status, int) or is_retryable_status(status)
+
+    def _note_bulk_outcome(self, failed_items: list[dict[str, Any]]) -> None:
+        if any(self._bulk_item_is_dependency_failure(item) for item in failed_items):
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def _note_failure(self, exc: Exception, dependency_failure: bool | None = None) -> None:
+        if self._is_index_not_found(exc):
+            self._index_ready = False
+            self.analytics_cache.clear()
+
+        if dependency_failure is None:
+            dependency_failure = self._is_dependency_failure(exc)
+        if dependency_failure:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def _phase_error(
         self,
-        incident: IncidentInput,
-        result: IncidentRunResult,
+        started: float,
+        phase: str,
+        exc: Exception,
+        dependency_failure: bool | None = None,
     ) -> dict[str, Any]:
-        assert self.client is not None
+        self._note_failure(exc, dependency_failure)
+        return self._error_response(started, phase, exc)
+
+    def _search_cache_key(self, service: str) -> tuple[str, ...]:
+        return ("search_recent", self.settings.incidents_index, service)
 
-        document = {
+    def _esql_cache_key(self, service: str, severity: str) -> tuple[str, ...]:
+        return ("esql_query", self.settings.incidents_index, service, severity)
+
+    @staticmethod
+    def _prepend_hit(body: dict[str, Any], incident_id: str) -> dict[str, Any]:
+        hits = body.get("hits", {}).get("hits", [])
+        if any(hit.get("_source", {}).get("incident_id") == incident_id for hit in hits):
+            return body
+        new_hits = [{"_source": {"incident_id": incident_id}}, *hits][:RECENT_INCIDENTS_SIZE]
+        return {**body, "hits": {**body.get("hits", {}), "hits": new_hits}}
+
+    @staticmethod
+    def _bump_incident_count(body: dict[str, Any]) -> dict[str, Any]:
+        names = [column.get("name") for column in body.get("columns", [])]
+        values = body.get("values", [])
+        if "incident_count" not in names or not values:
+            return body
+        position = names.index("incident_count")
+        first = list(values[0])
+        first[position] = (first[position] or 0) + 1
+        return {**body, "values": [first, *values[1:]]}
+
+    def _with_local_write(self, esql_body: dict[str, Any]) -> dict[str, Any]:
+        """Count the just-indexed incident in a freshly queried ES|QL body when it is not searchable yet.
+
+        Cached bodies get the same +1 from ``_apply_local_write``, so a hit and a miss agree.
+        """
+        return esql_body if self._write_is_visible else self._bump_incident_count(esql_body)
+
+    def _apply_local_write(self, incident: IncidentInput, incident_id: str) -> None:
+        """Fold our own write into cached analytics instead of re-querying them."""
+        self.analytics_cache.update(
+            self._search_cache_key(incident.service),
+            lambda body: self._prepend_hit(body, incident_id),
+        )
+        self.analytics_cache.update(
+            self._esql_cache_key(incident.service, incident.severity),
+            self._bump_incident_count,
+        )
+
+    @staticmethod
+    def _build_document(incident: IncidentInput, result: IncidentRunResult) -> dict[str, Any]:
+        now = datetime.now(UTC).isoformat()
+        return {
             "incident_id": result.incident_id,
             "service": incident.service,
             "severity": incident.severity,
@@ -86,22 +299,427 @@ class ElasticsearchService:
             "signals": incident.signals,
             "recommendation": result.recommendation,
             "stakeholder_update": result.stakeholder_update,
-            "created_at": datetime.now(UTC).isoformat(),
+            "created_at": now,
+            "occurrence_count": 1,
+            "last_seen_at": now,
+        }
+
+    def _cached_create_result(self) -> dict[str, Any]:
+        return {"acknowledged": None, "index": self.settings.incidents_index, "cached": True}
+
+    def _health_is_fresh(self) -> bool:
+        cached = self._health
+        max_age = self.settings.elastic_health_interval_seconds * 2
+        return cached is not None and monotonic() - cached[1] < max_age
+
+    @property
+    def _incident_count_query(self) -> str:
+        return (
+            f"FROM {self.settings.incidents_index} "
+            "| WHERE service == ? AND severity == ? "
+            "| STATS incident_count = COUNT(*)"
+        )
+
+    @property
+    def _log_correlation_query(self) -> str:
+        # Mirrors elastic/esql_queries/log_correlation.esql with a positional service param.
+        return (
+            f"FROM {self.settings.logs_index_pattern} "
+            "| WHERE service == ? AND @timestamp > NOW() - 15 minutes "
+            '| STATS errors = COUNT(*) WHERE level == "error", warnings = COUNT(*) WHERE level == "warn" BY host '
+            "| SORT errors DESC "
+            "| LIMIT 20"
+        )
+
+    @property
+    def _latency_p95_query(self) -> str:
+        return (
+            f"FROM {self.settings.metrics_index_pattern} "
+            "| WHERE service == ? AND @timestamp > NOW() - 15 minutes "
+            "| STATS p95 = PERCENTILE(latency_ms, 95)"
+        )
+
+    @property
+    def _diagnosis_queries(self) -> dict[str, str]:
+        return {"log_correlation": self._log_correlation_query, "latency_p95": self._latency_p95_query}
+
+    def _diagnosis_report(
+        self,
+        started: float,
+        bodies: dict[str, dict[str, Any]],
+        errors: dict[str, str],
+    ) -> dict[str, Any]:
+        correlation = EsqlFrame.from_response(bodies.get("log_correlation", {}))
+        latency = EsqlFrame.from_response(bodies.get("latency_p95", {}))
+        top = correlation.top_k("errors", self.settings.diagnosis_top_hosts) if len(correlation) else correlation
+        hosts = [
+            {"host": row["host"], "errors": int(row["errors"]), "warnings": int(row["warnings"])}
+            for row in top.rows()
+            if (row["errors"] or 0) > 0
+        ]
+        total_errors = correlation.sum("errors")
+        p95_values = latency.column("p95")
+
+        if not errors:
+            status = "ok"
+        elif bodies:
+            status = "partial"
+        elif all(error == "timeout" for error in errors.values()):
+            status = "timeout"
+        else:
+            status = "error"
+
+        return {
+            "status": status,
+            "budget_ms": self.settings.diagnosis_esql_budget_ms,
+            "duration_ms": round((perf_counter() - started) * 1000, 2),
+            "top_hosts": hosts,
+            "error_concentration": (
+                round(sum(host["errors"] for host in hosts) / total_errors, 4) if total_errors else None
+            ),
+            "error_to_warning_ratio": correlation.ratio("errors", "warnings"),
+            "p95_latency_ms": p95_values[0] if len(p95_values) else None,
+            "log_correlation": correlation.to_json(),
+            "errors": errors,
+        }
+
+    @staticmethod
+    def _is_timeout(exc: BaseException) -> bool:
+        if isinstance(exc, TimeoutError):
+            return True
+        from elastic_transport import ConnectionTimeout
+
+        return isinstance(exc, ConnectionTimeout)
+
+    def _diagnosis_precheck(self, service: str) -> dict[str, Any] | None:
+        """Report to return instead of querying, or ``None`` when the queries should run.
+
+        A cached report (ok, or a recent failure) is returned before the breaker is
+        consulted, so a cache hit never uses up the half-open trial call.
+        """
+        if not self.client:
+            return {"status": "skipped", "reason": "elastic_not_configured"}
+        cached = self.analytics_cache.get(("diagnosis", service))
+        if cached is None:
+            cached = self.diagnosis_failure_cache.get(service)
+        if cached is not None:
+            return {**cached, "cached": True}
+        if not self.breaker.allow():
+            return {"status": "skipped", "reason": "circuit_open", "breaker": self.breaker.name}
+        return None
+
+    def _finish_diagnosis(
+        self,
+        service: str,
+        started: float,
+        bodies: dict[str, dict[str, Any]],
+        failures: dict[str, BaseException],
+    ) -> dict[str, Any]:
+        """Build the report and feed the outcome to the breaker that gated the queries.
+
+        Timeouts, connection errors, 429 and 5xx count as one breaker failure per
+        diagnosis. Other errors (e.g. a missing logs index) mean Elastic answered.
+        """
+        errors = {phase: "timeout" if self._is_timeout(exc) else str(exc) for phase, exc in failures.items()}
+        degraded = [
+            exc
+            for exc in failures.values()
+            if self._is_timeout(exc) or (isinstance(exc, Exception) and self._is_dependency_failure(exc))
+        ]
+        if degraded:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+        report = self._diagnosis_report(started, bodies, errors)
+        if report["status"] == "ok":
+            self.analytics_cache.set(("diagnosis", service), report)
+        else:
+            self.diagnosis_failure_cache.set(service, report)
+        return {**report, "cached": False}
+
+    @property
+    def _write_is_visible(self) -> bool:
+        """Whether the configured refresh policy makes our own write searchable before we read."""
+        return self.settings.elastic_refresh in {"wait_for", "true"}
+
+    def _analysis_report(
+        self,
+        started: float,
+        incident_id: str,
+        create_result: dict[str, Any],
+        index_result: dict[str, Any],
+        search_result: dict[str, Any],
+        esql_result: dict[str, Any],
+    ) -> dict[str, Any]:
+        hits = search_result.get("hits", {}).get("hits", [])
+        latest_incident_ids = [
+            hit.get("_source", {}).get("incident_id")
+            for hit in hits
+            if hit.get("_source", {}).get("incident_id")
+        ]
+
+        # Without a refresh the just-indexed doc is not searchable yet; merge it client-side.
+        merged_local_write = not self._write_is_visible and incident_id not in latest_incident_ids
+        if merged_local_write:
+            latest_incident_ids = [incident_id, *latest_incident_ids][:RECENT_INCIDENTS_SIZE]
+
+        return {
+            "enabled": True,
+            "status": "ok",
+            "index": self.settings.incidents_index,
+            "refresh": self.settings.elastic_refresh,
+            "duration_ms": round((perf_counter() - started) * 1000, 2),
+            "create_result": {
+                "acknowledged": create_result.get("acknowledged"),
+                "index": create_result.get("index", self.settings.incidents_index),
+                "cached": create_result.get("cached", False),
+            },
+            "index_result": {
+                "result": index_result.get("result"),
+                "_id": index_result.get("_id"),
+            },
+            "search": {
+                "hit_count": min(len(hits) + int(merged_local_write), RECENT_INCIDENTS_SIZE),
+                "latest_incident_ids": latest_incident_ids,
+                "merged_local_write": merged_local_write,
+            },
+            "esql": {
+                "query": self._incident_count_query,
+                "columns": esql_result.get("columns", []),
+                "values": esql_result.get("values", []),
+            },
         }
 
+
+class ElasticsearchService(BaseElasticsearchService):
+    """Handles Elastic Cloud indexing, search, and ES|QL execution for incidents."""
+
+    def __init__(self, settings: Settings) -> None:
+        super().__init__(settings)
+        self._bootstrap_lock = threading.Lock()
+        self._probe_stop = threading.Event()
+        self._probe_thread: threading.Thread | None = None
+        self._read_executor: ThreadPoolExecutor | None = None
+        self._stuck_lock = threading.Lock()
+        self._stuck_reads = 0
+
+    def _build_client(self) -> "Elasticsearch":
+        from elasticsearch import Elasticsearch
+
+        return Elasticsearch(**self._client_options())
+
+    def _read_pool(self) -> ThreadPoolExecutor:
+        if self._read_executor is None:
+            with self._client_lock:
+                if self._read_executor is None:
+                    self._read_executor = ThreadPoolExecutor(
+                        max_workers=self.settings.elastic_connections_per_node,
+                        thread_name_prefix="elastic-read",
+                    )
+        return self._read_executor
+
+    def warm_up(self, connections: int, create_index: bool = True) -> dict[str, Any]:
+        """Build the client, bootstrap the index and open up to ``connections`` pooled connections.
+
+        The extra connections come from concurrent pings, each of which checks out its own
+        keep-alive connection, so the first requests skip TCP/TLS setup. With
+        ``create_index=False`` only the health cache is warmed, for when another service
+        bootstraps the same index.
+        """
+        started = perf_counter()
+        client = self.client
+        if client is None:
+            return self._warm_up_unavailable()
+        self.bootstrap(create_index)
+        extra = max(0, min(connections, self.settings.elastic_connections_per_node) - 1)
+        futures = [self._read_pool().submit(client.ping) for _ in range(extra)]
+        connected = int(bool(self._health and self._health[0]))
+        connected += sum(1 for future in futures if future.exception() is None and future.result())
+        return self._warm_up_report(started, connected)
+
+    def close(self) -> None:
+        """Stop the probe and release threads and sockets; the next use rebuilds them lazily."""
+        self.stop_health_probe()
+        executor, self._read_executor = self._read_executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        with self._client_lock:
+            client, self._client = self._client, None
+            self._client_resolved = False
+        if client is not None:
+            client.close()
+        self._index_ready = False
+        self._health = None
+
+    def _ensure_index_ready(self) -> dict[str, Any]:
+        """Create the incidents index once per process; later calls reuse the cached state."""
+        if self._index_ready:
+            return self._cached_create_result()
+
+        with self._bootstrap_lock:
+            if self._index_ready:
+                return self._cached_create_result()
+            with span("elastic", "create_index"):
+                body = call_with_retry(self._ensure_index, self.retry_policy, self._is_retryable)
+            self._index_ready = True
+            return {**body, "cached": False}
+
+    def _probe_health(self) -> bool:
+        assert self.client is not None
+        try:
+            with span("elastic", "ping"):
+                ok = bool(self.client.ping())
+        except Exception:
+            self._health = (False, monotonic())
+            raise
+        self._health = (ok, monotonic())
+        return ok
+
+    def _health_ok(self) -> bool:
+        """Return the probe's cached ping result, pinging inline only when it is missing or stale."""
+        if self._health_is_fresh():
+            assert self._health is not None
+            return self._health[0]
+        return self._probe_health()
+
+    def _probe_loop(self) -> None:
+        while not self._probe_stop.wait(self.settings.elastic_health_interval_seconds):
+            try:
+                self._probe_health()
+            except Exception:
+                pass
+
+    def start_health_probe(self) -> None:
+        if not self.client or (self._probe_thread and self._probe_thread.is_alive()):
+            return
+        self._probe_stop.clear()
+        self._probe_thread = threading.Thread(target=self._probe_loop, name="elastic-health-probe", daemon=True)
+        self._probe_thread.start()
+
+    def stop_health_probe(self) -> None:
+        self._probe_stop.set()
+        if self._probe_thread is not None:
+            self._probe_thread.join(timeout=1)
+            self._probe_thread = None
+
+    def bootstrap(self, create_index: bool = True) -> None:
+        """Warm the health cache and create the index ahead of the first request."""
+        if not self.client:
+            return
+        try:
+            if self._probe_health() and create_index:
+                self._ensure_index_ready()
+        except Exception:
+            # The request path retries lazily and reports the failing phase.
+            pass
+
+    def _preflight(self, started: float) -> tuple[dict[str, Any] | None, dict[str, Any]]:
+        """Check cached cluster health and index bootstrap; returns ``(error_response, create_result)``."""
+        try:
+            ping_ok = self._health_ok()
+        except Exception as exc:  # pragma: no cover - defensive path
+            return self._phase_error(started, "ping", exc, dependency_failure=True), {}
+
+        if not ping_ok:
+            return self._phase_error(started, "ping", Exception("elastic_ping_failed"), dependency_failure=True), {}
+
+        try:
+            return None, self._ensure_index_ready()
+        except Exception as exc:
+            return self._phase_error(started, "create_index", exc), {}
+
+    def _ensure_index(self) -> dict[str, Any]:
+        assert self.client is not None
+        response = self.client.options(ignore_status=400).indices.create(
+            index=self.settings.incidents_index,
+            mappings=INCIDENT_MAPPINGS,
+        )
+        return self._body(response)
+
+    @staticmethod
+    def _bulk_error_text(error_info: Any) -> str:
+        if isinstance(error_info, dict):
+            reason = error_info.get("reason")
+            error_type = error_info.get("type")
+            if error_type and reason:
+                return f"{error_type}: {reason}"
+            return str(reason or error_type or error_info)
+        return str(error_info)
+
+    def _index_incident(
+        self,
+        incident: IncidentInput,
+        result: IncidentRunResult,
+    ) -> dict[str, Any]:
+        assert self.client is not None
+
         response = self.client.index(
             index=self.settings.incidents_index,
             id=result.incident_id,
-            document=document,
-            refresh="wait_for",
+            document=self._build_document(incident, result),
+            refresh=self.settings.elastic_refresh,
         )
         return self._body(response)
 
+    def _bulk_index_incidents(
+        self,
+        pairs: list[tuple[IncidentInput, IncidentRunResult]],
+    ) -> dict[str, dict[str, Any]]:
+        """Write all incident documents through ``_bulk`` and return per-id outcomes."""
+        assert self.client is not None
+
+        actions = (
+            {
+                "_op_type": "index",
+                "_index": self.settings.incidents_index,
+                "_id": result.incident_id,
+                "_source": self._build_document(incident, result),
+            }
+            for incident, result in pairs
+        )
+
+        from elasticsearch import helpers
+
+        outcomes: dict[str, dict[str, Any]] = {}
+        for ok, info in helpers.streaming_bulk(
+            self.client,
+            actions,
+            chunk_size=self.settings.elastic_bulk_chunk_size,
+            raise_on_error=False,
+            raise_on_exception=False,
+            max_retries=self.retry_policy.max_attempts - 1,
+            initial_backoff=self.retry_policy.base_delay_seconds,
+            max_backoff=self.retry_policy.max_delay_seconds,
+            refresh=self.settings.elastic_refresh,
+        ):
+            item = info.get("index", {})
+            incident_id = str(item.get("_id"))
+            if ok:
+                outcomes[incident_id] = {
+                    "status": "ok",
+                    "result": item.get("result"),
+                    "response_status": item.get("status"),
+                }
+            else:
+                outcomes[incident_id] = {
+                    "status": "error",
+                    "response_status": item.get("status"),
+                    "error": self._bulk_error_text(item.get("error")),
+                }
+        return outcomes
+
+    def _fetch_and_cache(self, phase: str, key: tuple[str, ...], fetch: Any, *args: Any) -> dict[str, Any]:
+        with span("elastic", phase):
+            body = call_with_retry(lambda: fetch(*args), self.retry_policy, self._is_retryable)
+        self.analytics_cache.set(key, body)
+        return body
+
     def _search_recent(self, service: str) -> dict[str, Any]:
         assert self.client is not None
         response = self.client.search(
             index=self.settings.incidents_index,
-            size=5,
+            size=RECENT_INCIDENTS_SIZE,
             query={"term": {"service": {"value": service}}},
             sort=[{"created_at": {"order": "desc"}}],
         )
@@ -110,88 +728,247 @@ class ElasticsearchService:
     def _run_esql(self, service: str, severity: str) -> dict[str, Any]:
         assert self.client is not None
         response = self.client.esql.query(
-            query=(
-                f"FROM {self.settings.incidents_index} "
-                "| WHERE service == ? AND severity == ? "
-                "| STATS incident_count = COUNT(*)"
-            ),
+            query=self._incident_count_query,
             params=[service, severity],
         )
+        return self._with_local_write(self._body(response))
+
+    def _run_diagnosis_query(self, phase: str, query: str, service: str, timeout: float) -> dict[str, Any]:
+        assert self.client is not None
+        with span("elastic", phase):
+            response = self.client.options(request_timeout=timeout).esql.query(
+                query=query,
+                params=[service],
+                columnar=True,
+            )
         return self._body(response)
 
+    def _release_stuck_read(self, _: Any) -> None:
+        with self._stuck_lock:
+            self._stuck_reads -= 1
+
+    def run_diagnosis_queries(self, service: str) -> dict[str, Any]:
+        """Run log correlation and p95 latency concurrently, giving up after the diagnosis budget.
+
+        Used by the batch endpoint; the request path uses the async service. A query that
+        misses the budget cannot be cancelled, so its read-pool thread stays busy until the
+        per-request ``request_timeout`` (the same budget) fires. Those threads are counted
+        in ``read_pool_stats`` and diagnosis is skipped while all of them are stuck.
+        """
+        skipped = self._diagnosis_precheck(service)
+        if skipped is not None:
+            return skipped
+        if self._stuck_reads >= self.settings.elastic_connections_per_node:
+            self.breaker.record_failure()
+            return {"status": "skipped", "reason": "read_pool_saturated"}
+
+        started = perf_counter()
+        budget = self.settings.diagnosis_esql_budget_ms / 1000
+        futures = {
+            phase: self._read_pool().submit(
+                in_current_context(self._run_diagnosis_query), phase, query, service, budget
+            )
+            for phase, query in self._diagnosis_queries.items()
+        }
+        wait(futures.values(), timeout=budget)
+
+        bodies: dict[str, dict[str, Any]] = {}
+        failures: dict[str, BaseException] = {}
+        for phase, future in futures.items():
+            if not future.done():
+                failures[phase] = TimeoutError(phase)
+                with self._stuck_lock:
+                    self._stuck_reads += 1
+                future.add_done_callback(self._release_stuck_read)
+            elif future.exception() is not None:
+                failures[phase] = future.exception()
+            else:
+                bodies[phase] = future.result()
+
+        return self._finish_diagnosis(service, started, bodies, failures)
+
+    def read_pool_stats(self) -> dict[str, Any]:
+        return {
+            "workers": self.settings.elastic_connections_per_node,
+            "started": self._read_executor is not None,
+            "stuck_diagnosis_queries": self._stuck_reads,
+        }
+
     def record_incident_and_analyze(
         self,
         incident: IncidentInput,
         result: IncidentRunResult,
     ) -> dict[str, Any]:
         if not self.client:
-            return {
-                "enabled": False,
-                "status": "skipped",
-                "reason": "elastic_not_configured",
-            }
+            return self._skipped_response()
+
+        if not self.breaker.allow():
+            return self._circuit_open_response()
 
         started = perf_counter()
 
+        preflight_error, create_result = self._preflight(started)
+        if preflight_error:
+            return preflight_error
+
         try:
-            ping_ok = self.client.ping()
-        except Exception as exc:  # pragma: no cover - defensive path
-            return self._error_response(started, "ping", exc)
+            with span("elastic", "index_document"):
+                index_result = call_with_retry(
+                    lambda: self._index_incident(incident, result),
+                    self.retry_policy,
+                    self._is_retryable,
+                )
+        except Exception as exc:
+            return self._phase_error(started, "index_document", exc)
 
-        if not ping_ok:
-            return self._error_response(started, "ping", Exception("elastic_ping_failed"))
+        self._apply_local_write(incident, result.incident_id)
+        search_key = self._search_cache_key(incident.service)
+        esql_key = self._esql_cache_key(incident.service, incident.severity)
+
+        # The read phases are independent: ES|QL runs on the pool while search runs here.
+        esql_result = self.analytics_cache.get(esql_key)
+        esql_future = None
+        if esql_result is None:
+            esql_future = self._read_pool().submit(
+                in_current_context(self._fetch_and_cache),
+                "esql_query",
+                esql_key,
+                self._run_esql,
+                incident.service,
+                incident.severity,
+            )
 
         try:
-            create_result = self._ensure_index()
+            search_result = self.analytics_cache.get(search_key)
+            if search_result is None:
+                search_result = self._fetch_and_cache("search_recent", search_key, self._search_recent, incident.service)
         except Exception as exc:
-            return self._error_response(started, "create_index", exc)
+            return self._phase_error(started, "search_recent", exc)
 
         try:
-            index_result = self._index_incident(incident, result)
+            if esql_future is not None:
+                esql_result = esql_future.result()
         except Exception as exc:
-            return self._error_response(started, "index_document", exc)
+            return self._phase_error(started, "esql_query", exc)
+
+        self.breaker.record_success()
+        return self._analysis_report(
+            started, result.incident_id, create_result, index_result, search_result, esql_result
+        )
+
+    def record_incidents_bulk(
+        self,
+        pairs: list[tuple[IncidentInput, IncidentRunResult]],
+    ) -> dict[str, Any]:
+        """Index a batch of incidents in as few ``_bulk`` round-trips as the chunk size allows."""
+        if not self.client:
+            return self._skipped_response()
+
+        if not self.breaker.allow():
+            return self._circuit_open_response()
+
+        started = perf_counter()
+
+        preflight_error, _ = self._preflight(started)
+        if preflight_error:
+            return preflight_error
 
         try:
-            search_result = self._search_recent(incident.service)
+            with span("elastic", "bulk_index"):
+                outcomes = self._bulk_index_incidents(pairs)
         except Exception as exc:
-            return self._error_response(started, "search_recent", exc)
+            return self._phase_error(started, "bulk_index", exc)
+
+        items: list[dict[str, Any]] = []
+        for _, result in pairs:
+            outcome = outcomes.get(
+                result.incident_id,
+                {"status": "error", "error": "missing_bulk_item_response"},
+            )
+            items.append({"incident_id": result.incident_id, **outcome})
+
+        self._note_bulk_outcome([item for item in items if item["status"] != "ok"])
+        failed = sum(1 for item in items if item["status"] != "ok")
+        if failed == 0:
+            status = "ok"
+        elif failed == len(items):
+            status = "error"
+        else:
+            status = "partial"
 
+        return {
+            "enabled": True,
+            "status": status,
+            "index": self.settings.incidents_index,
+            "duration_ms": round((perf_counter() - started) * 1000, 2),
+            "chunk_size": self.settings.elastic_bulk_chunk_size,
+            "indexed": len(items) - failed,
+            "failed": failed,
+            "items": items,
+        }
+
+    def bump_occurrences(self, counts: dict[str, int]) -> dict[str, Any]:
+        """Add ``counts[incident_id]`` to each stored incident's ``occurrence_count`` via scripted ``_bulk`` updates."""
+        if not self.client:
+            return self._skipped_response()
+
+        if not self.breaker.allow():
+            return self._circuit_open_response()
+
+        started = perf_counter()
+        seen_at = datetime.now(UTC).isoformat()
+        actions = (
+            {
+                "_op_type": "update",
+                "_index": self.settings.incidents_index,
+                "_id": incident_id,
+                "retry_on_conflict": 3,
+                "script": {
+                    "source": OCCURRENCE_BUMP_SCRIPT,
+                    "lang": "painless",
+                    "params": {"count": count, "seen_at": seen_at},
+                },
+            }
+            for incident_id, count in counts.items()
+        )
+
+        from elasticsearch import helpers
+
+        updated = 0
+        errors: list[dict[str, Any]] = []
         try:
-            esql_result = self._run_esql(incident.service, incident.severity)
+            with span("elastic", "bump_occurrences"):
+                for ok, info in helpers.streaming_bulk(
+                    self.client,
+                    actions,
+                    chunk_size=self.settings.elastic_bulk_chunk_size,
+                    raise_on_error=False,
+                    raise_on_exception=False,
+                    max_retries=self.retry_policy.max_attempts - 1,
+                    initial_backoff=self.retry_policy.base_delay_seconds,
+                    max_backoff=self.retry_policy.max_delay_seconds,
+                ):
+                    item = info.get("update", {})
+                    if ok:
+                        updated += 1
+                    else:
+                        errors.append(
+                            {
+                                "incident_id": str(item.get("_id")),
+                                "response_status": item.get("status"),
+                                "error": self._bulk_error_text(item.get("error")),
+                            }
+                        )
         except Exception as exc:
-            return self._error_response(started, "esql_query", exc)
-
-        hits = search_result.get("hits", {}).get("hits", [])
-        latest_incident_ids = [
-            hit.get("_source", {}).get("incident_id")
-            for hit in hits
-            if hit.get("_source", {}).get("incident_id")
-        ]
+            return self._phase_error(started, "bump_occurrences", exc)
 
+        self._note_bulk_outcome(errors)
         return {
             "enabled": True,
-            "status": "ok",
+            "status": "ok" if not errors else ("error" if not updated else "partial"),
             "index": self.settings.incidents_index,
             "duration_ms": round((perf_counter() - started) * 1000, 2),
-            "create_result": {
-                "acknowledged": create_result.get("acknowledged"),
-                "index": create_result.get("index", self.settings.incidents_index),
-            },
-            "index_result": {
-                "result": index_result.get("result"),
-                "_id": index_result.get("_id"),
-            },
-            "search": {
-                "hit_count": len(hits),
-                "latest_incident_ids": latest_incident_ids,
-            },
-            "esql": {
-                "query": (
-                    f"FROM {self.settings.incidents_index} "
-                    "| WHERE service == ? AND severity == ? "
-                    "| STATS incident_count = COUNT(*)"
-                ),
-                "columns": esql_result.get("columns", []),
-                "values": esql_result.get("values", []),
-            },
+            "updated": updated,
+            "failed": len(errors),
+            "errors": errors,
         }
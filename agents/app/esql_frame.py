@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import heapq
+import math
+from array import array
+from typing import Any, Iterator, Sequence
+
+INTEGER_TYPES = {"long", "integer", "short", "byte", "counter_long", "counter_integer"}
+# unsigned_long can exceed int64, so it is kept as a double.
+FLOAT_TYPES = {"double", "float", "half_float", "scaled_float", "counter_double", "unsigned_long"}
+
+
+def _typed_column(values: Sequence[Any], es_type: str) -> Sequence[Any]:
+    """Pack numeric columns into contiguous ``array`` buffers; nulls become NaN."""
+    if es_type in INTEGER_TYPES and None not in values:
+        return array("q", values)
+    if es_type in INTEGER_TYPES or es_type in FLOAT_TYPES:
+        return array("d", (math.nan if value is None else float(value) for value in values))
+    return list(values)
+
+
+class EsqlFrame:
+    """Column-oriented view of an ES|QL result with typed numeric columns.
+
+    Numeric columns are stored as ``array('q')``/``array('d')`` rather than per-row Python
+    lists, so aggregations walk one flat buffer per column and the row-oriented
+    ``values`` list of lists is never materialized.
+    """
+
+    def __init__(self, columns: dict[str, Sequence[Any]], types: dict[str, str]) -> None:
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("ES|QL columns must all have the same length")
+        self.columns = columns
+        self.types = types
+        self._length = lengths.pop() if lengths else 0
+
+    @classmethod
+    def from_response(cls, body: dict[str, Any], columnar: bool = True) -> "EsqlFrame":
+        """Decode an ES|QL response requested with ``columnar=true`` (or the default row layout)."""
+        specs = body.get("columns", [])
+        values = body.get("values", [])
+        names = [spec.get("name") for spec in specs]
+        types = {spec.get("name"): spec.get("type", "keyword") for spec in specs}
+        if columnar:
+            raw = dict(zip(names, values))
+        else:
+            raw = {name: [row[index] for row in values] for index, name in enumerate(names)}
+        return cls({name: _typed_column(raw.get(name, []), types[name]) for name in names}, types)
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def names(self) -> list[str]:
+        return list(self.columns)
+
+    def column(self, name: str) -> Sequence[Any]:
+        return self.columns.get(name, [])
+
+    def rows(self) -> Iterator[dict[str, Any]]:
+        for index in range(self._length):
+            yield {name: values[index] for name, values in self.columns.items()}
+
+    def take(self, indices: Sequence[int]) -> "EsqlFrame":
+        return EsqlFrame(
+            {
+                name: _typed_column([values[index] for index in indices], self.types[name])
+                for name, values in self.columns.items()
+            },
+            self.types,
+        )
+
+    def top_k(self, name: str, k: int) -> "EsqlFrame":
+        """The ``k`` rows with the largest values in column ``name`` (nulls sort last)."""
+        values = self.column(name)
+
+        def sort_key(index: int) -> float:
+            value = values[index]
+            return -math.inf if value is None or value != value else value
+
+        return self.take(heapq.nlargest(k, range(self._length), key=sort_key))
+
+    def _numbers(self, name: str) -> list[float]:
+        return [value for value in self.column(name) if value is not None and not math.isnan(value)]
+
+    def sum(self, name: str) -> float:
+        return math.fsum(self._numbers(name))
+
+    def percentile(self, name: str, q: float) -> float | None:
+        """Linearly interpolated ``q``-th percentile (0-100) of a numeric column."""
+        values = sorted(self._numbers(name))
+        if not values:
+            return None
+        rank = (len(values) - 1) * q / 100
+        lower = math.floor(rank)
+        upper = min(lower + 1, len(values) - 1)
+        return values[lower] + (values[upper] - values[lower]) * (rank - lower)
+
+    def ratio(self, numerator: str, denominator: str) -> float | None:
+        """``sum(numerator) / sum(denominator)`` across all rows."""
+        total = self.sum(denominator)
+        return self.sum(numerator) / total if total else None
+
+    def to_json(self) -> dict[str, Any]:
+        """Compact columnar form: one list per column, NaN written as ``null``."""
+        return {
+            "columns": [{"name": name, "type": self.types[name]} for name in self.columns],
+            "values": [
+                [None if isinstance(value, float) and math.isnan(value) else value for value in values]
+                for values in self.columns.values()
+            ],
+        }
@@ -1,19 +1,116 @@
 from __future__ import annotations
 
-from fastapi import FastAPI
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from time import perf_counter
+from typing import Any, AsyncIterator
+
+from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 
 from .agent_builder_client import AgentBuilderService
 from .agents import IncidentWorkflow
+from .async_elasticsearch_client import AsyncElasticsearchService
 from .config import Settings
+from .dedup import DedupClaim, IncidentDeduplicator
+from .dispatch_queue import DispatchTracker
 from .elasticsearch_client import ElasticsearchService
-from .models import IncidentInput, IncidentRunResult
+from .metrics import ELASTIC_OUTCOMES, SPAN_DURATION_MS, PrometheusMiddleware, record_outcome, render_prometheus
+from .models import AgentStep, IncidentBatchInput, IncidentBatchResult, IncidentInput, IncidentRunResult
+from .profiling import profiled
+from .runbooks import RunbookCatalog
+from .serialization import FastJSONResponse, PreSerializedResponse, batch_result_json, dumps, result_json
+from .write_behind import IncidentWriteBehind
 
 settings = Settings.from_env()
-app = FastAPI(title="Incident Commander Agents", version="0.2.0")
-workflow = IncidentWorkflow()
 elastic_service = ElasticsearchService(settings)
+async_elastic_service = AsyncElasticsearchService(settings)
+runbook_catalog = RunbookCatalog.from_settings(settings)
+# The batch endpoint runs the workflow synchronously; the request path awaits the async service.
+workflow = IncidentWorkflow(
+    log_analytics=elastic_service,
+    runbooks=runbook_catalog,
+    async_log_analytics=async_elastic_service,
+)
 agent_builder_service = AgentBuilderService(settings)
+dispatch_tracker = DispatchTracker(settings, agent_builder_service)
+write_behind = IncidentWriteBehind(settings, elastic_service)
+deduplicator = IncidentDeduplicator(settings, elastic_service)
+
+
+# Clients are built lazily; startup builds them early and pre-connects their pools.
+warmup_report: dict[str, Any] = {"status": "not_started"}
+
+
+def _share_index_bootstrap(_: asyncio.Future) -> None:
+    if async_elastic_service.index_ready:
+        elastic_service.mark_index_ready()
+
+
+async def warm_up_clients() -> dict[str, Any]:
+    """Build every client and open ``WARMUP_CONNECTIONS`` connections per pool, all in parallel.
+
+    Startup waits at most ``WARMUP_TIMEOUT_SECONDS``; a slow dependency finishes warming
+    in the background instead of delaying readiness.
+    """
+    connections = settings.warmup_connections
+    started = perf_counter()
+    # Both Elastic services target the same index: the async one bootstraps it, the write path only pings.
+    tasks = {
+        "elasticsearch": asyncio.ensure_future(async_elastic_service.warm_up(connections)),
+        "elasticsearch_write_path": asyncio.ensure_future(
+            asyncio.to_thread(elastic_service.warm_up, connections, create_index=False)
+        ),
+        "agent_builder": asyncio.ensure_future(asyncio.to_thread(agent_builder_service.warm_up, connections)),
+    }
+    tasks["elasticsearch"].add_done_callback(_share_index_bootstrap)
+    await asyncio.wait(tasks.values(), timeout=settings.warmup_timeout_seconds)
+
+    report: dict[str, Any] = {}
+    for name, task in tasks.items():
+        if not task.done():
+            report[name] = {"status": "pending"}
+        elif task.exception() is not None:
+            report[name] = {"status": "error", "error": str(task.exception())}
+        else:
+            report[name] = task.result()
+    report["duration_ms"] = round((perf_counter() - started) * 1000, 2)
+    return report
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    global warmup_report
+    # Re-open the background queues a previous lifespan stopped (tests, embedded servers).
+    write_behind.start()
+    deduplicator.start()
+    dispatch_tracker.start()
+    warmup_report = await warm_up_clients()
+    runbook_catalog.start_watcher()
+    async_elastic_service.start_health_probe()
+    if write_behind.enabled:
+        elastic_service.start_health_probe()
+    yield
+    # Documents are flushed before the occurrence bumps that update them.
+    await asyncio.to_thread(write_behind.stop)
+    await asyncio.to_thread(deduplicator.stop)
+    await asyncio.to_thread(dispatch_tracker.stop)
+    await asyncio.to_thread(runbook_catalog.stop_watcher)
+    await asyncio.to_thread(elastic_service.close)
+    await async_elastic_service.close()
+    agent_builder_service.close()
+    workflow.close()
+
+
+app = FastAPI(
+    title="Incident Commander Agents",
+    version="0.2.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,6 +119,13 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(PrometheusMiddleware)
+
+
+def dispatch_to_agent_builder(incident: IncidentInput, result: IncidentRunResult) -> dict:
+    if dispatch_tracker.enabled:
+        return dispatch_tracker.submit(incident, result)
+    return agent_builder_service.dispatch_incident(incident, result)
 
 
 @app.get("/health")
@@ -29,9 +133,206 @@ def health() -> dict:
     return {"status": "ok"}
 
 
-@app.post("/incidents/run", response_model=IncidentRunResult)
-def run_incident(incident: IncidentInput) -> IncidentRunResult:
-    result = workflow.run(incident)
-    result.elastic = elastic_service.record_incident_and_analyze(incident, result)
-    result.agent_builder = agent_builder_service.dispatch_incident(incident, result)
-    return result
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> PlainTextResponse:
+    # Under ``app.server`` each scrape reaches one of several workers; the pid keeps their series apart.
+    return PlainTextResponse(
+        render_prometheus(const_labels={"worker": os.getpid()}),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+@app.get("/stats")
+def stats() -> dict:
+    return {
+        "worker": {"pid": os.getpid()},
+        "write_behind": write_behind.stats(),
+        "analytics_cache": async_elastic_service.analytics_cache.stats(),
+        "dispatch": dispatch_tracker.stats(),
+        "runbooks": runbook_catalog.stats(),
+        "dedup": deduplicator.stats(),
+        "warmup": warmup_report,
+        "circuit_breakers": {
+            "elasticsearch": async_elastic_service.breaker.stats(),
+            "elasticsearch_write_path": elastic_service.breaker.stats(),
+            "agent_builder": agent_builder_service.breaker_stats(),
+        },
+        "elastic_read_pool": elastic_service.read_pool_stats(),
+        "latency_ms": SPAN_DURATION_MS.snapshot(),
+    }
+
+
+@app.get("/dispatches/{dispatch_id}")
+def get_dispatch(dispatch_id: str) -> dict:
+    record = dispatch_tracker.get(dispatch_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="dispatch_not_found")
+    return record
+
+
+async def record_to_elastic(incident: IncidentInput, result: IncidentRunResult) -> dict:
+    if write_behind.enabled:
+        report = await run_in_threadpool(write_behind.submit, incident, result)
+    else:
+        report = await async_elastic_service.record_incident_and_analyze(incident, result)
+    record_outcome(ELASTIC_OUTCOMES, report)
+    return report
+
+
+async def dispatch_to_agent_builder_async(incident: IncidentInput, result: IncidentRunResult) -> dict:
+    if dispatch_tracker.enabled:
+        return dispatch_tracker.submit(incident, result)
+    return await run_in_threadpool(agent_builder_service.dispatch_incident, incident, result)
+
+
+async def claim_incident(incident: IncidentInput) -> DedupClaim | None:
+    if not deduplicator.enabled:
+        return None
+    # Duplicates wait for their primary on the event loop, not on a threadpool worker.
+    return await deduplicator.claim(incident)
+
+
+@app.post(
+    "/incidents/run",
+    response_model=IncidentRunResult,
+    responses={202: {"description": "Duplicate of an incident whose run has not finished yet"}},
+)
+async def run_incident(incident: IncidentInput, profile: bool = False) -> Response:
+    claim = await claim_incident(incident)
+    if claim is not None and claim.pending:
+        return FastJSONResponse(deduplicator.pending_response(claim), status_code=202)
+    if claim is not None and claim.duplicate:
+        return PreSerializedResponse(result_json(deduplicator.duplicate_result(claim)))
+
+    try:
+        with profiled(profile) as run_profile:
+            # Diagnosis awaits its ES|QL queries; the other agents are CPU-only and run inline.
+            result = await workflow.arun(incident)
+            result.elastic = await record_to_elastic(incident, result)
+            result.agent_builder = await dispatch_to_agent_builder_async(incident, result)
+    except BaseException:
+        if claim is not None:
+            deduplicator.abandon(claim)
+        raise
+    if claim is not None:
+        deduplicator.complete(claim, result)
+    if run_profile is not None:
+        result.profile = run_profile.to_dict()
+    # The workflow JSON was already produced for the Agent Builder body; only the
+    # integration blocks are encoded here.
+    return PreSerializedResponse(result_json(result))
+
+
+def _sse(event: str, data: Any) -> bytes:
+    payload = data if isinstance(data, bytes) else dumps(data)
+    return b"event: %s\ndata: %s\n\n" % (event.encode("ascii"), payload)
+
+
+async def _stream_duplicate(claim: DedupClaim) -> AsyncIterator[bytes]:
+    if claim.pending:
+        yield _sse("error", {"error": "duplicate_primary_pending", **deduplicator.pending_response(claim)})
+        return
+    result = deduplicator.duplicate_result(claim)
+    for step in result.timeline:
+        yield _sse("step", step.model_dump_json().encode("utf-8"))
+    yield _sse("elastic", result.elastic)
+    yield _sse("agent_builder", result.agent_builder)
+    yield _sse("result", result_json(result))
+    yield _sse("done", {"incident_id": result.incident_id})
+
+
+async def _stream_incident(incident: IncidentInput) -> AsyncIterator[bytes]:
+    claim = await claim_incident(incident)
+    if claim is not None and claim.duplicate:
+        async for event in _stream_duplicate(claim):
+            yield event
+        return
+
+    try:
+        async for event in _stream_primary(incident, claim):
+            yield event
+    except Exception as exc:
+        # The 200 and earlier events are already sent, so the failure is reported in-band.
+        if claim is not None:
+            deduplicator.abandon(claim)
+        yield _sse("error", {"error": str(exc) or type(exc).__name__})
+    except BaseException:
+        if claim is not None:
+            deduplicator.abandon(claim)
+        raise
+
+
+async def _stream_primary(incident: IncidentInput, claim: DedupClaim | None) -> AsyncIterator[bytes]:
+    steps: asyncio.Queue[AgentStep | None] = asyncio.Queue()
+
+    async def run_workflow() -> IncidentRunResult:
+        try:
+            return await workflow.arun(incident, steps.put_nowait)
+        finally:
+            steps.put_nowait(None)
+
+    workflow_task = asyncio.ensure_future(run_workflow())
+    while (step := await steps.get()) is not None:
+        yield _sse("step", step.model_dump_json().encode("utf-8"))
+    result = await workflow_task
+
+    # The Agent Builder payload does not include the Elastic block, so both integrations
+    # run concurrently and each result is sent as soon as it is available.
+    pending = {
+        asyncio.ensure_future(record_to_elastic(incident, result)): "elastic",
+        asyncio.ensure_future(dispatch_to_agent_builder_async(incident, result)): "agent_builder",
+    }
+    while pending:
+        done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            name = pending.pop(task)
+            report = task.result()
+            setattr(result, name, report)
+            yield _sse(name, report)
+
+    if claim is not None:
+        deduplicator.complete(claim, result)
+    yield _sse("result", result_json(result))
+    yield _sse("done", {"incident_id": result.incident_id})
+
+
+@app.post("/incidents/run/stream")
+async def run_incident_stream(incident: IncidentInput) -> StreamingResponse:
+    """Server-Sent Events: ``step`` per agent, then ``elastic``/``agent_builder``, ``result`` and ``done``.
+
+    A failure after the stream has started ends it with a single ``error`` event instead.
+    """
+    return StreamingResponse(
+        _stream_incident(incident),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/incidents/run:batch", response_model=IncidentBatchResult)
+def run_incident_batch(batch: IncidentBatchInput) -> PreSerializedResponse:
+    pairs = list(zip(batch.incidents, workflow.run_many(batch.incidents)))
+    bulk_report = elastic_service.record_incidents_bulk(pairs)
+
+    items = {item["incident_id"]: item for item in bulk_report.get("items", [])}
+    summary = {key: value for key, value in bulk_report.items() if key != "items"}
+
+    for incident, result in pairs:
+        item = items.get(result.incident_id)
+        if item is None:
+            result.elastic = summary
+        else:
+            result.elastic = {
+                "enabled": True,
+                "status": item["status"],
+                "index": bulk_report["index"],
+                "bulk": True,
+                **{key: value for key, value in item.items() if key not in {"incident_id", "status"}},
+            }
+        record_outcome(ELASTIC_OUTCOMES, result.elastic)
+        result.agent_builder = dispatch_to_agent_builder(incident, result)
+
+    failed = sum(1 for _, result in pairs if (result.elastic or {}).get("status") == "error")
+    return PreSerializedResponse(
+        batch_result_json([result for _, result in pairs], len(pairs) - failed, failed, summary)
+    )
@@ -0,0 +1,335 @@
+from __future__ import annotations
+
+import threading
+import weakref
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from time import perf_counter
+from typing import Any, Mapping, Sequence
+
+LATENCY_BUCKETS_MS = (1.0, 2.5, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 500.0, 1000.0, 2500.0, 5000.0, 10000.0)
+LATENCY_BUCKETS_SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PAYLOAD_BUCKETS_BYTES = (256.0, 1024.0, 4096.0, 16384.0, 65536.0, 262144.0, 1048576.0)
+
+
+class _ShardOwner:
+    """Kept in one thread's ``threading.local``; it is collected when that thread exits."""
+
+    __slots__ = ("__weakref__",)
+
+
+class _Shards:
+    """Per-thread accumulators: a writer only touches its own shard, readers sum every shard.
+
+    Recording is a couple of list stores with no lock; the lock is taken once per thread
+    (to register its shard) and on every read. A read may miss an update that is in
+    flight on another thread, which is fine for monitoring. When a thread exits, its
+    shard is folded into a shared base (slots in ``max_slots`` keep the larger value),
+    so short-lived threads do not leave shards behind.
+    """
+
+    def __init__(self, size: int, max_slots: Sequence[int] = ()) -> None:
+        self.size = size
+        self.max_slots = frozenset(max_slots)
+        self._local = threading.local()
+        self._base = [0.0] * size
+        self._live: dict[int, list[float]] = {}
+        self._next_key = 0
+        self._lock = threading.Lock()
+
+    def local(self) -> list[float]:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = [0.0] * self.size
+            owner = _ShardOwner()
+            with self._lock:
+                key = self._next_key
+                self._next_key += 1
+                self._live[key] = shard
+            weakref.finalize(owner, self._retire, key, shard).atexit = False
+            self._local.owner = owner
+            self._local.shard = shard
+        return shard
+
+    def _retire(self, key: int, shard: list[float]) -> None:
+        with self._lock:
+            self._live.pop(key, None)
+            for index, value in enumerate(shard):
+                if index in self.max_slots:
+                    self._base[index] = max(self._base[index], value)
+                else:
+                    self._base[index] += value
+
+    def all(self) -> list[list[float]]:
+        with self._lock:
+            return [list(self._base), *(list(shard) for shard in self._live.values())]
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def _new_child(self) -> Any: ...
+
+    def _child(self, labels: Mapping[str, Any]) -> Any:
+        key = tuple(str(labels.get(label, "")) for label in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _series(self) -> list[tuple[tuple[str, ...], Any]]:
+        with self._lock:
+            return sorted(self._children.items())
+
+    def _labels(self, key: tuple[str, ...], *extra: str) -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)]
+        pairs.extend(label for label in extra if label)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self, const_labels: str = "") -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in self._series():
+            lines.extend(self._render_child(key, child, const_labels))
+        return lines
+
+    def _render_child(self, key: tuple[str, ...], child: Any, const_labels: str) -> list[str]:
+        return [f"{self.name}{self._labels(key, const_labels)} {_format(child.value())}"]
+
+
+class _ValueChild:
+    def __init__(self) -> None:
+        self._shards = _Shards(1)
+
+    def add(self, amount: float) -> None:
+        self._shards.local()[0] += amount
+
+    def value(self) -> float:
+        return sum(shard[0] for shard in self._shards.all())
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _ValueChild:
+        return _ValueChild()
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        self._child(labels).add(amount)
+
+    def value(self, **labels: Any) -> float:
+        return self._child(labels).value()
+
+
+class Gauge(_Metric):
+    """Up/down gauge; ``dec`` may run on a different thread than the matching ``inc``."""
+
+    kind = "gauge"
+
+    def _new_child(self) -> _ValueChild:
+        return _ValueChild()
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        self._child(labels).add(amount)
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self._child(labels).add(-amount)
+
+    def value(self, **labels: Any) -> float:
+        return self._child(labels).value()
+
+
+class _HistogramChild:
+    # Shard layout: one slot per bucket plus +Inf, then sum, count and max.
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = buckets
+        self._slots = len(buckets) + 1
+        self._shards = _Shards(self._slots + 3, max_slots=(self._slots + 2,))
+
+    def observe(self, value: float) -> None:
+        shard = self._shards.local()
+        shard[bisect_left(self.buckets, value)] += 1
+        shard[self._slots] += value
+        shard[self._slots + 1] += 1
+        if value > shard[self._slots + 2]:
+            shard[self._slots + 2] = value
+
+    def totals(self) -> tuple[list[float], float, int, float]:
+        shards = self._shards.all()
+        counts = [sum(shard[index] for shard in shards) for index in range(self._slots)]
+        total = sum(shard[self._slots] for shard in shards)
+        count = int(sum(shard[self._slots + 1] for shard in shards))
+        maximum = max(shard[self._slots + 2] for shard in shards)
+        return counts, total, count, maximum
+
+    def quantile(self, counts: list[float], count: int, maximum: float, q: float) -> float:
+        """Upper bound of the bucket holding the ``q`` quantile (``max`` for the overflow bucket)."""
+        if not count:
+            return 0.0
+        rank = q * count
+        seen = 0.0
+        for index, bucket_count in enumerate(counts):
+            seen += bucket_count
+            if seen >= rank:
+                return self.buckets[index] if index < len(self.buckets) else maximum
+        return maximum
+
+    def snapshot(self) -> dict[str, Any]:
+        counts, total, count, maximum = self.totals()
+        return {
+            "count": count,
+            "sum": round(total, 2),
+            "avg": round(total / count, 2) if count else 0.0,
+            "p50": self.quantile(counts, count, maximum, 0.5),
+            "p95": self.quantile(counts, count, maximum, 0.95),
+            "p99": self.quantile(counts, count, maximum, 0.99),
+            "max": round(maximum, 2),
+        }
+
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram with one child series per label combination."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS_MS,
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float, **labels: Any) -> None:
+        self._child(labels).observe(value)
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        """Summary per series keyed by ``label/label``, e.g. ``elastic/search_recent``."""
+        return {"/".join(key) or self.name: child.snapshot() for key, child in self._series()}
+
+    def _render_child(self, key: tuple[str, ...], child: _HistogramChild, const_labels: str) -> list[str]:
+        counts, total, count, _ = child.totals()
+        labels = self._labels(key, const_labels)
+        lines = []
+        cumulative = 0.0
+        for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+            cumulative += bucket_count
+            le = "+Inf" if bound == float("inf") else _format(bound)
+            le_label = f'le="{le}"'
+            lines.append(f"{self.name}_bucket{self._labels(key, const_labels, le_label)} {_format(cumulative)}")
+        lines.append(f"{self.name}_sum{labels} {_format(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+SPAN_DURATION_MS = Histogram(
+    "incident_span_duration_ms",
+    "Duration of agent steps, Elastic phases and Agent Builder dispatches.",
+    labelnames=("category", "name"),
+)
+HTTP_REQUEST_DURATION_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    labelnames=("method", "route", "status"),
+    buckets=LATENCY_BUCKETS_SECONDS,
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being served.")
+ELASTIC_OUTCOMES = Counter(
+    "incident_elastic_outcomes_total",
+    "Elastic integration outcomes per incident.",
+    labelnames=("status", "phase", "reason"),
+)
+AGENT_BUILDER_OUTCOMES = Counter(
+    "incident_agent_builder_outcomes_total",
+    "Agent Builder dispatch outcomes per incident.",
+    labelnames=("status", "phase", "reason"),
+)
+AGENT_BUILDER_PAYLOAD_BYTES = Histogram(
+    "incident_agent_builder_payload_bytes",
+    "Uncompressed Agent Builder request body size.",
+    labelnames=("route",),
+    buckets=PAYLOAD_BUCKETS_BYTES,
+)
+
+REGISTRY: tuple[_Metric, ...] = (
+    HTTP_REQUEST_DURATION_SECONDS,
+    HTTP_REQUESTS_IN_FLIGHT,
+    SPAN_DURATION_MS,
+    ELASTIC_OUTCOMES,
+    AGENT_BUILDER_OUTCOMES,
+    AGENT_BUILDER_PAYLOAD_BYTES,
+)
+
+
+def record_outcome(counter: Counter, report: Mapping[str, Any] | None, phase: str = "") -> None:
+    """Count an integration report by its ``status``/``phase``/``reason`` fields."""
+    if not report:
+        return
+    counter.inc(
+        status=report.get("status", "unknown"),
+        phase=report.get("phase", phase),
+        reason=report.get("reason", ""),
+    )
+
+
+def render_prometheus(metrics: Sequence[_Metric] = REGISTRY, const_labels: Mapping[str, Any] | None = None) -> str:
+    """Prometheus text exposition; ``const_labels`` (e.g. the worker pid) are added to every series."""
+    const = ",".join(f'{name}="{_escape(str(value))}"' for name, value in (const_labels or {}).items())
+    lines: list[str] = []
+    for metric in metrics:
+        lines.extend(metric.render(const))
+    return "\n".join(lines) + "\n"
+
+
+class PrometheusMiddleware:
+    """ASGI middleware timing every HTTP request by its route template (not the raw path)."""
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_with_status(message: dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        started = perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUEST_DURATION_SECONDS.observe(
+                perf_counter() - started,
+                method=scope["method"],
+                route=route,
+                status=str(status["code"]),
+            )
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from typing import Any, Literal
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 Severity = Literal["low", "medium", "high", "critical"]
 
@@ -19,6 +19,7 @@ class AgentStep(BaseModel):
     agent: str
     action: str
     output: dict[str, Any]
+    duration_ms: float | None = None
 
 
 class IncidentRunResult(BaseModel):
@@ -31,3 +32,18 @@ class IncidentRunResult(BaseModel):
     stakeholder_update: str
     elastic: dict[str, Any] | None = None
     agent_builder: dict[str, Any] | None = None
+    profile: dict[str, Any] | None = None
+    dedup: dict[str, Any] | None = None
+    # Workflow JSON shared by the HTTP response and the Agent Builder body (see serialization.py).
+    _workflow_json: bytes | None = PrivateAttr(default=None)
+
+
+class IncidentBatchInput(BaseModel):
+    incidents: list[IncidentInput] = Field(min_length=1, max_length=1000)
+
+
+class IncidentBatchResult(BaseModel):
+    results: list[IncidentRunResult]
+    succeeded: int
+    failed: int
+    elastic: dict[str, Any] | None = None
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from datetime import UTC, datetime
+from time import perf_counter
+from typing import Any, Callable, Iterator, TypeVar
+
+from .metrics import SPAN_DURATION_MS
+
+T = TypeVar("T")
+
+_active_profile: ContextVar["Profile | None"] = ContextVar("incident_profile", default=None)
+
+
+class Profile:
+    """Spans recorded while handling one incident, with offsets relative to the profile start."""
+
+    def __init__(self) -> None:
+        self.started_at = datetime.now(UTC).isoformat()
+        self._origin = perf_counter()
+        self._spans: list[dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def add(self, category: str, name: str, started: float, ended: float, status: str) -> None:
+        span = {
+            "category": category,
+            "name": name,
+            "status": status,
+            "start_ms": round((started - self._origin) * 1000, 3),
+            "end_ms": round((ended - self._origin) * 1000, 3),
+            "duration_ms": round((ended - started) * 1000, 3),
+        }
+        with self._lock:
+            self._spans.append(span)
+
+    def to_dict(self) -> dict[str, Any]:
+        with self._lock:
+            spans = sorted(self._spans, key=lambda span: span["start_ms"])
+        return {
+            "started_at": self.started_at,
+            "total_ms": round((perf_counter() - self._origin) * 1000, 3),
+            "spans": spans,
+        }
+
+
+class SpanTiming:
+    duration_ms: float | None = None
+
+
+@contextmanager
+def span(category: str, name: str) -> Iterator[SpanTiming]:
+    """Time the enclosed block into the span histogram and, if one is active, the current profile."""
+    timing = SpanTiming()
+    status = "ok"
+    started = perf_counter()
+    try:
+        yield timing
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        ended = perf_counter()
+        timing.duration_ms = round((ended - started) * 1000, 2)
+        SPAN_DURATION_MS.observe((ended - started) * 1000, category=category, name=name)
+        profile = _active_profile.get()
+        if profile is not None:
+            profile.add(category, name, started, ended, status)
+
+
+@contextmanager
+def profiled(enabled: bool = True) -> Iterator[Profile | None]:
+    """Collect spans for the enclosed block; yields ``None`` (histograms only) when disabled."""
+    if not enabled:
+        yield None
+        return
+    profile = Profile()
+    token = _active_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _active_profile.reset(token)
+
+
+def in_current_context(fn: Callable[..., T]) -> Callable[..., T]:
+    """Bind ``fn`` to a copy of the caller's context so spans from pool threads reach its profile."""
+    context = copy_context()
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+from dataclasses import dataclass
+from time import monotonic
+from typing import Any, Awaitable, Callable, TypeVar
+
+from .config import Settings
+
+T = TypeVar("T")
+
+
+def is_retryable_status(status: int | None) -> bool:
+    """429 and 5xx responses are worth retrying; other statuses are final."""
+    return status is not None and (status == 429 or status >= 500)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Bounded retries with full-jitter exponential backoff."""
+
+    max_attempts: int = 3
+    base_delay_seconds: float = 0.1
+    max_delay_seconds: float = 2.0
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "RetryPolicy":
+        return cls(
+            max_attempts=max(1, settings.retry_max_attempts),
+            base_delay_seconds=settings.retry_base_delay_ms / 1000,
+            max_delay_seconds=settings.retry_max_delay_ms / 1000,
+        )
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before retry number ``attempt`` (1-based)."""
+        ceiling = min(self.max_delay_seconds, self.base_delay_seconds * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+
+def call_with_retry(
+    fn: Callable[[], T],
+    policy: RetryPolicy,
+    should_retry: Callable[[Exception], bool],
+) -> T:
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except Exception as exc:
+            attempt += 1
+            if attempt >= policy.max_attempts or not should_retry(exc):
+                raise
+            time.sleep(policy.backoff(attempt))
+
+
+async def acall_with_retry(
+    fn: Callable[[], Awaitable[T]],
+    policy: RetryPolicy,
+    should_retry: Callable[[Exception], bool],
+) -> T:
+    attempt = 0
+    while True:
+        try:
+            return await fn()
+        except Exception as exc:
+            attempt += 1
+            if attempt >= policy.max_attempts or not should_retry(exc):
+                raise
+            await asyncio.sleep(policy.backoff(attempt))
+
+
+class CircuitBreaker:
+    """Per-dependency breaker: opens after consecutive failures and fails fast until a trial call succeeds.
+
+    ``closed`` lets every call through. After ``failure_threshold`` consecutive failures it
+    goes ``open`` and rejects calls for ``reset_timeout_seconds``; then a single trial call
+    is let through (``half_open``) whose outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout_seconds: float) -> None:
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout_seconds = reset_timeout_seconds
+        self._lock = threading.Lock()
+        self._state = "closed"
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._trips = 0
+        self._rejected = 0
+
+    @classmethod
+    def from_settings(cls, name: str, settings: Settings) -> "CircuitBreaker":
+        return cls(name, settings.breaker_failure_threshold, settings.breaker_reset_seconds)
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._state == "open":
+                if monotonic() - self._opened_at < self.reset_timeout_seconds:
+                    self._rejected += 1
+                    return False
+                self._state = "half_open"
+                self._trial_in_flight = False
+
+            if self._state == "half_open":
+                if self._trial_in_flight:
+                    self._rejected += 1
+                    return False
+                self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = "closed"
+            self._consecutive_failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._consecutive_failures += 1
+            self._trial_in_flight = False
+            if self._state == "half_open" or (
+                self._state == "closed" and self._consecutive_failures >= self.failure_threshold
+            ):
+                self._state = "open"
+                self._opened_at = monotonic()
+                self._trips += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "name": self.name,
+                "state": self._state,
+                "consecutive_failures": self._consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "reset_timeout_seconds": self.reset_timeout_seconds,
+                "trips": self._trips,
+                "rejected": self._rejected,
+            }
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from .config import Settings
+
+WILDCARD = "*"
+
+
+@dataclass(frozen=True)
+class Runbook:
+    id: str
+    service: str
+    trigger: str
+    action: str
+    risk: str
+
+
+class RunbookCatalog:
+    """In-memory runbook index keyed by ``(service, trigger)``, reloaded when the file changes.
+
+    Lookups are dict hits in order ``(service, trigger)``, ``(*, trigger)``,
+    ``(service, *)``, ``(*, *)``. A background watcher (``start_watcher``) checks the
+    file's mtime every ``reload_interval_seconds``, parses it off the request path and
+    swaps the new index in with one assignment; a file that fails to parse keeps the
+    previous index.
+    """
+
+    def __init__(self, path: str | Path | None, reload_interval_seconds: float = 2.0) -> None:
+        self.path = Path(path) if path else None
+        self.reload_interval_seconds = reload_interval_seconds
+        self._index: dict[tuple[str, str], Runbook] = {}
+        self._services: set[str] = set()
+        self._signature: tuple[int, int] | None = None
+        self._lock = threading.Lock()
+        self._watch_stop = threading.Event()
+        self._watch_thread: threading.Thread | None = None
+        self._loaded_at: str | None = None
+        self._reloads = 0
+        self._duplicates = 0
+        self._last_error: str | None = None
+        self.reload()
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "RunbookCatalog":
+        return cls(settings.runbooks_path, settings.runbooks_reload_interval_seconds)
+
+    def _file_signature(self) -> tuple[int, int] | None:
+        if self.path is None:
+            return None
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def _build_index(entries: list[dict[str, Any]]) -> tuple[dict[tuple[str, str], Runbook], int]:
+        index: dict[tuple[str, str], Runbook] = {}
+        duplicates = 0
+        for entry in entries:
+            runbook = Runbook(
+                id=str(entry["id"]),
+                service=str(entry.get("service") or WILDCARD),
+                trigger=str(entry.get("trigger") or WILDCARD),
+                action=str(entry["action"]),
+                risk=str(entry.get("risk", "medium")),
+            )
+            key = (runbook.service, runbook.trigger)
+            if key in index:
+                # The first runbook listed for a (service, trigger) pair wins.
+                duplicates += 1
+                continue
+            index[key] = runbook
+        return index, duplicates
+
+    def reload(self) -> bool:
+        """Re-read the file if its mtime/size changed; returns whether the index was replaced."""
+        with self._lock:
+            signature = self._file_signature()
+            if signature is None or signature == self._signature:
+                return False
+            try:
+                entries = json.loads(self.path.read_text(encoding="utf-8"))  # type: ignore[union-attr]
+                index, duplicates = self._build_index(entries)
+            except (OSError, ValueError, KeyError, TypeError) as exc:
+                self._last_error = str(exc)
+                self._signature = signature
+                return False
+
+            self._index = index
+            self._services = {service for service, _ in index}
+            self._signature = signature
+            self._duplicates = duplicates
+            self._last_error = None
+            self._loaded_at = datetime.now(UTC).isoformat()
+            self._reloads += 1
+            return True
+
+    def _watch_loop(self) -> None:
+        while not self._watch_stop.wait(self.reload_interval_seconds):
+            self.reload()
+
+    def start_watcher(self) -> None:
+        """Poll the file for changes on a daemon thread; a non-positive interval disables it."""
+        if self.path is None or self.reload_interval_seconds <= 0:
+            return
+        if self._watch_thread is not None and self._watch_thread.is_alive():
+            return
+        self._watch_stop.clear()
+        self._watch_thread = threading.Thread(target=self._watch_loop, name="runbook-watcher", daemon=True)
+        self._watch_thread.start()
+
+    def stop_watcher(self) -> None:
+        self._watch_stop.set()
+        if self._watch_thread is not None:
+            self._watch_thread.join(timeout=1)
+            self._watch_thread = None
+
+    def resolve(self, service: str, trigger: str) -> Runbook | None:
+        index = self._index
+        return (
+            index.get((service, trigger))
+            or index.get((WILDCARD, trigger))
+            or index.get((service, WILDCARD))
+            or index.get((WILDCARD, WILDCARD))
+        )
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "path": str(self.path) if self.path else None,
+            "runbooks": len(self._index),
+            "services": len(self._services - {WILDCARD}),
+            "duplicates": self._duplicates,
+            "loaded_at": self._loaded_at,
+            "reloads": self._reloads,
+            "last_error": self._last_error,
+        }
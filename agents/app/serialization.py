@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+from .models import IncidentInput, IncidentRunResult
+
+try:  # orjson is optional; pydantic-core's Rust encoder is the fallback.
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None  # type: ignore[assignment]
+
+# Fields filled in after the workflow runs. They are appended to the cached workflow JSON
+# rather than serialized with it, and they are never sent to Agent Builder.
+INTEGRATION_FIELDS = ("elastic", "agent_builder", "profile", "dedup")
+
+
+def dumps(value: Any) -> bytes:
+    """Compact JSON bytes; values JSON does not know (datetimes, UUIDs) fall back to ``str``."""
+    if orjson is not None:
+        return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return to_json(value, fallback=str)
+
+
+class FastJSONResponse(JSONResponse):
+    """Default response class: renders with orjson when installed, else pydantic-core."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class PreSerializedResponse(JSONResponse):
+    """Sends bytes that are already JSON, skipping response-model validation and re-encoding."""
+
+    def render(self, content: bytes) -> bytes:
+        return content
+
+
+def workflow_json(result: IncidentRunResult) -> bytes:
+    """The workflow part of ``result`` as JSON, serialized once per result and then reused."""
+    cached = result._workflow_json
+    if cached is None:
+        cached = result.model_dump_json(exclude=set(INTEGRATION_FIELDS)).encode("utf-8")
+        result._workflow_json = cached
+    return cached
+
+
+def result_json(result: IncidentRunResult) -> bytes:
+    """``result.model_dump_json()`` built by appending the integration blocks to the cached workflow JSON.
+
+    The integration fields are the model's last fields, so key order matches the model's.
+    """
+    parts = [workflow_json(result)[:-1]]
+    for name in INTEGRATION_FIELDS:
+        parts.append(b',"%s":%s' % (name.encode("ascii"), dumps(getattr(result, name))))
+    parts.append(b"}")
+    return b"".join(parts)
+
+
+def batch_result_json(
+    results: list[IncidentRunResult],
+    succeeded: int,
+    failed: int,
+    elastic: dict[str, Any] | None,
+) -> bytes:
+    """``IncidentBatchResult`` JSON assembled from each result's cached workflow JSON."""
+    return b'{"results":[%s],"succeeded":%d,"failed":%d,"elastic":%s}' % (
+        b",".join(result_json(result) for result in results),
+        succeeded,
+        failed,
+        dumps(elastic),
+    )
+
+
+def agent_builder_body(incident: IncidentInput, result: IncidentRunResult) -> bytes:
+    """``{"incident": ..., "workflow": ...}`` spliced from the incident's JSON and the cached workflow JSON."""
+    return b'{"incident":%s,"workflow":%s}' % (incident.model_dump_json().encode("utf-8"), workflow_json(result))
+
+
+def agent_builder_batch_body(items: list[tuple[IncidentInput, IncidentRunResult]]) -> bytes:
+    return b'{"incidents":[%s]}' % b",".join(agent_builder_body(incident, result) for incident, result in items)
@@ -0,0 +1,107 @@
+"""Production entry point: ``python -m app.server``.
+
+Runs one uvicorn worker process per available core under uvicorn's supervisor. Workers
+are started with the ``spawn`` method and receive the app as an import string, so each
+worker imports ``app.main`` itself and builds its own settings, connection pools and
+background threads. Nothing created in the supervisor is shared across processes.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import os
+from dataclasses import dataclass
+from typing import Any
+
+APP_IMPORT_PATH = "app.main:app"
+
+
+def available_cpus() -> int:
+    """Cores this process may run on (respects CPU affinity and container cpusets)."""
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return max(1, os.cpu_count() or 1)
+
+
+def _optional_int(name: str) -> int | None:
+    value = os.getenv(name, "").strip()
+    return int(value) if value else None
+
+
+@dataclass(frozen=True)
+class ServerConfig:
+    host: str = "0.0.0.0"
+    port: int = 8000
+    workers: int = 1
+    backlog: int = 2048
+    keepalive_seconds: int = 5
+    graceful_timeout_seconds: int = 30
+    limit_concurrency: int | None = None
+    max_requests: int | None = None
+    max_requests_jitter: int = 0
+    log_level: str = "info"
+    access_log: bool = False
+
+    @classmethod
+    def from_env(cls) -> "ServerConfig":
+        return cls(
+            host=os.getenv("SERVER_HOST", "0.0.0.0"),
+            port=int(os.getenv("PORT", "8000")),
+            workers=_optional_int("SERVER_WORKERS") or available_cpus(),
+            backlog=int(os.getenv("SERVER_BACKLOG", "2048")),
+            keepalive_seconds=int(os.getenv("SERVER_KEEPALIVE_SECONDS", "5")),
+            graceful_timeout_seconds=int(os.getenv("SERVER_GRACEFUL_TIMEOUT_SECONDS", "30")),
+            limit_concurrency=_optional_int("SERVER_LIMIT_CONCURRENCY"),
+            max_requests=_optional_int("SERVER_MAX_REQUESTS"),
+            max_requests_jitter=int(os.getenv("SERVER_MAX_REQUESTS_JITTER", "0")),
+            log_level=os.getenv("SERVER_LOG_LEVEL", "info").strip().lower(),
+            access_log=os.getenv("SERVER_ACCESS_LOG", "false").strip().lower() in {"1", "true", "yes", "on"},
+        )
+
+
+def event_loop() -> str:
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+
+def http_protocol() -> str:
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+
+def uvicorn_options(config: ServerConfig) -> dict[str, Any]:
+    """Keyword arguments for ``uvicorn.run``.
+
+    On SIGTERM each worker stops accepting connections, waits up to
+    ``graceful_timeout_seconds`` for in-flight requests, and then runs the lifespan
+    shutdown. That shutdown flushes write-behind batches and drains queued Agent Builder
+    dispatches before the pools close.
+    """
+    options: dict[str, Any] = {
+        "host": config.host,
+        "port": config.port,
+        "workers": config.workers,
+        "backlog": config.backlog,
+        "timeout_keep_alive": config.keepalive_seconds,
+        "timeout_graceful_shutdown": config.graceful_timeout_seconds,
+        "limit_concurrency": config.limit_concurrency,
+        "limit_max_requests": config.max_requests,
+        "loop": event_loop(),
+        "http": http_protocol(),
+        "lifespan": "on",
+        "log_level": config.log_level,
+        "access_log": config.access_log,
+        "proxy_headers": True,
+    }
+    if config.max_requests_jitter:
+        # Spreads worker recycling out so all workers do not restart at once.
+        options["limit_max_requests_jitter"] = config.max_requests_jitter
+    return options
+
+
+def main() -> None:
+    import uvicorn
+
+    uvicorn.run(APP_IMPORT_PATH, **uvicorn_options(ServerConfig.from_env()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import re
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Any, Sequence
+
+_NUMBER = r"(?P<value>\d+(?:\.\d+)?)\s*(?P<unit>%|ms|s|x|rps)?"
+COMPARISON_PATTERN = re.compile(rf"^(?P<metric>.+?)\s*(?P<operator>>=|<=|>|<|==|=)\s*{_NUMBER}$", re.IGNORECASE)
+MEASUREMENT_PATTERN = re.compile(rf"^(?P<metric>.*?[a-z].*?)\s+{_NUMBER}$", re.IGNORECASE)
+TREND_PATTERN = re.compile(
+    r"^(?P<metric>.+?)\s+(?P<operator>rising|increasing|spiking|surging|dropping|falling|failures?|errors?)$",
+    re.IGNORECASE,
+)
+
+# Metric family from keywords in the metric name; the first matching family wins.
+FAMILY_KEYWORDS: tuple[tuple[str, tuple[str, ...]], ...] = (
+    ("error_rate", ("error", "5xx", "failure", "exception")),
+    ("latency", ("latency", "p50", "p90", "p95", "p99", "response time", "slow")),
+    ("saturation", ("cpu", "memory", "queue", "thread", "disk", "connection")),
+    ("traffic", ("traffic", "rps", "qps", "request", "surge", "load")),
+)
+
+# How strongly each metric family points at each suspect.
+SUSPECT_WEIGHTS: dict[str, dict[str, float]] = {
+    "recent_deploy": {"error_rate": 0.6, "latency": 0.3, "deploy": 1.0},
+    "traffic_spike": {"traffic": 0.8, "saturation": 0.5, "latency": 0.3},
+}
+SEVERITY_WEIGHTS = {"low": 0.0, "medium": 0.2, "high": 0.4, "critical": 0.6}
+UNPARSED_WEIGHT = 0.5
+
+
+@dataclass(frozen=True)
+class Signal:
+    raw: str
+    metric: str
+    family: str
+    operator: str | None = None
+    value: float | None = None
+    unit: str | None = None
+
+    @property
+    def parsed(self) -> bool:
+        return self.operator is not None or self.value is not None
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def _family(metric: str) -> str:
+    lowered = metric.lower()
+    for family, keywords in FAMILY_KEYWORDS:
+        if any(keyword in lowered for keyword in keywords):
+            return family
+    return "other"
+
+
+def _normalize_metric(metric: str) -> str:
+    return re.sub(r"\W+", "_", metric.strip().lower()).strip("_")
+
+
+@lru_cache(maxsize=4096)
+def parse_signal(raw: str) -> Signal:
+    """Parse alert text such as ``"p95 latency > 2.5s"`` or ``"error rate 7%"``.
+
+    Seconds are normalized to milliseconds. Text that matches no pattern keeps its family
+    (from keywords) with no operator or value. Results are cached because the same alert
+    strings repeat across incidents.
+    """
+    text = raw.strip()
+    for pattern in (COMPARISON_PATTERN, MEASUREMENT_PATTERN):
+        match = pattern.match(text)
+        if match:
+            value = float(match["value"])
+            unit = (match["unit"] or "").lower() or None
+            if unit == "s":
+                value, unit = value * 1000, "ms"
+            operator = match.groupdict().get("operator") or "="
+            metric = match["metric"]
+            return Signal(text, _normalize_metric(metric), _family(metric), operator, value, unit)
+
+    match = TREND_PATTERN.match(text)
+    if match:
+        metric = match["metric"]
+        operator = match["operator"].lower()
+        family = _family(f"{metric} {operator}")
+        return Signal(text, _normalize_metric(metric), family, operator)
+
+    return Signal(text, _normalize_metric(text), _family(text))
+
+
+def parse_signals(raw_signals: Sequence[str]) -> list[Signal]:
+    return [parse_signal(raw) for raw in raw_signals]
+
+
+def _dot(weights: dict[str, float], evidence: dict[str, float]) -> float:
+    return round(sum((weights.get(family, 0.0) * amount for family, amount in evidence.items()), 0.0), 3)
+
+
+def score_suspects(
+    parsed: Sequence[Sequence[Signal]],
+    has_deploy: Sequence[bool],
+) -> list[dict[str, float]]:
+    """Score every suspect for a batch of incidents in one pass over the weight table.
+
+    Each incident is reduced to a family -> evidence vector (1.0 per parsed signal,
+    ``UNPARSED_WEIGHT`` per free-text signal, plus a ``deploy`` entry), which is then
+    dotted with each suspect's weights.
+    """
+    suspects = list(SUSPECT_WEIGHTS.items())
+    scores: list[dict[str, float]] = []
+    for signals, deploy in zip(parsed, has_deploy):
+        evidence: dict[str, float] = {"deploy": 1.0} if deploy else {}
+        for signal in signals:
+            weight = 1.0 if signal.parsed else UNPARSED_WEIGHT
+            evidence[signal.family] = evidence.get(signal.family, 0.0) + weight
+        scores.append({suspect: _dot(weights, evidence) for suspect, weights in suspects})
+    return scores
+
+
+def confidence_for(score: float, severity: str) -> str:
+    total = score + SEVERITY_WEIGHTS.get(severity, 0.0)
+    if total >= 1.0:
+        return "high"
+    if total >= 0.5:
+        return "medium"
+    return "low"
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import threading
+from typing import Any
+
+from .batching import MicroBatcher
+from .config import Settings
+from .elasticsearch_client import ElasticsearchService
+from .models import IncidentInput, IncidentRunResult
+
+
+class IncidentWriteBehind:
+    """Persists incidents to Elastic asynchronously through micro-batched ``_bulk`` writes."""
+
+    def __init__(self, settings: Settings, elastic_service: ElasticsearchService) -> None:
+        self.settings = settings
+        self.elastic_service = elastic_service
+        self._lock = threading.Lock()
+        self._failed_items = 0
+        self._batcher: MicroBatcher[tuple[IncidentInput, IncidentRunResult]] = MicroBatcher(
+            self._flush,
+            name="incident-write-behind",
+            max_queue=settings.write_behind_max_queue,
+            batch_size=settings.write_behind_batch_size,
+            flush_interval_ms=settings.write_behind_flush_ms,
+            enqueue_timeout_ms=settings.write_behind_enqueue_timeout_ms,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.settings.elastic_write_mode == "write_behind" and self.elastic_service.client is not None
+
+    def _flush(self, batch: list[tuple[IncidentInput, IncidentRunResult]]) -> None:
+        report = self.elastic_service.record_incidents_bulk(batch)
+        failed = report.get("failed", len(batch) if report.get("status") == "error" else 0)
+        with self._lock:
+            self._failed_items += failed
+
+    def submit(self, incident: IncidentInput, result: IncidentRunResult) -> dict[str, Any]:
+        accepted = self._batcher.submit((incident, result))
+        if not accepted:
+            return {
+                "enabled": True,
+                "status": "error",
+                "reason": "write_behind_stopped" if self._batcher.closed else "write_behind_queue_full",
+                "mode": "write_behind",
+            }
+
+        return {
+            "enabled": True,
+            "status": "queued",
+            "mode": "write_behind",
+            "index": self.settings.incidents_index,
+            "queue_depth": self._batcher.depth,
+        }
+
+    def start(self) -> None:
+        """Accept writes again after ``stop`` (e.g. when the app lifespan restarts)."""
+        self._batcher.reopen()
+
+    def stop(self, timeout: float | None = None) -> None:
+        self._batcher.stop(timeout)
+
+    def stats(self) -> dict[str, Any]:
+        stats = self._batcher.stats()
+        with self._lock:
+            stats["failed_items"] = self._failed_items
+        stats["mode"] = self.settings.elastic_write_mode
+        return stats
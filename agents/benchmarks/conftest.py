@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import importlib
+import sys
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_servers import backend_env, fake_agent_builder, fake_elasticsearch  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def fake_backends() -> Iterator[dict]:
+    with fake_elasticsearch() as (elastic_url, elastic_state), fake_agent_builder() as (builder_url, builder_state):
+        yield {
+            "elastic_url": elastic_url,
+            "elastic": elastic_state,
+            "agent_builder_url": builder_url,
+            "agent_builder": builder_state,
+        }
+
+
+@pytest.fixture(scope="session")
+def api_client(fake_backends: dict) -> Iterator[TestClient]:
+    """The real app, with its singletons built against the fake backends."""
+    with pytest.MonkeyPatch.context() as patch:
+        for name, value in backend_env(fake_backends["elastic_url"], fake_backends["agent_builder_url"]).items():
+            patch.setenv(name, value)
+        patch.delenv("ELASTIC_CLOUD_ID", raising=False)
+        sys.modules.pop("app.main", None)
+        main = importlib.import_module("app.main")
+        with TestClient(main.app) as client:
+            yield client
+        sys.modules.pop("app.main", None)
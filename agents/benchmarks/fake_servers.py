@@ -0,0 +1,445 @@
+"""Loopback stand-ins for Elasticsearch and Agent Builder so benchmarks need no network.
+
+Both servers speak real HTTP/1.1 with keep-alive, so client pooling and serialization
+costs are part of what gets measured. Only the endpoints the service calls are served.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from fnmatch import fnmatch
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Iterator
+from urllib.parse import urlsplit
+
+ES_HEADERS = {"X-Elastic-Product": "Elasticsearch"}
+
+
+class _JsonHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    extra_headers: dict[str, str] = {}
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002 - BaseHTTPRequestHandler signature
+        pass
+
+    def _read_raw(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        if self.headers.get("Content-Encoding") == "gzip":
+            raw = gzip.decompress(raw)
+        return raw
+
+    def _read_body(self) -> Any:
+        raw = self._read_raw()
+        return json.loads(raw) if raw else None
+
+    def _send(self, status: int, body: Any = None, head: bool = False) -> None:
+        data = b"" if body is None else json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in self.extra_headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        if not head:
+            self.wfile.write(data)
+
+
+@dataclass
+class FaultProfile:
+    """Latency and failures injected into fake responses.
+
+    ``error_rate`` failures are drawn from a seeded RNG, so a run is reproducible.
+    ``fail_first`` fails the first N matching requests outright, which is handy for
+    exercising retries. ``endpoints`` restricts the profile to some endpoint names (see
+    ``FakeElasticsearchHandler.ENDPOINTS``); when it is empty, every request is affected.
+    """
+
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    fail_first: int = 0
+    endpoints: tuple[str, ...] = ()
+    seed: int = 0
+
+
+class FakeElasticsearchState:
+    """Indices, documents and request counters for one fake cluster, shared by all handler threads."""
+
+    def __init__(self, profile: FaultProfile | None = None) -> None:
+        self.lock = threading.Lock()
+        self.indices: dict[str, dict[str, dict[str, Any]]] = {}
+        self.calls: Counter[str] = Counter()
+        self.injected_errors = 0
+        self.set_profile(profile or FaultProfile())
+
+    @property
+    def requests(self) -> int:
+        return sum(self.calls.values())
+
+    def set_profile(self, profile: FaultProfile) -> None:
+        with self.lock:
+            self.profile = profile
+            self._rng = random.Random(profile.seed)
+            self._matched = 0
+
+    def next_fault(self, endpoint: str) -> tuple[float, int | None]:
+        """Delay in seconds and the error status to return (``None`` to serve normally)."""
+        with self.lock:
+            self.calls[endpoint] += 1
+            profile = self.profile
+            if profile.endpoints and endpoint not in profile.endpoints:
+                return 0.0, None
+            self._matched += 1
+            delay = max(0.0, profile.latency_ms + self._rng.uniform(-profile.jitter_ms, profile.jitter_ms)) / 1000
+            failed = self._matched <= profile.fail_first or self._rng.random() < profile.error_rate
+            if failed:
+                self.injected_errors += 1
+            return delay, profile.error_status if failed else None
+
+
+class FakeElasticsearchHandler(_JsonHandler):
+    """Serves ping, ``indices.create``, ``index``, ``search`` (term + sort), ``_bulk``, ``_msearch`` and ES|QL."""
+
+    ENDPOINTS = ("ping", "info", "create_index", "index", "search", "bulk", "msearch", "esql")
+
+    state: FakeElasticsearchState
+    extra_headers = ES_HEADERS
+
+    def _endpoint(self, method: str, parts: list[str]) -> str | None:
+        if not parts:
+            return "ping" if method == "HEAD" else "info"
+        if parts == ["_query"]:
+            return "esql"
+        if parts[-1] == "_bulk" and len(parts) <= 2:
+            return "bulk"
+        if parts[-1] == "_msearch" and len(parts) <= 2:
+            return "msearch"
+        if len(parts) == 1 and method == "PUT":
+            return "create_index"
+        if len(parts) == 3 and parts[1] == "_doc" and method in {"PUT", "POST"}:
+            return "index"
+        if len(parts) == 2 and parts[1] == "_search":
+            return "search"
+        return None
+
+    def _route(self, method: str) -> None:
+        path = urlsplit(self.path).path
+        parts = [part for part in path.split("/") if part]
+        raw = self._read_raw() if method in {"PUT", "POST"} else b""
+        endpoint = self._endpoint(method, parts)
+        if endpoint is None:
+            return self._send(404, {"error": {"type": "fake_unsupported", "reason": f"{method} {path}"}, "status": 404})
+
+        delay, error_status = self.state.next_fault(endpoint)
+        if delay:
+            time.sleep(delay)
+        if error_status is not None:
+            error = {"type": "fake_injected_error", "reason": f"injected {error_status} for {endpoint}"}
+            return self._send(error_status, {"error": error, "status": error_status}, head=method == "HEAD")
+
+        default_index = parts[0] if len(parts) == 2 else None
+        if endpoint == "ping":
+            return self._send(200, head=True)
+        if endpoint == "info":
+            return self._send(200, {"name": "fake", "version": {"number": "8.15.0"}, "tagline": "You Know, for Search"})
+        if endpoint == "esql":
+            return self._esql(json.loads(raw or b"{}"))
+        if endpoint == "bulk":
+            return self._send(200, self._bulk(_ndjson(raw), default_index))
+        if endpoint == "msearch":
+            return self._send(200, self._msearch(_ndjson(raw), default_index))
+        if endpoint == "create_index":
+            return self._create_index(parts[0])
+        if endpoint == "index":
+            status, body = self._index(parts[0], parts[2], json.loads(raw or b"{}"))
+            return self._send(status, body)
+        return self._send(200, self._search(parts[0], json.loads(raw or b"{}")))
+
+    def _create_index(self, index: str) -> None:
+        with self.state.lock:
+            if index in self.state.indices:
+                error = {"type": "resource_already_exists_exception", "reason": f"index [{index}] already exists"}
+                return self._send(400, {"error": error, "status": 400})
+            self.state.indices[index] = {}
+        self._send(200, {"acknowledged": True, "shards_acknowledged": True, "index": index})
+
+    def _index(self, index: str, doc_id: str, document: dict[str, Any]) -> tuple[int, dict[str, Any]]:
+        with self.state.lock:
+            docs = self.state.indices.setdefault(index, {})
+            result = "updated" if doc_id in docs else "created"
+            docs[doc_id] = document
+        body = {"_index": index, "_id": doc_id, "_version": 1, "result": result, "_shards": {"total": 1, "successful": 1}}
+        return (201 if result == "created" else 200), body
+
+    def _update(self, index: str, doc_id: str, body: dict[str, Any]) -> tuple[int, dict[str, Any]]:
+        with self.state.lock:
+            document = self.state.indices.get(index, {}).get(doc_id)
+            if document is None:
+                error = {"type": "document_missing_exception", "reason": f"[{doc_id}]: document missing"}
+                return 404, {"_index": index, "_id": doc_id, "status": 404, "error": error}
+            if "doc" in body:
+                document.update(body["doc"])
+            script = body.get("script") or {}
+            params = script.get("params") or {}
+            # Stands in for the occurrence-count script: add ``count`` and stamp ``seen_at``.
+            if "count" in params:
+                document["occurrence_count"] = (document.get("occurrence_count") or 1) + params["count"]
+            if "seen_at" in params:
+                document["last_seen_at"] = params["seen_at"]
+        return 200, {"_index": index, "_id": doc_id, "_version": 2, "result": "updated", "status": 200}
+
+    def _bulk(self, lines: list[dict[str, Any]], default_index: str | None) -> dict[str, Any]:
+        items: list[dict[str, Any]] = []
+        position = 0
+        while position < len(lines):
+            op, meta = next(iter(lines[position].items()))
+            index = meta.get("_index") or default_index or ""
+            doc_id = str(meta.get("_id") or uuid.uuid4().hex)
+            if op == "delete":
+                with self.state.lock:
+                    found = self.state.indices.get(index, {}).pop(doc_id, None) is not None
+                status, body = (200, {"result": "deleted"}) if found else (404, {"result": "not_found"})
+                position += 1
+            else:
+                source = lines[position + 1]
+                position += 2
+                if op == "update":
+                    status, body = self._update(index, doc_id, source)
+                elif op == "create" and doc_id in self.state.indices.get(index, {}):
+                    error = {"type": "version_conflict_engine_exception", "reason": f"[{doc_id}]: document already exists"}
+                    status, body = 409, {"error": error}
+                else:
+                    status, body = self._index(index, doc_id, source)
+            items.append({op: {"_index": index, "_id": doc_id, **body, "status": status}})
+        errors = any(next(iter(item.values()))["status"] >= 300 for item in items)
+        return {"took": 1, "errors": errors, "items": items}
+
+    def _msearch(self, lines: list[dict[str, Any]], default_index: str | None) -> dict[str, Any]:
+        responses = []
+        for header, body in zip(lines[::2], lines[1::2]):
+            index = header.get("index") or default_index or ""
+            responses.append({**self._search(index, body), "status": 200})
+        return {"took": 1, "responses": responses}
+
+    def _search(self, index: str, body: dict[str, Any]) -> dict[str, Any]:
+        docs = self._documents(index)
+        term = (body.get("query") or {}).get("term") or {}
+        for field, condition in term.items():
+            expected = condition.get("value") if isinstance(condition, dict) else condition
+            docs = [(doc_id, doc) for doc_id, doc in docs if doc.get(field) == expected]
+        for sort in reversed(body.get("sort") or []):
+            for field, order in sort.items():
+                descending = (order.get("order") if isinstance(order, dict) else order) == "desc"
+                docs.sort(key=lambda item: str(item[1].get(field, "")), reverse=descending)
+        hits = [{"_index": index, "_id": doc_id, "_source": doc} for doc_id, doc in docs[: body.get("size", 10)]]
+        return {"took": 1, "timed_out": False, "hits": {"total": {"value": len(docs), "relation": "eq"}, "hits": hits}}
+
+    def _documents(self, pattern: str) -> list[tuple[str, dict[str, Any]]]:
+        """Documents from every index matching a comma-separated list of names or wildcards."""
+        with self.state.lock:
+            return [
+                (doc_id, dict(doc))
+                for name, docs in self.state.indices.items()
+                if any(fnmatch(name, part.strip()) for part in pattern.split(","))
+                for doc_id, doc in docs.items()
+            ]
+
+    def _esql(self, body: dict[str, Any]) -> None:
+        try:
+            columns, rows = run_esql(body.get("query", ""), body.get("params") or [], self._documents)
+        except ValueError as exc:
+            return self._send(400, {"error": {"type": "parsing_exception", "reason": str(exc)}, "status": 400})
+        values = [list(column) for column in zip(*rows)] if body.get("columnar") else rows
+        if body.get("columnar") and not rows:
+            values = [[] for _ in columns]
+        self._send(200, {"columns": columns, "values": values})
+
+    def do_HEAD(self) -> None:  # noqa: N802 - http.server naming
+        self._route("HEAD")
+
+    def do_GET(self) -> None:  # noqa: N802
+        self._route("GET")
+
+    def do_PUT(self) -> None:  # noqa: N802
+        self._route("PUT")
+
+    def do_POST(self) -> None:  # noqa: N802
+        self._route("POST")
+
+
+def _ndjson(raw: bytes) -> list[dict[str, Any]]:
+    return [json.loads(line) for line in raw.splitlines() if line.strip()]
+
+
+_ESQL_CONDITION = re.compile(r'([\w.@]+)\s*==\s*("(?:[^"\\]|\\.)*"|-?\d+(?:\.\d+)?)')
+_ESQL_AGGREGATE = re.compile(
+    r'(\w+)\s*=\s*(?:COUNT\(\*\)|PERCENTILE\(\s*([\w.]+)\s*,\s*(\d+(?:\.\d+)?)\s*\))'
+    r'(?:\s+WHERE\s+([\w.@]+)\s*==\s*("(?:[^"\\]|\\.)*"|-?\d+(?:\.\d+)?))?',
+    re.IGNORECASE,
+)
+
+
+def _percentile(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    values = sorted(values)
+    rank = (len(values) - 1) * q / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (rank - lower)
+
+
+def run_esql(
+    query: str,
+    params: list[Any],
+    documents: Callable[[str], list[tuple[str, dict[str, Any]]]],
+) -> tuple[list[dict[str, str]], list[list[Any]]]:
+    """Evaluate the ES|QL subset the service sends: ``FROM``, ``WHERE`` equality, ``STATS``, ``SORT``, ``LIMIT``.
+
+    ``STATS`` supports ``COUNT(*)`` and ``PERCENTILE(field, q)``, each with an optional
+    ``WHERE field == value`` filter and an optional ``BY field``. Conditions other than
+    equality (such as time ranges) are accepted and ignored, since fake data has no clock.
+    """
+    positional = iter(params)
+    try:
+        query = re.sub(r"\?", lambda _: json.dumps(next(positional)), query)
+    except StopIteration:
+        raise ValueError("not enough params for positional placeholders") from None
+
+    commands = [command.strip() for command in query.split("|")]
+    if not commands[0].upper().startswith("FROM "):
+        raise ValueError("query must start with FROM")
+    rows = [doc for _, doc in documents(commands[0][5:].strip())]
+    columns: list[dict[str, str]] | None = None
+    table: list[list[Any]] = []
+
+    for command in commands[1:]:
+        keyword, _, rest = command.partition(" ")
+        keyword = keyword.upper()
+        if keyword == "WHERE":
+            for field, literal in _ESQL_CONDITION.findall(rest):
+                expected = json.loads(literal)
+                rows = [row for row in rows if row.get(field) == expected]
+        elif keyword == "STATS":
+            stats = re.match(r"(.*?)(?:\s+BY\s+([\w.@]+))?\s*$", rest, re.IGNORECASE | re.DOTALL)
+            assert stats is not None
+            columns, table = _esql_stats(rows, stats[1], stats[2] or "")
+        elif keyword == "SORT":
+            field, _, order = rest.strip().partition(" ")
+            position = [column["name"] for column in columns or []].index(field)
+            table.sort(
+                key=lambda row: (row[position] is None, row[position]),
+                reverse=order.strip().upper() == "DESC",
+            )
+        elif keyword == "LIMIT":
+            table = table[: int(rest)]
+        else:
+            raise ValueError(f"unsupported ES|QL command: {keyword}")
+
+    if columns is None:
+        raise ValueError("only STATS queries are supported")
+    return columns, table
+
+
+def _esql_stats(rows: list[dict[str, Any]], aggregates: str, by: str) -> tuple[list[dict[str, str]], list[list[Any]]]:
+    specs = _ESQL_AGGREGATE.findall(aggregates)
+    if not specs:
+        raise ValueError(f"unsupported STATS expression: {aggregates}")
+    groups: dict[Any, list[dict[str, Any]]] = {}
+    for row in rows:
+        groups.setdefault(row.get(by) if by else None, []).append(row)
+    if not by:
+        groups.setdefault(None, [])
+
+    table = []
+    for key, members in groups.items():
+        values: list[Any] = []
+        for _, field, q, where_field, where_literal in specs:
+            matched = members
+            if where_field:
+                expected = json.loads(where_literal)
+                matched = [row for row in members if row.get(where_field) == expected]
+            if field:
+                values.append(_percentile([float(row[field]) for row in matched if row.get(field) is not None], float(q)))
+            else:
+                values.append(len(matched))
+        table.append(values + ([key] if by else []))
+
+    columns = [{"name": name, "type": "double" if field else "long"} for name, field, *_ in specs]
+    if by:
+        columns.append({"name": by, "type": "keyword"})
+    return columns, table
+
+
+class FakeAgentBuilderState:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.received: list[dict[str, Any]] = []
+
+
+class FakeAgentBuilderHandler(_JsonHandler):
+    state: FakeAgentBuilderState
+
+    def do_POST(self) -> None:  # noqa: N802
+        body = self._read_body() or {}
+        with self.state.lock:
+            self.state.received.append(body)
+        incidents = body.get("incidents") if isinstance(body, dict) else None
+        if isinstance(incidents, list):
+            results = [{"incident_id": item["workflow"]["incident_id"], "status": "ok"} for item in incidents]
+            return self._send(200, {"results": results})
+        self._send(200, {"status": "accepted"})
+
+
+@contextmanager
+def _serve(handler: type[BaseHTTPRequestHandler], state: Any) -> Iterator[tuple[str, Any]]:
+    bound = type(handler.__name__, (handler,), {"state": state})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), bound)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name=handler.__name__, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}", state
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join(timeout=5)
+
+
+@contextmanager
+def fake_elasticsearch(profile: FaultProfile | None = None) -> Iterator[tuple[str, FakeElasticsearchState]]:
+    """Run a fake cluster on an ephemeral loopback port; yields ``(url, state)``.
+
+    Swap the fault profile mid-run with ``state.set_profile(...)``.
+    """
+    with _serve(FakeElasticsearchHandler, FakeElasticsearchState(profile)) as served:
+        yield served
+
+
+@contextmanager
+def fake_agent_builder() -> Iterator[tuple[str, FakeAgentBuilderState]]:
+    """Run a fake Agent Builder on an ephemeral loopback port; yields ``(url, state)``."""
+    with _serve(FakeAgentBuilderHandler, FakeAgentBuilderState()) as served:
+        yield served
+
+
+def backend_env(elastic_url: str, agent_builder_url: str) -> dict[str, str]:
+    """Environment that points ``app.main`` at the fakes."""
+    return {
+        "ELASTIC_URL": elastic_url,
+        "ELASTIC_API_KEY": "benchmark",
+        "ELASTIC_REFRESH": "false",
+        "AGENT_BUILDER_BASE_URL": agent_builder_url,
+        "AGENT_BUILDER_API_KEY": "benchmark",
+    }
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+from test_bench_workflow import PAYLOAD
+
+CONCURRENCY = 16
+BURST = 64
+
+
+def test_bench_run_incident_round_trip(benchmark, api_client, fake_backends) -> None:
+    response = benchmark(api_client.post, "/incidents/run", json=PAYLOAD)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["elastic"]["status"] == "ok"
+    assert body["agent_builder"]["status"] == "ok"
+    assert fake_backends["agent_builder"].received
+
+
+def test_bench_run_incident_throughput(benchmark, api_client) -> None:
+    """A burst of concurrent requests through the full stack; ops/s × ``BURST`` is requests/s."""
+    pool = ThreadPoolExecutor(max_workers=CONCURRENCY)
+
+    def burst() -> list[int]:
+        futures = [pool.submit(api_client.post, "/incidents/run", json=PAYLOAD) for _ in range(BURST)]
+        return [future.result().status_code for future in futures]
+
+    try:
+        statuses = benchmark.pedantic(burst, rounds=5, warmup_rounds=1)
+    finally:
+        pool.shutdown()
+    assert statuses == [200] * BURST
+    benchmark.extra_info["requests_per_round"] = BURST
+    benchmark.extra_info["concurrency"] = CONCURRENCY
+
+
+
+def test_bench_run_incident_batch(benchmark, api_client) -> None:
+    batch = {"incidents": [{**PAYLOAD, "service": f"svc-{index}"} for index in range(100)]}
+    response = benchmark(api_client.post, "/incidents/run:batch", json=batch)
+
+    assert response.status_code == 200
+    assert response.json()["succeeded"] == 100
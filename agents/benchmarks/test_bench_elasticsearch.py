@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+from fake_servers import FaultProfile, fake_elasticsearch
+
+from app.config import Settings
+from app.elasticsearch_client import ElasticsearchService
+from app.models import IncidentInput, IncidentRunResult
+
+
+def _settings(elastic_url: str, **overrides) -> Settings:
+    base = {
+        "elastic_cloud_id": None,
+        "elastic_api_key": "benchmark",
+        "elastic_url": elastic_url,
+        "incidents_index": "incidents-logs",
+        "logs_index_pattern": "logs-*",
+        "metrics_index_pattern": "metrics-*",
+        "agent_builder_base_url": None,
+        "agent_builder_api_key": None,
+        "agent_builder_route": "/api/incident/execute",
+        "request_timeout_seconds": 5,
+        "elastic_refresh": "false",
+        "analytics_cache_ttl_seconds": 0,
+        "retry_base_delay_ms": 1,
+        "retry_max_delay_ms": 5,
+    }
+    base.update(overrides)
+    return Settings(**base)
+
+
+def _pairs(count: int) -> list[tuple[IncidentInput, IncidentRunResult]]:
+    incident = IncidentInput(service="checkout-api", severity="high", summary="Latency spikes after deploy")
+    return [
+        (
+            incident,
+            IncidentRunResult(
+                incident_id=f"inc-{index}",
+                service="checkout-api",
+                severity="high",
+                status="investigating",
+                timeline=[],
+                recommendation="Rollback and verify",
+                stakeholder_update="Investigating",
+            ),
+        )
+        for index in range(count)
+    ]
+
+
+def test_bench_bulk_index_500(benchmark) -> None:
+    with fake_elasticsearch() as (url, state):
+        service = ElasticsearchService(_settings(url))
+        pairs = _pairs(500)
+        report = benchmark(service.record_incidents_bulk, pairs)
+
+        assert report["status"] == "ok"
+        assert report["indexed"] == 500
+        assert len(state.indices["incidents-logs"]) == 500
+
+
+def test_bench_concurrent_record_under_latency(benchmark) -> None:
+    """32 threads sharing one pooled client while every call takes ~5 ms server-side."""
+    with fake_elasticsearch(FaultProfile(latency_ms=5, jitter_ms=2)) as (url, state):
+        service = ElasticsearchService(_settings(url, elastic_connections_per_node=32))
+        pairs = _pairs(64)
+        pool = ThreadPoolExecutor(max_workers=32)
+
+        def burst() -> list[str]:
+            futures = [pool.submit(service.record_incident_and_analyze, *pair) for pair in pairs]
+            return [future.result()["status"] for future in futures]
+
+        try:
+            statuses = benchmark.pedantic(burst, rounds=3, warmup_rounds=1)
+        finally:
+            pool.shutdown()
+        assert statuses == ["ok"] * len(pairs)
+        benchmark.extra_info["server_requests"] = state.requests
+
+
+def test_bench_retries_through_injected_errors(benchmark) -> None:
+    with fake_elasticsearch() as (url, state):
+        service = ElasticsearchService(_settings(url, breaker_failure_threshold=1000))
+        incident, result = _pairs(1)[0]
+
+        def record_through_two_failures() -> dict:
+            state.set_profile(FaultProfile(fail_first=2, error_status=503, endpoints=("index",)))
+            return service.record_incident_and_analyze(incident, result)
+
+        report = benchmark(record_through_two_failures)
+
+        assert report["status"] == "ok"
+        assert state.injected_errors >= 2
+
+
+def test_bench_msearch_across_services(benchmark) -> None:
+    with fake_elasticsearch(FaultProfile(latency_ms=2)) as (url, state):
+        service = ElasticsearchService(_settings(url))
+        service.record_incidents_bulk(_pairs(50))
+        searches = []
+        for service_name in ("checkout-api", "payments-api", "inventory-api"):
+            searches += [{"index": "incidents-logs"}, {"query": {"term": {"service": {"value": service_name}}}, "size": 5}]
+
+        response = benchmark(service.client.msearch, searches=searches)
+
+        assert [len(item["hits"]["hits"]) for item in response["responses"]] == [5, 0, 0]
+        assert state.calls["search"] == 0
+
+
+def test_bench_esql_incident_count(benchmark) -> None:
+    with fake_elasticsearch() as (url, _):
+        service = ElasticsearchService(_settings(url))
+        service.record_incidents_bulk(_pairs(200))
+
+        body = benchmark(service._run_esql, "checkout-api", "high")
+
+        assert body["columns"] == [{"name": "incident_count", "type": "long"}]
+        assert body["values"] == [[200]]
@@ -0,0 +1,41 @@
+"""Cold-start cost of ``import app.main`` in a fresh interpreter.
+
+Run with ``--benchmark-compare-fail=mean:10%`` against a saved baseline to catch
+startup regressions. ``extra_info`` lists the slowest top-level imports.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+AGENTS_DIR = Path(__file__).resolve().parents[1]
+ENV = {**os.environ, "ELASTIC_URL": "http://localhost:9200", "ELASTIC_API_KEY": "benchmark"}
+IMPORT_LINE = re.compile(r"import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)")
+
+
+def _import_app(*flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *flags, "-c", "import app.main"],
+        cwd=AGENTS_DIR,
+        env=ENV,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def test_bench_import_app_main(benchmark) -> None:
+    benchmark.pedantic(_import_app, rounds=5, warmup_rounds=1)
+
+    cumulative: list[tuple[int, str]] = []
+    for line in _import_app("-X", "importtime").stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match and len(match[2]) == 1:
+            cumulative.append((int(match[1]), match[3]))
+    benchmark.extra_info["slowest_imports_ms"] = {
+        name: round(micros / 1000, 1) for micros, name in sorted(cumulative, reverse=True)[:8]
+    }
@@ -0,0 +1,59 @@
+"""Per-request serialization cost: the dict + ``json.dumps`` path against the single-serialization path.
+
+Compare the ``dict_path`` and ``fast_path`` groups; the difference is the CPU saved per request.
+"""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from app.agents import IncidentWorkflow
+from app.models import IncidentInput, IncidentRunResult
+from app.serialization import agent_builder_body, result_json
+
+from test_bench_workflow import PAYLOAD
+
+
+@pytest.fixture(scope="module")
+def incident_and_result() -> tuple[IncidentInput, IncidentRunResult]:
+    incident = IncidentInput(**PAYLOAD)
+    workflow = IncidentWorkflow()
+    result = workflow.run(incident)
+    workflow.close()
+    result.elastic = {"enabled": True, "status": "ok", "index": "incidents-logs", "duration_ms": 12.5}
+    result.agent_builder = {"enabled": True, "status": "ok", "response_status": 200, "attempts": 1}
+    return incident, result
+
+
+@pytest.mark.benchmark(group="per-request-serialization")
+def test_bench_dict_path(benchmark, incident_and_result) -> None:
+    """Before: ``model_dump`` + ``json.dumps`` for the Agent Builder body; FastAPI then validates and dumps the model again."""
+    incident, result = incident_and_result
+
+    def serialize() -> tuple[bytes, bytes]:
+        body = json.dumps(
+            {
+                "incident": incident.model_dump(),
+                "workflow": result.model_dump(exclude={"elastic", "agent_builder", "profile", "dedup"}),
+            }
+        ).encode("utf-8")
+        response = IncidentRunResult.model_validate(result.model_dump()).model_dump_json().encode("utf-8")
+        return body, response
+
+    benchmark(serialize)
+
+
+@pytest.mark.benchmark(group="per-request-serialization")
+def test_bench_fast_path(benchmark, incident_and_result) -> None:
+    """After: the workflow JSON is produced once and spliced into both the body and the response."""
+    incident, result = incident_and_result
+
+    def serialize() -> tuple[bytes, bytes]:
+        result._workflow_json = None
+        return agent_builder_body(incident, result), result_json(result)
+
+    body, response = benchmark(serialize)
+    assert json.loads(response) == json.loads(result.model_dump_json())
+    assert json.loads(body)["workflow"]["incident_id"] == result.incident_id
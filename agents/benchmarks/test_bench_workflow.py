@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from app.agents import IncidentWorkflow
+from app.models import IncidentInput, IncidentRunResult
+
+PAYLOAD = {
+    "service": "checkout-api",
+    "severity": "high",
+    "summary": "Latency spikes after deploy",
+    "signals": ["p95 latency > 2.5s", "error rate 7%", "queue depth rising"],
+    "recent_deploy_sha": "abc1234",
+}
+
+
+def test_bench_workflow_run(benchmark) -> None:
+    workflow = IncidentWorkflow()
+    incident = IncidentInput(**PAYLOAD)
+    try:
+        result = benchmark(workflow.run, incident)
+    finally:
+        workflow.close()
+    assert len(result.timeline) == 4
+
+
+def test_bench_workflow_run_many(benchmark) -> None:
+    workflow = IncidentWorkflow()
+    incidents = [IncidentInput(**{**PAYLOAD, "service": f"svc-{index}"}) for index in range(100)]
+    try:
+        results = benchmark(workflow.run_many, incidents)
+    finally:
+        workflow.close()
+    assert len(results) == 100
+
+
+def test_bench_incident_input_validation(benchmark) -> None:
+    incident = benchmark(IncidentInput.model_validate, PAYLOAD)
+    assert incident.service == "checkout-api"
+
+
+def test_bench_run_result_model_dump(benchmark) -> None:
+    workflow = IncidentWorkflow()
+    result = workflow.run(IncidentInput(**PAYLOAD))
+    workflow.close()
+    dumped = benchmark(result.model_dump)
+    assert dumped["incident_id"] == result.incident_id
+
+
+def test_bench_run_result_model_dump_json(benchmark) -> None:
+    workflow = IncidentWorkflow()
+    result = workflow.run(IncidentInput(**PAYLOAD))
+    workflow.close()
+    raw = benchmark(result.model_dump_json)
+    assert IncidentRunResult.model_validate_json(raw).incident_id == result.incident_id
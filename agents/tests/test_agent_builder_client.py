@@ -1,9 +1,7 @@
 from __future__ import annotations
 
-from io import BytesIO
-from urllib import error
+import urllib3
 
-import app.agent_builder_client as agent_builder_module
 from app.agent_builder_client import AgentBuilderService
 from app.agents import IncidentWorkflow
 from app.config import Settings
@@ -30,6 +28,33 @@ def make_settings(
     )
 
 
+class FakePool:
+    def __init__(self, *, status: int = 200, reason: str = "OK", data: bytes = b"", exc: Exception | None = None):
+        self.status = status
+        self.reason = reason
+        self.data = data
+        self.exc = exc
+        self.requests: list[dict] = []
+
+    def request(self, method, url, body=None, headers=None, timeout=None, pool_timeout=None):
+        self.requests.append(
+            {
+                "method": method,
+                "url": url,
+                "body": body,
+                "headers": headers,
+                "timeout": timeout,
+                "pool_timeout": pool_timeout,
+            }
+        )
+        if self.exc is not None:
+            raise self.exc
+        return self
+
+    def clear(self) -> None:
+        pass
+
+
 def make_incident_and_result() -> tuple[IncidentInput, object]:
     incident = IncidentInput(
         service="checkout-api",
@@ -64,20 +89,10 @@ def test_dispatch_returns_error_for_invalid_base_url() -> None:
     assert response["reason"] == "invalid_agent_builder_base_url"
 
 
-def test_dispatch_success_reports_payload_size(monkeypatch) -> None:
+def test_dispatch_success_reports_payload_size() -> None:
     service = AgentBuilderService(make_settings(base_url="https://agent-builder.local", api_key="secret"))
     incident, result = make_incident_and_result()
-
-    class DummyResponse:
-        status = 202
-
-        def __enter__(self):
-            return self
-
-        def __exit__(self, exc_type, exc, tb):
-            return False
-
-    monkeypatch.setattr(agent_builder_module.request, "urlopen", lambda req, timeout: DummyResponse())
+    service._pool = FakePool(status=202)
 
     response = service.dispatch_incident(incident, result)
 
@@ -87,22 +102,10 @@ def test_dispatch_success_reports_payload_size(monkeypatch) -> None:
     assert response["payload_bytes"] > 0
 
 
-def test_dispatch_http_error_includes_truncated_body(monkeypatch) -> None:
+def test_dispatch_http_error_includes_truncated_body() -> None:
     service = AgentBuilderService(make_settings(base_url="https://agent-builder.local", api_key="secret"))
     incident, result = make_incident_and_result()
-
-    long_body = ("x" * 650).encode("utf-8")
-
-    def raise_http_error(req, timeout):
-        raise error.HTTPError(
-            url="https://agent-builder.local/api/incident/execute",
-            code=502,
-            msg="Bad Gateway",
-            hdrs=None,
-            fp=BytesIO(long_body),
-        )
-
-    monkeypatch.setattr(agent_builder_module.request, "urlopen", raise_http_error)
+    service._pool = FakePool(status=502, reason="Bad Gateway", data=("x" * 650).encode("utf-8"))
 
     response = service.dispatch_incident(incident, result)
 
@@ -113,16 +116,165 @@ def test_dispatch_http_error_includes_truncated_body(monkeypatch) -> None:
     assert len(response["error_body"]) <= 503
 
 
-def test_dispatch_url_error_is_reported(monkeypatch) -> None:
+def test_dispatch_url_error_is_reported() -> None:
     service = AgentBuilderService(make_settings(base_url="https://agent-builder.local", api_key="secret"))
     incident, result = make_incident_and_result()
+    service._pool = FakePool(exc=urllib3.exceptions.NewConnectionError(None, "connection refused"))
 
-    def raise_url_error(req, timeout):
-        raise error.URLError("connection refused")
+    response = service.dispatch_incident(incident, result)
 
-    monkeypatch.setattr(agent_builder_module.request, "urlopen", raise_url_error)
+    assert response["status"] == "error"
+    assert "connection_error" in response["error"]
+
+
+def test_dispatch_reuses_one_keep_alive_pool() -> None:
+    service = AgentBuilderService(make_settings(base_url="https://agent-builder.local", api_key="secret"))
+    incident, result = make_incident_and_result()
+    pool = service._pool
+
+    assert pool.connection_pool_kw["maxsize"] == 10
+    assert pool.headers["Connection"] == "keep-alive"
+
+    service._pool = FakePool(status=202)
+    service.dispatch_incident(incident, result)
+    service.dispatch_incident(incident, result)
+
+    assert len(service._pool.requests) == 2
+    assert service._pool.requests[0]["url"] == "https://agent-builder.local/api/incident/execute"
+
+
+def test_dispatch_batch_gzips_body_and_reports_per_incident() -> None:
+    import gzip
+    import json
+
+    service = AgentBuilderService(make_settings(base_url="https://agent-builder.local", api_key="secret"))
+    incident, first = make_incident_and_result()
+    second = first.model_copy(update={"incident_id": "incident-2"})
+    service._pool = FakePool(
+        status=207,
+        data=json.dumps(
+            {"results": [{"incident_id": "incident-2", "status": "error"}]}
+        ).encode("utf-8"),
+    )
+
+    reports = service.dispatch_batch([(incident, first), (incident, second)])
+
+    sent = service._pool.requests[0]
+    assert sent["url"] == "https://agent-builder.local/api/incident/execute-batch"
+    assert sent["headers"]["Content-Encoding"] == "gzip"
+    decoded = json.loads(gzip.decompress(sent["body"]))
+    assert len(decoded["incidents"]) == 2
+    assert [report["incident_id"] for report in reports] == [first.incident_id, "incident-2"]
+    assert [report["status"] for report in reports] == ["ok", "error"]
+    assert reports[0]["batch_size"] == 2
+    assert reports[0]["compressed_bytes"] == len(sent["body"])
+    assert reports[0]["payload_bytes"] > reports[0]["compressed_bytes"]
+
+
+def test_dispatch_retries_server_errors_then_opens_breaker(monkeypatch) -> None:
+    from dataclasses import replace
+
+    import app.agent_builder_client as agent_builder_module
+
+    monkeypatch.setattr(agent_builder_module.time, "sleep", lambda _: None)
+    settings = replace(
+        make_settings(base_url="https://agent-builder.example", api_key="token"),
+        retry_max_attempts=3,
+        breaker_failure_threshold=1,
+    )
+    service = AgentBuilderService(settings)
+    service._pool = FakePool(status=503, reason="Service Unavailable")
+    incident, result = make_incident_and_result()
+
+    first = service.dispatch_incident(incident, result)
+    second = service.dispatch_incident(incident, result)
+
+    assert first["attempts"] == 3
+    assert first["response_status"] == 503
+    assert second["status"] == "error"
+    assert second["reason"] == "circuit_open"
+    assert len(service._pool.requests) == 3
+    assert service.breaker_stats()[0]["state"] == "open"
+
+
+def test_dispatch_does_not_retry_client_errors() -> None:
+    service = AgentBuilderService(make_settings(base_url="https://agent-builder.example", api_key="token"))
+    service._pool = FakePool(status=400, reason="Bad Request")
+    incident, result = make_incident_and_result()
+
+    response = service.dispatch_incident(incident, result)
+
+    assert response["attempts"] == 1
+    assert service.breaker_stats()[0]["state"] == "closed"
+
+
+def test_dispatch_counts_unexpected_pool_errors_against_the_breaker(monkeypatch) -> None:
+    from dataclasses import replace
+
+    import app.agent_builder_client as agent_builder_module
+
+    monkeypatch.setattr(agent_builder_module.time, "sleep", lambda _: None)
+    settings = replace(
+        make_settings(base_url="https://agent-builder.example", api_key="token"),
+        retry_max_attempts=2,
+        breaker_failure_threshold=1,
+    )
+    service = AgentBuilderService(settings)
+    service._pool = FakePool(exc=OSError("socket closed"))
+    incident, result = make_incident_and_result()
 
     response = service.dispatch_incident(incident, result)
 
     assert response["status"] == "error"
-    assert "connection_error" in response["error"]
+    assert response["error"] == "socket closed"
+    assert response["attempts"] == 1
+    assert service.breaker_stats()[0]["state"] == "open"
+
+
+def test_dispatch_retries_connect_errors_but_not_read_timeouts(monkeypatch) -> None:
+    from dataclasses import replace
+
+    import app.agent_builder_client as agent_builder_module
+
+    monkeypatch.setattr(agent_builder_module.time, "sleep", lambda _: None)
+    settings = replace(
+        make_settings(base_url="https://agent-builder.example", api_key="token"),
+        retry_max_attempts=3,
+        breaker_failure_threshold=5,
+    )
+    incident, result = make_incident_and_result()
+
+    refused = AgentBuilderService(settings)
+    refused._pool = FakePool(exc=urllib3.exceptions.NewConnectionError(None, "connection refused"))
+    timed_out = AgentBuilderService(settings)
+    timed_out._pool = FakePool(exc=urllib3.exceptions.ReadTimeoutError(None, "/", "read timed out"))
+
+    assert refused.dispatch_incident(incident, result)["attempts"] == 3
+    assert timed_out.dispatch_incident(incident, result)["attempts"] == 1
+    assert len(timed_out._pool.requests) == 1
+    assert timed_out.breaker_stats()[0]["consecutive_failures"] == 1
+
+
+def test_pool_caps_connections_and_waits_for_a_free_one() -> None:
+    service = AgentBuilderService(make_settings(base_url="https://agent-builder.example", api_key="token"))
+    pool = service._build_pool()
+    service._pool = FakePool(status=202, reason="Accepted")
+    incident, result = make_incident_and_result()
+
+    service.dispatch_incident(incident, result)
+
+    assert pool.connection_pool_kw["block"] is True
+    assert pool.connection_pool_kw["maxsize"] == service.settings.agent_builder_max_connections
+    assert service._pool.requests[0]["pool_timeout"] == service.settings.request_timeout_seconds
+
+
+def test_exhausted_pool_is_reported_without_retrying() -> None:
+    service = AgentBuilderService(make_settings(base_url="https://agent-builder.example", api_key="token"))
+    service._pool = FakePool(exc=urllib3.exceptions.EmptyPoolError(None, "pool is empty"))
+    incident, result = make_incident_and_result()
+
+    response = service.dispatch_incident(incident, result)
+
+    assert response["error"] == "connection_pool_exhausted"
+    assert response["attempts"] == 1
+    assert service.breaker_stats()[0]["consecutive_failures"] == 1
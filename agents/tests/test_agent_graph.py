@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field
+
+import pytest
+
+from app.agent_graph import AgentGraph
+from app.agents import IncidentWorkflow
+from app.models import AgentStep, IncidentInput
+
+
+@dataclass
+class RecordingAgent:
+    name: str
+    inputs: tuple[str, ...] = ()
+    barrier: threading.Barrier | None = None
+    calls: list[dict] = field(default_factory=list)
+
+    def run(self, incident: IncidentInput, **upstream: AgentStep) -> AgentStep:
+        self.calls.append(upstream)
+        if self.barrier is not None:
+            # Only returns when every agent sharing the barrier is running at the same time.
+            self.barrier.wait(timeout=2)
+        return AgentStep(agent=self.name, action="record", output={"upstream": sorted(upstream)})
+
+
+def make_incident() -> IncidentInput:
+    return IncidentInput(service="checkout-api", severity="high", summary="Latency spikes after deploy")
+
+
+def test_independent_agents_run_in_parallel_and_each_runs_once() -> None:
+    barrier = threading.Barrier(2)
+    root = RecordingAgent("root")
+    left = RecordingAgent("left", inputs=("root",), barrier=barrier)
+    right = RecordingAgent("right", inputs=("root",), barrier=barrier)
+    join = RecordingAgent("join", inputs=("left", "right"))
+    graph = AgentGraph([root, left, right, join])
+
+    steps = graph.run(make_incident())
+    graph.close()
+
+    assert graph.order == ["root", "left", "right", "join"]
+    assert steps["join"].output == {"upstream": ["left", "right"]}
+    assert [len(agent.calls) for agent in (root, left, right, join)] == [1, 1, 1, 1]
+    assert all(step.duration_ms is not None for step in steps.values())
+
+
+def test_unknown_dependency_and_cycles_are_rejected() -> None:
+    with pytest.raises(ValueError, match="unknown"):
+        AgentGraph([RecordingAgent("a", inputs=("missing",))])
+
+    with pytest.raises(ValueError, match="cycle"):
+        AgentGraph([RecordingAgent("a", inputs=("b",)), RecordingAgent("b", inputs=("a",))])
+
+
+def test_workflow_timeline_keeps_agent_order_with_timings() -> None:
+    result = IncidentWorkflow().run(make_incident())
+
+    assert [step.agent for step in result.timeline] == ["triage", "diagnosis", "remediation", "communication"]
+    assert all(step.duration_ms is not None and step.duration_ms >= 0 for step in result.timeline)
@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import asyncio
+
+from app.async_elasticsearch_client import AsyncElasticsearchService
+from app.config import Settings
+from app.models import IncidentInput, IncidentRunResult
+
+
+class _FakeAsyncIndices:
+    def __init__(self, parent: "_FakeAsyncElasticsearch") -> None:
+        self.parent = parent
+
+    async def create(self, index, mappings):
+        self.parent.calls.append("indices.create")
+        return {"acknowledged": True, "index": index}
+
+
+class _FakeAsyncEsql:
+    def __init__(self, parent: "_FakeAsyncElasticsearch") -> None:
+        self.parent = parent
+
+    async def query(self, query, params):
+        self.parent.calls.append("esql.query")
+        if self.parent.raise_on == "esql_query":
+            raise RuntimeError("esql failed")
+        return {"columns": [{"name": "incident_count", "type": "long"}], "values": [[3]]}
+
+
+class _FakeAsyncElasticsearch:
+    def __init__(self, *, raise_on: str | None = None) -> None:
+        self.raise_on = raise_on
+        self.calls: list[str] = []
+        self.indices = _FakeAsyncIndices(self)
+        self.esql = _FakeAsyncEsql(self)
+        self.closed = False
+
+    async def ping(self):
+        self.calls.append("ping")
+        return True
+
+    def options(self, ignore_status):
+        return self
+
+    async def index(self, index, id, document, refresh):
+        self.calls.append("index")
+        return {"result": "created", "_id": id}
+
+    async def search(self, index, size, query, sort):
+        self.calls.append("search")
+        return {"hits": {"hits": [{"_source": {"incident_id": "inc-1"}}]}}
+
+    async def close(self):
+        self.closed = True
+
+
+def _settings() -> Settings:
+    return Settings(
+        elastic_cloud_id=None,
+        elastic_api_key="secret",
+        elastic_url="http://localhost:9200",
+        incidents_index="incidents-logs",
+        logs_index_pattern="logs-*",
+        metrics_index_pattern="metrics-*",
+        agent_builder_base_url=None,
+        agent_builder_api_key=None,
+        agent_builder_route="/api/incident/execute",
+        request_timeout_seconds=5,
+    )
+
+
+def _incident_and_result() -> tuple[IncidentInput, IncidentRunResult]:
+    incident = IncidentInput(
+        service="checkout-api",
+        severity="high",
+        summary="Latency spikes after deploy",
+        signals=["p95 latency > 2.5s"],
+    )
+    result = IncidentRunResult(
+        incident_id="inc-123",
+        service="checkout-api",
+        severity="high",
+        status="investigating",
+        timeline=[],
+        recommendation="Rollback and verify",
+        stakeholder_update="Investigating",
+    )
+    return incident, result
+
+
+def test_async_service_runs_all_phases_and_caches_bootstrap() -> None:
+    service = AsyncElasticsearchService(_settings())
+    client = _FakeAsyncElasticsearch()
+    service.client = client
+    incident, result = _incident_and_result()
+
+    async def scenario():
+        first = await service.record_incident_and_analyze(incident, result)
+        client.calls.clear()
+        second = await service.record_incident_and_analyze(incident, result)
+        await service.close()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert first["status"] == "ok"
+    assert first["index_result"]["_id"] == "inc-123"
+    assert first["search"]["latest_incident_ids"] == ["inc-1"]
+    assert first["esql"]["values"] == [[3]]
+    assert second["create_result"]["cached"] is True
+    assert second["search"]["latest_incident_ids"] == ["inc-123", "inc-1"]
+    assert second["esql"]["values"] == [[4]]
+    assert client.calls == ["index"]
+    assert client.closed is True
+
+
+def test_async_service_reports_failing_phase() -> None:
+    service = AsyncElasticsearchService(_settings())
+    service.client = _FakeAsyncElasticsearch(raise_on="esql_query")
+    incident, result = _incident_and_result()
+
+    report = asyncio.run(service.record_incident_and_analyze(incident, result))
+
+    assert report["status"] == "error"
+    assert report["phase"] == "esql_query"
+    assert "esql failed" in report["error"]
+
+
+def test_async_service_skips_when_not_configured() -> None:
+    settings = Settings(**{**_settings().__dict__, "elastic_api_key": None})
+    service = AsyncElasticsearchService(settings)
+    incident, result = _incident_and_result()
+
+    report = asyncio.run(service.record_incident_and_analyze(incident, result))
+
+    assert report == {"enabled": False, "status": "skipped", "reason": "elastic_not_configured"}
+
+
+class _FakeAsyncDiagnosisClient:
+    def __init__(self, *, slow_phase: str | None = None) -> None:
+        self.slow_phase = slow_phase
+        self.requests: list[str] = []
+        self.cancelled: list[str] = []
+        self.esql = self
+
+    def options(self, request_timeout=None):
+        return self
+
+    async def query(self, query, params, columnar):
+        phase = "log_correlation" if query.startswith("FROM logs-*") else "latency_p95"
+        self.requests.append(phase)
+        if phase == self.slow_phase:
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                self.cancelled.append(phase)
+                raise
+        if phase == "log_correlation":
+            return {
+                "columns": [
+                    {"name": "errors", "type": "long"},
+                    {"name": "warnings", "type": "long"},
+                    {"name": "host", "type": "keyword"},
+                ],
+                "values": [[40], [7], ["web-1"]],
+            }
+        return {"columns": [{"name": "p95", "type": "double"}], "values": [[2310.5]]}
+
+
+def test_async_diagnosis_cancels_queries_that_miss_the_budget() -> None:
+    from dataclasses import replace
+
+    service = AsyncElasticsearchService(replace(_settings(), diagnosis_esql_budget_ms=50))
+    service.client = _FakeAsyncDiagnosisClient(slow_phase="log_correlation")
+
+    report = asyncio.run(service.run_diagnosis_queries("checkout-api"))
+
+    assert report["status"] == "partial"
+    assert report["errors"] == {"log_correlation": "timeout"}
+    assert report["p95_latency_ms"] == 2310.5
+    assert report["duration_ms"] < 250
+    assert service.client.cancelled == ["log_correlation"]
+    assert service.breaker.stats()["consecutive_failures"] == 1
+
+
+def test_async_diagnosis_skips_while_the_breaker_is_open() -> None:
+    from dataclasses import replace
+
+    settings = replace(
+        _settings(),
+        diagnosis_esql_budget_ms=20,
+        breaker_failure_threshold=2,
+        diagnosis_failure_ttl_seconds=0,
+    )
+    service = AsyncElasticsearchService(settings)
+    service.client = _FakeAsyncDiagnosisClient(slow_phase="latency_p95")
+
+    async def scenario():
+        return [await service.run_diagnosis_queries("checkout-api") for _ in range(3)]
+
+    reports = asyncio.run(scenario())
+
+    assert [report["status"] for report in reports] == ["partial", "partial", "skipped"]
+    assert reports[2]["reason"] == "circuit_open"
+    assert len(service.client.requests) == 4
+    assert service.breaker.state == "open"
+
+
+def test_async_diagnosis_failures_are_cached_briefly() -> None:
+    from dataclasses import replace
+
+    service = AsyncElasticsearchService(replace(_settings(), diagnosis_esql_budget_ms=20))
+    service.client = _FakeAsyncDiagnosisClient(slow_phase="latency_p95")
+
+    async def scenario():
+        return [await service.run_diagnosis_queries("checkout-api") for _ in range(3)]
+
+    reports = asyncio.run(scenario())
+
+    assert [report["status"] for report in reports] == ["partial"] * 3
+    assert [report["cached"] for report in reports] == [False, True, True]
+    assert len(service.client.requests) == 2
+    assert service.breaker.stats()["consecutive_failures"] == 1
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import app.cache as cache_module
+from app.cache import TTLCache
+
+
+def test_entries_expire_after_ttl(monkeypatch) -> None:
+    now = [100.0]
+    monkeypatch.setattr(cache_module, "monotonic", lambda: now[0])
+    cache = TTLCache(ttl_seconds=5, max_entries=10)
+
+    cache.set("key", {"value": 1})
+    assert cache.get("key") == {"value": 1}
+
+    now[0] += 6
+    assert cache.get("key") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_least_recently_used_entry_is_evicted() -> None:
+    cache = TTLCache(ttl_seconds=60, max_entries=2)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_update_only_touches_live_entries_and_zero_ttl_disables() -> None:
+    cache = TTLCache(ttl_seconds=60, max_entries=2)
+    cache.set("a", 1)
+
+    assert cache.update("a", lambda value: value + 1) is True
+    assert cache.update("missing", lambda value: value + 1) is False
+    assert cache.get("a") == 2
+
+    disabled = TTLCache(ttl_seconds=0, max_entries=2)
+    disabled.set("a", 1)
+    assert disabled.get("a") is None
@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+from app.config import Settings
+from app.dedup import IncidentDeduplicator, incident_fingerprint
+from app.models import IncidentInput, IncidentRunResult
+
+
+def _settings(**overrides) -> Settings:
+    base = {
+        "elastic_cloud_id": None,
+        "elastic_api_key": "secret",
+        "elastic_url": "http://localhost:9200",
+        "incidents_index": "incidents-logs",
+        "logs_index_pattern": "logs-*",
+        "metrics_index_pattern": "metrics-*",
+        "agent_builder_base_url": None,
+        "agent_builder_api_key": None,
+        "agent_builder_route": "/api/incident/execute",
+        "request_timeout_seconds": 5,
+        "dedup_window_seconds": 60.0,
+        "dedup_flush_ms": 20,
+    }
+    base.update(overrides)
+    return Settings(**base)
+
+
+def _incident(**overrides) -> IncidentInput:
+    fields = {
+        "service": "checkout-api",
+        "severity": "high",
+        "summary": "Latency spikes after deploy",
+        "signals": ["p95 latency > 2.5s", "error rate 7%"],
+    }
+    fields.update(overrides)
+    return IncidentInput(**fields)
+
+
+def _result(incident_id: str = "inc-1") -> IncidentRunResult:
+    return IncidentRunResult(
+        incident_id=incident_id,
+        service="checkout-api",
+        severity="high",
+        status="investigating",
+        timeline=[],
+        recommendation="Rollback and verify",
+        stakeholder_update="Investigating",
+        elastic={"enabled": True, "status": "ok"},
+        agent_builder={"enabled": True, "status": "ok"},
+    )
+
+
+class _FakeElasticService:
+    def __init__(self) -> None:
+        self.client = object()
+        self.bumps: list[dict[str, int]] = []
+        self.flushed = threading.Event()
+
+    def bump_occurrences(self, counts: dict[str, int]) -> dict:
+        self.bumps.append(counts)
+        self.flushed.set()
+        return {"status": "ok", "updated": len(counts), "failed": 0}
+
+
+def test_fingerprint_ignores_signal_values_and_order() -> None:
+    first = _incident(signals=["p95 latency > 2.5s", "error rate 7%"])
+    refired = _incident(signals=["error rate 9%", "p95 latency > 3s"], summary="Latency still spiking")
+
+    assert incident_fingerprint(first) == incident_fingerprint(refired)
+    assert incident_fingerprint(first) != incident_fingerprint(_incident(severity="critical"))
+    assert incident_fingerprint(first) != incident_fingerprint(_incident(service="payments-api"))
+
+
+def test_duplicates_attach_to_primary_and_skip_integrations() -> None:
+    elastic = _FakeElasticService()
+    dedup = IncidentDeduplicator(_settings(), elastic)
+
+    async def scenario():
+        primary = await dedup.claim(_incident())
+        assert primary.duplicate is False
+        dedup.complete(primary, _result())
+
+        duplicate = await dedup.claim(_incident(signals=["p95 latency > 2.9s", "error rate 8%"]))
+        await dedup.claim(_incident())
+        return primary, duplicate
+
+    primary, duplicate = asyncio.run(scenario())
+    result = dedup.duplicate_result(duplicate)
+
+    assert duplicate.duplicate is True
+    assert result.incident_id == "inc-1"
+    assert result.elastic["reason"] == "duplicate_incident"
+    assert result.elastic["occurrence_update"] == "queued"
+    assert result.agent_builder == {"enabled": False, "status": "skipped", "reason": "duplicate_incident"}
+    assert result.dedup == {"fingerprint": primary.fingerprint, "duplicate_of": "inc-1", "occurrences": 2}
+
+    assert elastic.flushed.wait(2)
+    dedup.stop(timeout=2)
+    assert sum(counts["inc-1"] for counts in elastic.bumps) == 2
+    assert dedup.stats()["duplicates"] == 2
+
+
+def test_window_expiry_starts_a_new_primary() -> None:
+    dedup = IncidentDeduplicator(_settings(dedup_window_seconds=0.05), _FakeElasticService())
+
+    async def scenario():
+        first = await dedup.claim(_incident())
+        dedup.complete(first, _result())
+        await asyncio.sleep(0.1)
+        return await dedup.claim(_incident())
+
+    assert asyncio.run(scenario()).duplicate is False
+    assert dedup.stats()["primaries"] == 2
+
+
+def test_waiting_duplicates_are_bumped_once_the_primary_completes() -> None:
+    elastic = _FakeElasticService()
+    dedup = IncidentDeduplicator(_settings(), elastic)
+
+    async def scenario():
+        primary = await dedup.claim(_incident())
+        waiters = [asyncio.ensure_future(dedup.claim(_incident())) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        assert not any(waiter.done() for waiter in waiters)
+        dedup.complete(primary, _result())
+        return await asyncio.gather(*waiters)
+
+    claims = asyncio.run(scenario())
+
+    assert all(claim.duplicate and claim.result.incident_id == "inc-1" for claim in claims)
+    assert sorted(claim.occurrences for claim in claims) == [2, 3, 4]
+    assert elastic.flushed.wait(2)
+    dedup.stop(timeout=2)
+    assert elastic.bumps == [{"inc-1": 3}]
+
+
+def test_bumps_flow_again_after_stop_and_start() -> None:
+    elastic = _FakeElasticService()
+    dedup = IncidentDeduplicator(_settings(), elastic)
+    dedup.stop(timeout=2)
+    dedup.start()
+
+    async def scenario():
+        primary = await dedup.claim(_incident())
+        dedup.complete(primary, _result())
+        return await dedup.claim(_incident())
+
+    claim = asyncio.run(scenario())
+
+    assert claim.occurrence_update == "queued"
+    assert elastic.flushed.wait(2)
+    dedup.stop(timeout=2)
+    assert elastic.bumps == [{"inc-1": 1}]
+
+
+def test_eviction_skips_primaries_that_are_still_running() -> None:
+    dedup = IncidentDeduplicator(_settings(dedup_max_entries=1), _FakeElasticService())
+
+    async def scenario():
+        running = await dedup.claim(_incident())
+        other = await dedup.claim(_incident(service="payments-api"))
+        dedup.complete(other, _result("inc-2"))
+        waiter = asyncio.ensure_future(dedup.claim(_incident()))
+        await asyncio.sleep(0.01)
+        dedup.complete(running, _result())
+        third = await dedup.claim(_incident(service="search-api"))
+        return await waiter, third
+
+    duplicate, third = asyncio.run(scenario())
+
+    assert duplicate.duplicate is True
+    assert duplicate.result.incident_id == "inc-1"
+    assert third.duplicate is False
+    assert dedup.stats()["primaries"] == 3
+    assert dedup.stats()["tracked"] == 1
+    dedup.stop(timeout=2)
+
+
+def test_timed_out_duplicate_stays_attached_to_its_primary() -> None:
+    elastic = _FakeElasticService()
+    dedup = IncidentDeduplicator(_settings(request_timeout_seconds=0.05), elastic)
+
+    async def scenario():
+        primary = await dedup.claim(_incident())
+        pending = await dedup.claim(_incident())
+        dedup.complete(primary, _result())
+        return pending
+
+    pending = asyncio.run(scenario())
+
+    assert pending.duplicate is True
+    assert pending.pending is True
+    assert dedup.pending_response(pending)["dedup"]["occurrences"] == 2
+    assert elastic.flushed.wait(2)
+    dedup.stop(timeout=2)
+    assert elastic.bumps == [{"inc-1": 1}]
+    assert dedup.stats()["primaries"] == 1
+    assert dedup.stats()["timed_out"] == 1
+
+
+def test_abandoned_primary_hands_over_to_one_waiter() -> None:
+    dedup = IncidentDeduplicator(_settings(), _FakeElasticService())
+
+    async def scenario():
+        primary = await dedup.claim(_incident())
+        waiters = [asyncio.ensure_future(dedup.claim(_incident())) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        dedup.abandon(primary)
+        await asyncio.sleep(0.01)
+        successors = [waiter.result() for waiter in waiters if waiter.done()]
+        assert len(successors) == 1 and successors[0].duplicate is False
+        dedup.complete(successors[0], _result("inc-2"))
+        return await asyncio.gather(*waiters)
+
+    claims = asyncio.run(scenario())
+
+    assert sorted(claim.duplicate for claim in claims) == [False, True, True]
+    assert {claim.result.incident_id for claim in claims if claim.duplicate} == {"inc-2"}
+    assert dedup.stats()["primaries"] == 2
+
+
+class _FakeBumpService(_FakeElasticService):
+    """Reports ``document_missing`` until ``visible_after`` bumps have been attempted."""
+
+    def __init__(self, visible_after: int) -> None:
+        super().__init__()
+        self.visible_after = visible_after
+
+    def bump_occurrences(self, counts: dict[str, int]) -> dict:
+        self.bumps.append(counts)
+        if len(self.bumps) < self.visible_after:
+            errors = [
+                {"incident_id": incident_id, "response_status": 404, "error": "document_missing_exception"}
+                for incident_id in counts
+            ]
+            return {"status": "error", "updated": 0, "failed": len(errors), "errors": errors}
+        self.flushed.set()
+        return {"status": "ok", "updated": len(counts), "failed": 0, "errors": []}
+
+
+def test_bump_for_a_document_still_in_write_behind_is_retried() -> None:
+    elastic = _FakeBumpService(visible_after=2)
+    dedup = IncidentDeduplicator(_settings(), elastic)
+    queued = _result().model_copy(update={"elastic": {"enabled": True, "status": "queued"}})
+
+    async def scenario():
+        primary = await dedup.claim(_incident())
+        dedup.complete(primary, queued)
+        await dedup.claim(_incident())
+
+    asyncio.run(scenario())
+
+    assert elastic.flushed.wait(2)
+    dedup.stop(timeout=2)
+    assert elastic.bumps == [{"inc-1": 1}, {"inc-1": 1}]
+    assert dedup.stats()["bump_failures"] == 0
+    assert dedup.stats()["bump_retries"] == 1
+
+
+def test_storm_larger_than_the_threadpool_coalesces_onto_one_run(monkeypatch) -> None:
+    import httpx
+    from fastapi.concurrency import run_in_threadpool
+
+    import app.main as main
+
+    dedup = IncidentDeduplicator(_settings(request_timeout_seconds=3), _FakeElasticService())
+    monkeypatch.setattr(main, "deduplicator", dedup)
+    arun = main.workflow.arun
+
+    async def slow_run(*args, **kwargs):
+        # The primary needs a threadpool worker while every duplicate is waiting.
+        await run_in_threadpool(time.sleep, 0.3)
+        return await arun(*args, **kwargs)
+
+    monkeypatch.setattr(main.workflow, "arun", slow_run)
+    payload = _incident().model_dump()
+
+    async def storm():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(client.post("/incidents/run", json=payload) for _ in range(60)))
+
+    started = time.perf_counter()
+    responses = asyncio.run(storm())
+    elapsed = time.perf_counter() - started
+    dedup.stop(timeout=2)
+
+    assert {response.status_code for response in responses} == {200}
+    assert len({response.json()["incident_id"] for response in responses}) == 1
+    assert dedup.stats()["primaries"] == 1
+    assert dedup.stats()["duplicates"] == 59
+    assert elapsed < 2
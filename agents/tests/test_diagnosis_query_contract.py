@@ -47,3 +47,91 @@ def test_diagnosis_hypothesis_contract_without_recent_deploy() -> None:
 
     diagnosis_step = response.json()["timeline"][1]
     assert diagnosis_step["output"]["hypothesis"] == "Capacity saturation due to abnormal traffic"
+
+
+def test_diagnosis_feeds_top_hosts_into_hypothesis() -> None:
+    from app.agents import IncidentWorkflow
+    from app.models import IncidentInput
+
+    class FakeLogAnalytics:
+        def run_diagnosis_queries(self, service: str) -> dict:
+            return {"status": "ok", "top_hosts": [{"host": "web-1", "errors": 40, "warnings": 3}]}
+
+    incident = IncidentInput(
+        service="checkout-api",
+        severity="high",
+        summary="Latency and errors increased after deploy",
+        recent_deploy_sha="abc1234",
+    )
+    result = IncidentWorkflow(log_analytics=FakeLogAnalytics()).run(incident)
+
+    diagnosis_step = result.timeline[1]
+    assert diagnosis_step.output["hypothesis"] == "Regression introduced in recent deploy; errors concentrated on web-1"
+    assert diagnosis_step.output["correlation"]["status"] == "ok"
+    assert "web-1" in result.timeline[2].output["justification"]
+
+
+def test_async_workflow_awaits_diagnosis_on_the_event_loop() -> None:
+    import asyncio
+    import threading
+
+    from app.agents import IncidentWorkflow
+    from app.models import IncidentInput
+
+    class FakeAsyncLogAnalytics:
+        def __init__(self) -> None:
+            self.threads: list[str] = []
+
+        async def run_diagnosis_queries(self, service: str) -> dict:
+            self.threads.append(threading.current_thread().name)
+            await asyncio.sleep(0)
+            return {"status": "ok", "top_hosts": [{"host": "web-2", "errors": 12, "warnings": 0}]}
+
+    analytics = FakeAsyncLogAnalytics()
+    incident = IncidentInput(service="search-api", severity="medium", summary="Traffic surge increased response time")
+    streamed: list[str] = []
+
+    result = asyncio.run(
+        IncidentWorkflow(async_log_analytics=analytics).arun(incident, lambda step: streamed.append(step.agent))
+    )
+
+    assert analytics.threads == [threading.main_thread().name]
+    assert streamed == ["triage", "diagnosis", "remediation", "communication"]
+    assert result.timeline[1].output["hypothesis"].endswith("errors concentrated on web-2")
+    assert all(step.duration_ms is not None for step in result.timeline)
+
+
+def test_batch_diagnoses_each_service_once_and_concurrently() -> None:
+    import threading
+    import time
+
+    from app.agents import IncidentWorkflow
+    from app.models import IncidentInput
+
+    class SlowLogAnalytics:
+        def __init__(self) -> None:
+            self.services: list[str] = []
+            self.lock = threading.Lock()
+
+        def run_diagnosis_queries(self, service: str) -> dict:
+            with self.lock:
+                self.services.append(service)
+            time.sleep(0.1)
+            return {"status": "ok", "top_hosts": [{"host": f"{service}-1", "errors": 5, "warnings": 0}]}
+
+    analytics = SlowLogAnalytics()
+    services = ["checkout-api", "search-api", "payments-api", "auth-api"]
+    incidents = [
+        IncidentInput(service=services[index % len(services)], severity="high", summary="Errors rising")
+        for index in range(40)
+    ]
+
+    started = time.perf_counter()
+    results = IncidentWorkflow(log_analytics=analytics).run_many(incidents)
+    elapsed = time.perf_counter() - started
+
+    assert sorted(analytics.services) == sorted(services)
+    assert elapsed < 0.3
+    for incident, result in zip(incidents, results):
+        assert result.timeline[1].output["hypothesis"].endswith(f"errors concentrated on {incident.service}-1")
+        assert result.timeline[1].duration_ms is not None
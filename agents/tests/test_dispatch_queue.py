@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import threading
+
+from fastapi.testclient import TestClient
+
+import app.main as main_module
+from app.config import Settings
+from app.dispatch_queue import DispatchTracker
+from app.models import IncidentInput, IncidentRunResult
+
+
+def _settings(**overrides) -> Settings:
+    base = {
+        "elastic_cloud_id": None,
+        "elastic_api_key": None,
+        "elastic_url": None,
+        "incidents_index": "incidents-logs",
+        "logs_index_pattern": "logs-*",
+        "metrics_index_pattern": "metrics-*",
+        "agent_builder_base_url": "https://agent-builder.example.com",
+        "agent_builder_api_key": "token",
+        "agent_builder_route": "/api/incident/execute",
+        "request_timeout_seconds": 10,
+        "agent_builder_dispatch_mode": "async",
+        "agent_builder_dispatch_workers": 2,
+    }
+    base.update(overrides)
+    return Settings(**base)
+
+
+def _incident_and_result() -> tuple[IncidentInput, IncidentRunResult]:
+    incident = IncidentInput(service="checkout-api", severity="high", summary="Latency spikes after deploy")
+    result = IncidentRunResult(
+        incident_id="incident-1",
+        service="checkout-api",
+        severity="high",
+        status="investigating",
+        timeline=[],
+        recommendation="Rollback and monitor",
+        stakeholder_update="Investigating checkout-api",
+    )
+    return incident, result
+
+
+class _SlowAgentBuilder:
+    def __init__(self) -> None:
+        self.release = threading.Event()
+
+    def dispatch_incident(self, incident, result):
+        self.release.wait(2)
+        return {"enabled": True, "status": "ok", "response_status": 202}
+
+
+def test_submit_returns_queued_and_records_final_outcome() -> None:
+    agent_builder = _SlowAgentBuilder()
+    tracker = DispatchTracker(_settings(), agent_builder)
+
+    report = tracker.submit(*_incident_and_result())
+
+    assert report["status"] == "queued"
+    assert tracker.get(report["dispatch_id"])["status"] in {"queued", "running"}
+
+    agent_builder.release.set()
+    tracker.stop()
+
+    record = tracker.get(report["dispatch_id"])
+    assert record["status"] == "ok"
+    assert record["incident_id"] == "incident-1"
+    assert record["result"]["response_status"] == 202
+    assert record["completed_at"] is not None
+
+
+def test_submit_rejects_when_pending_limit_reached() -> None:
+    agent_builder = _SlowAgentBuilder()
+    tracker = DispatchTracker(_settings(agent_builder_dispatch_max_pending=1), agent_builder)
+
+    tracker.submit(*_incident_and_result())
+    rejected = tracker.submit(*_incident_and_result())
+    agent_builder.release.set()
+    tracker.stop()
+
+    assert rejected["reason"] == "dispatch_queue_full"
+    assert tracker.stats()["rejected"] == 1
+
+
+def test_dispatch_endpoint_returns_404_for_unknown_id() -> None:
+    client = TestClient(main_module.app)
+
+    response = client.get("/dispatches/does-not-exist")
+
+    assert response.status_code == 404
+    assert response.json()["detail"] == "dispatch_not_found"
+
+
+def test_dispatch_endpoint_returns_tracked_record(monkeypatch) -> None:
+    agent_builder = _SlowAgentBuilder()
+    agent_builder.release.set()
+    tracker = DispatchTracker(_settings(), agent_builder)
+    monkeypatch.setattr(main_module, "dispatch_tracker", tracker)
+    report = tracker.submit(*_incident_and_result())
+    tracker.stop()
+
+    response = TestClient(main_module.app).get(f"/dispatches/{report['dispatch_id']}")
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "ok"
+
+
+class _BatchAgentBuilder:
+    def __init__(self) -> None:
+        self.batches: list[int] = []
+
+    def dispatch_incident(self, incident, result):
+        return {"enabled": True, "status": "ok", "incident_id": result.incident_id}
+
+    def dispatch_batch(self, items):
+        self.batches.append(len(items))
+        return [
+            {"enabled": True, "status": "ok", "incident_id": result.incident_id, "batch_size": len(items)}
+            for _, result in items
+        ]
+
+
+def test_batch_mode_coalesces_incidents_into_one_delivery() -> None:
+    agent_builder = _BatchAgentBuilder()
+    tracker = DispatchTracker(
+        _settings(agent_builder_dispatch_mode="batch", agent_builder_batch_size=3, agent_builder_batch_window_ms=1000),
+        agent_builder,
+    )
+
+    reports = [tracker.submit(*_incident_and_result()) for _ in range(3)]
+    tracker.stop()
+    dropped = tracker.submit(*_incident_and_result())
+
+    assert agent_builder.batches == [3]
+    assert {report["integration_path"] for report in [*reports, dropped]} == {"/api/incident/execute-batch"}
+    records = [tracker.get(report["dispatch_id"]) for report in reports]
+    assert all(record["status"] == "ok" for record in records)
+    assert records[0]["result"]["batch_size"] == 3
+
+
+def test_submit_after_stop_marks_the_record_dropped() -> None:
+    for mode in ("async", "batch"):
+        tracker = DispatchTracker(_settings(agent_builder_dispatch_mode=mode), _BatchAgentBuilder())
+        tracker.stop()
+
+        report = tracker.submit(*_incident_and_result())
+
+        assert report["status"] == "error"
+        assert report["reason"] == "dispatch_dropped"
+        assert tracker.get(report["dispatch_id"])["status"] == "dropped"
+        assert tracker.stats()["pending"] == 0
+
+
+def test_start_reopens_a_stopped_tracker() -> None:
+    for mode in ("async", "batch"):
+        tracker = DispatchTracker(
+            _settings(agent_builder_dispatch_mode=mode, agent_builder_batch_window_ms=10), _BatchAgentBuilder()
+        )
+        tracker.stop()
+        tracker.start()
+
+        report = tracker.submit(*_incident_and_result())
+        tracker.stop()
+
+        assert report["status"] == "queued"
+        assert tracker.get(report["dispatch_id"])["status"] == "ok"
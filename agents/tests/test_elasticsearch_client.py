@@ -3,6 +3,7 @@ from __future__ import annotations
 from app.config import Settings
 from app.elasticsearch_client import ElasticsearchService
 from app.models import IncidentInput, IncidentRunResult
+from app.profiling import profiled
 
 
 class FakeOptionsClient:
@@ -195,3 +196,412 @@ def test_esql_error_reports_phase() -> None:
 
     assert response["status"] == "error"
     assert response["phase"] == "esql_query"
+
+
+def test_bulk_reports_per_item_outcomes(monkeypatch) -> None:
+    import app.elasticsearch_client as elasticsearch_module
+
+    service = ElasticsearchService(make_settings())
+    service.client = FakeElasticsearchClient()
+    incident, first = make_incident_and_result()
+    second = first.model_copy(update={"incident_id": "inc-456"})
+    captured: dict = {}
+
+    def fake_streaming_bulk(client, actions, chunk_size, **kwargs):
+        actions = list(actions)
+        captured["chunk_size"] = chunk_size
+        captured["ids"] = [action["_id"] for action in actions]
+        yield True, {"index": {"_id": "inc-123", "result": "created", "status": 201}}
+        yield False, {
+            "index": {
+                "_id": "inc-456",
+                "status": 400,
+                "error": {"type": "mapper_parsing_exception", "reason": "bad field"},
+            }
+        }
+
+    monkeypatch.setattr(elasticsearch_module.helpers, "streaming_bulk", fake_streaming_bulk)
+
+    response = service.record_incidents_bulk([(incident, first), (incident, second)])
+
+    assert captured == {"chunk_size": 500, "ids": ["inc-123", "inc-456"]}
+    assert response["status"] == "partial"
+    assert response["indexed"] == 1
+    assert response["failed"] == 1
+    assert response["items"][0] == {
+        "incident_id": "inc-123",
+        "status": "ok",
+        "result": "created",
+        "response_status": 201,
+    }
+    assert response["items"][1]["error"] == "mapper_parsing_exception: bad field"
+    assert service.breaker.stats()["consecutive_failures"] == 0
+
+
+def test_bulk_item_dependency_failures_count_against_the_breaker(monkeypatch) -> None:
+    from dataclasses import replace
+
+    import app.elasticsearch_client as elasticsearch_module
+
+    service = ElasticsearchService(replace(make_settings(), breaker_failure_threshold=2))
+    service.client = FakeElasticsearchClient()
+    incident, result = make_incident_and_result()
+
+    def throttled_streaming_bulk(client, actions, chunk_size, **kwargs):
+        for action in actions:
+            op_type = action["_op_type"]
+            yield False, {op_type: {"_id": action["_id"], "status": 429, "error": "es_rejected_execution_exception"}}
+
+    monkeypatch.setattr(elasticsearch_module.helpers, "streaming_bulk", throttled_streaming_bulk)
+
+    indexed = service.record_incidents_bulk([(incident, result)])
+    bumped = service.bump_occurrences({"inc-123": 1})
+
+    assert indexed["status"] == "error"
+    assert indexed["items"][0]["response_status"] == 429
+    assert bumped["status"] == "error"
+    assert service.breaker.state == "open"
+    assert service.bump_occurrences({"inc-123": 1})["reason"] == "circuit_open"
+
+
+def test_bulk_transport_error_reports_phase(monkeypatch) -> None:
+    import app.elasticsearch_client as elasticsearch_module
+
+    service = ElasticsearchService(make_settings())
+    service.client = FakeElasticsearchClient()
+    incident, result = make_incident_and_result()
+
+    def raise_streaming_bulk(client, actions, chunk_size, **kwargs):
+        raise RuntimeError("bulk failed")
+
+    monkeypatch.setattr(elasticsearch_module.helpers, "streaming_bulk", raise_streaming_bulk)
+
+    response = service.record_incidents_bulk([(incident, result)])
+
+    assert response["status"] == "error"
+    assert response["phase"] == "bulk_index"
+    assert "bulk failed" in response["error"]
+
+
+def test_index_bootstrap_and_ping_are_cached_between_requests() -> None:
+    service = ElasticsearchService(make_settings())
+    client = FakeElasticsearchClient()
+    service.client = client
+    incident, result = make_incident_and_result()
+
+    with profiled() as first_profile:
+        first = service.record_incident_and_analyze(incident, result)
+    client.calls.clear()
+    with profiled() as second_profile:
+        second = service.record_incident_and_analyze(incident, result)
+
+    first_spans = {span["name"] for span in first_profile.to_dict()["spans"]}
+    second_spans = {span["name"] for span in second_profile.to_dict()["spans"]}
+    assert first["create_result"]["cached"] is False
+    assert {"ping", "create_index"} <= first_spans
+    assert second["status"] == "ok"
+    assert second["create_result"]["cached"] is True
+    assert "ping" not in client.calls
+    assert "indices.create" not in client.calls
+    assert not {"ping", "create_index"} & second_spans
+
+
+def test_index_not_found_resets_bootstrap_state() -> None:
+    from dataclasses import replace
+
+    service = ElasticsearchService(replace(make_settings(), analytics_cache_ttl_seconds=0))
+    client = FakeElasticsearchClient()
+    service.client = client
+    incident, result = make_incident_and_result()
+    service.record_incident_and_analyze(incident, result)
+
+    def raise_missing_index(**kwargs):
+        raise RuntimeError("index_not_found_exception: no such index [incidents-logs]")
+
+    client.search = raise_missing_index
+    failed = service.record_incident_and_analyze(incident, result)
+    del client.search
+    client.calls.clear()
+    recovered = service.record_incident_and_analyze(incident, result)
+
+    assert failed["phase"] == "search_recent"
+    assert recovered["status"] == "ok"
+    assert "indices.create" in client.calls
+
+
+def test_cached_failed_probe_fails_fast_without_pinging() -> None:
+    service = ElasticsearchService(make_settings())
+    client = FakeElasticsearchClient(ping_ok=False)
+    service.client = client
+    service.bootstrap()
+    client.calls.clear()
+    incident, result = make_incident_and_result()
+
+    response = service.record_incident_and_analyze(incident, result)
+
+    assert response["phase"] == "ping"
+    assert client.calls == []
+
+
+def test_search_and_esql_run_concurrently(monkeypatch) -> None:
+    import threading
+
+    service = ElasticsearchService(make_settings())
+    service.client = FakeElasticsearchClient()
+    incident, result = make_incident_and_result()
+    both_started = threading.Barrier(2, timeout=2)
+
+    def search_recent(service_name):
+        both_started.wait()
+        return {"hits": {"hits": []}}
+
+    def run_esql(service_name, severity):
+        both_started.wait()
+        return {"columns": [], "values": [[2]]}
+
+    monkeypatch.setattr(service, "_search_recent", search_recent)
+    monkeypatch.setattr(service, "_run_esql", run_esql)
+
+    response = service.record_incident_and_analyze(incident, result)
+
+    assert response["status"] == "ok"
+    assert response["esql"]["values"] == [[2]]
+
+
+def test_search_error_wins_when_both_read_phases_fail() -> None:
+    service = ElasticsearchService(make_settings())
+    client = FakeElasticsearchClient(raise_on="search_recent")
+    client.esql.query = lambda query, params: (_ for _ in ()).throw(RuntimeError("esql failed"))
+    service.client = client
+    incident, result = make_incident_and_result()
+
+    response = service.record_incident_and_analyze(incident, result)
+
+    assert response["phase"] == "search_recent"
+
+
+def test_refresh_false_merges_just_indexed_incident_into_search() -> None:
+    from dataclasses import replace
+
+    service = ElasticsearchService(replace(make_settings(), elastic_refresh="false"))
+    client = FakeElasticsearchClient()
+    refresh_seen: list[str] = []
+    original_index = client.index
+
+    def capture_index(index, id, document, refresh):
+        refresh_seen.append(refresh)
+        return original_index(index, id, document, refresh)
+
+    client.index = capture_index
+    service.client = client
+    incident, result = make_incident_and_result()
+
+    response = service.record_incident_and_analyze(incident, result)
+
+    assert refresh_seen == ["false"]
+    assert response["refresh"] == "false"
+    assert response["search"]["latest_incident_ids"] == ["inc-123", "inc-1"]
+    assert response["search"]["merged_local_write"] is True
+
+
+def test_refresh_false_counts_the_local_write_on_esql_hit_and_miss() -> None:
+    from dataclasses import replace
+
+    service = ElasticsearchService(replace(make_settings(), elastic_refresh="false"))
+    client = FakeElasticsearchClient()
+    service.client = client
+    incident, result = make_incident_and_result()
+
+    miss = service.record_incident_and_analyze(incident, result)
+    hit = service.record_incident_and_analyze(incident, result.model_copy(update={"incident_id": "inc-456"}))
+
+    assert client.calls.count("esql.query") == 1
+    assert miss["esql"]["values"] == [[2]]
+    assert hit["esql"]["values"] == [[3]]
+
+
+def test_refresh_policy_is_validated_from_env(monkeypatch) -> None:
+    import pytest
+
+    monkeypatch.setenv("ELASTIC_REFRESH", "sometimes")
+
+    with pytest.raises(ValueError):
+        Settings.from_env()
+
+
+def test_analytics_cache_is_updated_incrementally_by_own_writes() -> None:
+    service = ElasticsearchService(make_settings())
+    client = FakeElasticsearchClient()
+    service.client = client
+    incident, result = make_incident_and_result()
+    service.record_incident_and_analyze(incident, result)
+    client.calls.clear()
+
+    second = service.record_incident_and_analyze(
+        incident, result.model_copy(update={"incident_id": "inc-456"})
+    )
+
+    assert "search" not in client.calls
+    assert "esql.query" not in client.calls
+    assert second["search"]["latest_incident_ids"] == ["inc-456", "inc-1"]
+    assert second["esql"]["values"] == [[2]]
+    stats = service.analytics_cache.stats()
+    assert stats["hits"] == 2
+    assert stats["updates"] == 2
+
+
+def test_breaker_fails_fast_while_elastic_is_down() -> None:
+    from dataclasses import replace
+
+    settings = replace(make_settings(), breaker_failure_threshold=2, breaker_reset_seconds=60)
+    service = ElasticsearchService(settings)
+    service.client = FakeElasticsearchClient(ping_ok=False)
+    incident, result = make_incident_and_result()
+
+    for _ in range(2):
+        assert service.record_incident_and_analyze(incident, result)["phase"] == "ping"
+    service._health = None
+    service.client.calls.clear()
+
+    response = service.record_incident_and_analyze(incident, result)
+
+    assert response["status"] == "error"
+    assert response["reason"] == "circuit_open"
+    assert service.client.calls == []
+    assert service.breaker.stats()["trips"] == 1
+
+
+def test_timeouts_count_against_the_breaker_without_retrying() -> None:
+    from dataclasses import replace
+
+    from elastic_transport import ConnectionError, ConnectionTimeout
+
+    class FlakyIndexClient(FakeElasticsearchClient):
+        def __init__(self, exc: Exception) -> None:
+            super().__init__()
+            self.exc = exc
+
+        def index(self, index, id, document, refresh):
+            self.calls.append("index")
+            raise self.exc
+
+    settings = replace(make_settings(), retry_max_attempts=3, retry_base_delay_ms=1, retry_max_delay_ms=1)
+    incident, result = make_incident_and_result()
+    reports = {}
+    for name, exc in (("timeout", ConnectionTimeout("read timed out")), ("refused", ConnectionError("refused"))):
+        service = ElasticsearchService(settings)
+        service.client = FlakyIndexClient(exc)
+        reports[name] = (service.record_incident_and_analyze(incident, result), service)
+
+    timeout_report, timeout_service = reports["timeout"]
+    refused_report, refused_service = reports["refused"]
+    assert timeout_report["phase"] == refused_report["phase"] == "index_document"
+    assert timeout_service.client.calls.count("index") == 1
+    assert refused_service.client.calls.count("index") == 3
+    assert timeout_service.breaker.stats()["consecutive_failures"] == 1
+    assert refused_service.breaker.stats()["consecutive_failures"] == 1
+
+
+class FakeDiagnosisClient:
+    def __init__(self, *, slow_phase: str | None = None) -> None:
+        self.slow_phase = slow_phase
+        self.requests: list[dict] = []
+        self.esql = self
+
+    def options(self, request_timeout=None):
+        return self
+
+    def query(self, query, params, columnar):
+        import time
+
+        self.requests.append({"query": query, "params": params, "columnar": columnar})
+        if query.startswith("FROM logs-*"):
+            if self.slow_phase == "log_correlation":
+                time.sleep(0.3)
+            return {
+                "columns": [
+                    {"name": "errors", "type": "long"},
+                    {"name": "warnings", "type": "long"},
+                    {"name": "host", "type": "keyword"},
+                ],
+                "values": [[40, 7, 0], [3, 1, 9], ["web-1", "web-2", "web-3"]],
+            }
+        return {"columns": [{"name": "p95", "type": "double"}], "values": [[2310.5]]}
+
+
+def test_diagnosis_queries_run_columnar_and_rank_hosts() -> None:
+    service = ElasticsearchService(make_settings())
+    service.client = FakeDiagnosisClient()
+
+    report = service.run_diagnosis_queries("checkout-api")
+
+    assert report["status"] == "ok"
+    assert report["top_hosts"] == [
+        {"host": "web-1", "errors": 40, "warnings": 3},
+        {"host": "web-2", "errors": 7, "warnings": 1},
+    ]
+    assert report["p95_latency_ms"] == 2310.5
+    assert report["error_concentration"] == 1.0
+    assert report["log_correlation"]["values"][2] == ["web-1", "web-2", "web-3"]
+    assert all(request["columnar"] and request["params"] == ["checkout-api"] for request in service.client.requests)
+    assert service.run_diagnosis_queries("checkout-api")["cached"] is True
+
+
+def test_diagnosis_queries_respect_time_budget() -> None:
+    from dataclasses import replace
+
+    service = ElasticsearchService(replace(make_settings(), diagnosis_esql_budget_ms=50))
+    service.client = FakeDiagnosisClient(slow_phase="log_correlation")
+
+    report = service.run_diagnosis_queries("checkout-api")
+
+    assert report["status"] == "partial"
+    assert report["errors"] == {"log_correlation": "timeout"}
+    assert report["top_hosts"] == []
+    assert report["p95_latency_ms"] == 2310.5
+    assert report["duration_ms"] < 250
+    assert service.breaker.stats()["consecutive_failures"] == 1
+    assert service.read_pool_stats()["stuck_diagnosis_queries"] == 1
+
+
+def test_stuck_diagnosis_threads_are_released_when_their_query_returns() -> None:
+    import time
+    from dataclasses import replace
+
+    service = ElasticsearchService(replace(make_settings(), diagnosis_esql_budget_ms=50))
+    service.client = FakeDiagnosisClient(slow_phase="log_correlation")
+
+    service.run_diagnosis_queries("checkout-api")
+    time.sleep(0.4)
+
+    assert service.read_pool_stats()["stuck_diagnosis_queries"] == 0
+
+
+def test_bump_occurrences_sends_scripted_updates(monkeypatch) -> None:
+    import app.elasticsearch_client as elasticsearch_module
+
+    service = ElasticsearchService(make_settings())
+    service.client = FakeElasticsearchClient()
+    captured: list = []
+
+    def fake_streaming_bulk(client, actions, chunk_size, **kwargs):
+        captured.extend(actions)
+        yield True, {"update": {"_id": "inc-123", "result": "updated", "status": 200}}
+        yield False, {
+            "update": {
+                "_id": "inc-456",
+                "status": 404,
+                "error": {"type": "document_missing_exception", "reason": "missing"},
+            }
+        }
+
+    monkeypatch.setattr(elasticsearch_module.helpers, "streaming_bulk", fake_streaming_bulk)
+
+    response = service.bump_occurrences({"inc-123": 3, "inc-456": 1})
+
+    assert [action["_op_type"] for action in captured] == ["update", "update"]
+    assert captured[0]["script"]["params"]["count"] == 3
+    assert captured[0]["retry_on_conflict"] == 3
+    assert response["status"] == "partial"
+    assert response["updated"] == 1
+    assert response["errors"][0]["error"] == "document_missing_exception: missing"
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import math
+from array import array
+
+import pytest
+
+from app.esql_frame import EsqlFrame
+
+COLUMNS = [
+    {"name": "errors", "type": "long"},
+    {"name": "latency_ms", "type": "double"},
+    {"name": "host", "type": "keyword"},
+]
+
+
+def make_frame() -> EsqlFrame:
+    return EsqlFrame.from_response(
+        {
+            "columns": COLUMNS,
+            "values": [[5, 40, 0, 12], [120.0, None, 80.0, 300.0], ["web-1", "web-2", "web-3", "web-4"]],
+        }
+    )
+
+
+def test_numeric_columns_are_typed_arrays() -> None:
+    frame = make_frame()
+
+    assert isinstance(frame.column("errors"), array)
+    assert frame.column("errors").typecode == "q"
+    assert frame.column("latency_ms").typecode == "d"
+    assert math.isnan(frame.column("latency_ms")[1])
+    assert frame.column("host") == ["web-1", "web-2", "web-3", "web-4"]
+    assert len(frame) == 4
+
+
+def test_row_layout_decodes_to_same_columns() -> None:
+    rows = EsqlFrame.from_response(
+        {"columns": COLUMNS, "values": [[5, 120.0, "web-1"], [40, None, "web-2"]]},
+        columnar=False,
+    )
+
+    assert list(rows.column("errors")) == [5, 40]
+    assert rows.column("host") == ["web-1", "web-2"]
+
+
+def test_top_k_percentile_and_ratio() -> None:
+    frame = make_frame()
+
+    top = frame.top_k("errors", 2)
+    assert [row["host"] for row in top.rows()] == ["web-2", "web-4"]
+    assert [row["host"] for row in frame.top_k("latency_ms", 3).rows()] == ["web-4", "web-1", "web-3"]
+
+    assert frame.percentile("latency_ms", 50) == pytest.approx(120.0)
+    assert frame.percentile("errors", 100) == 40
+    assert frame.ratio("errors", "errors") == 1.0
+    assert frame.sum("latency_ms") == 500.0
+
+
+def test_compact_json_is_columnar_with_nulls() -> None:
+    payload = make_frame().to_json()
+
+    assert payload["columns"] == COLUMNS
+    assert payload["values"][1] == [120.0, None, 80.0, 300.0]
+
+
+def test_mismatched_column_lengths_are_rejected() -> None:
+    with pytest.raises(ValueError):
+        EsqlFrame({"a": [1, 2], "b": [1]}, {"a": "long", "b": "long"})
@@ -1,8 +1,5 @@
 from __future__ import annotations
 
-import io
-from urllib.error import HTTPError
-
 from app.agent_builder_client import AgentBuilderService
 from app.config import Settings
 from app.elasticsearch_client import ElasticsearchService
@@ -26,6 +23,19 @@ def _settings(**overrides) -> Settings:
     return Settings(**base)
 
 
+class _Pool:
+    def __init__(self, *, status: int, reason: str = "", data: bytes = b"", expect_timeout: int | None = None):
+        self.status = status
+        self.reason = reason
+        self.data = data
+        self.expect_timeout = expect_timeout
+
+    def request(self, method, url, body=None, headers=None, timeout=None, pool_timeout=None):
+        if self.expect_timeout is not None:
+            assert timeout == self.expect_timeout
+        return self
+
+
 def _incident() -> IncidentInput:
     return IncidentInput(
         service="checkout-api",
@@ -115,7 +125,7 @@ def test_agent_builder_invalid_base_url_reported() -> None:
     assert report["integration_path"] == "/api/incident/execute"
 
 
-def test_agent_builder_http_error_body_truncated(monkeypatch) -> None:
+def test_agent_builder_http_error_body_truncated() -> None:
     settings = _settings(
         agent_builder_base_url="https://agent-builder.example.com",
         agent_builder_api_key="token",
@@ -123,17 +133,7 @@ def test_agent_builder_http_error_body_truncated(monkeypatch) -> None:
     service = AgentBuilderService(settings)
 
     long_body = "x" * 700
-
-    def _fake_urlopen(req, timeout):
-        raise HTTPError(
-            req.full_url,
-            502,
-            "bad gateway",
-            hdrs=None,
-            fp=io.BytesIO(long_body.encode("utf-8")),
-        )
-
-    monkeypatch.setattr("app.agent_builder_client.request.urlopen", _fake_urlopen)
+    service._pool = _Pool(status=502, reason="bad gateway", data=long_body.encode("utf-8"))
 
     report = service.dispatch_incident(_incident(), _result())
 
@@ -144,28 +144,14 @@ def test_agent_builder_http_error_body_truncated(monkeypatch) -> None:
     assert len(report["error_body"]) == 503
 
 
-def test_agent_builder_success_reports_payload_bytes(monkeypatch) -> None:
+def test_agent_builder_success_reports_payload_bytes() -> None:
     settings = _settings(
         agent_builder_base_url="https://agent-builder.example.com",
         agent_builder_api_key="token",
         request_timeout_seconds=13,
     )
     service = AgentBuilderService(settings)
-
-    class _Response:
-        status = 201
-
-        def __enter__(self):
-            return self
-
-        def __exit__(self, exc_type, exc, tb):
-            return None
-
-    def _fake_urlopen(req, timeout):
-        assert timeout == 13
-        return _Response()
-
-    monkeypatch.setattr("app.agent_builder_client.request.urlopen", _fake_urlopen)
+    service._pool = _Pool(status=201, expect_timeout=13)
 
     report = service.dispatch_incident(_incident(), _result())
 
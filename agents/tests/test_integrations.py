@@ -1,7 +1,5 @@
 from __future__ import annotations
 
-from urllib.error import HTTPError
-
 from app.agent_builder_client import AgentBuilderService
 from app.config import Settings
 from app.elasticsearch_client import ElasticsearchService
@@ -140,7 +138,7 @@ def test_elasticsearch_service_skips_when_not_configured() -> None:
     }
 
 
-def test_agent_builder_dispatch_success(monkeypatch) -> None:
+def test_agent_builder_dispatch_success() -> None:
     settings = Settings(
         elastic_cloud_id=None,
         elastic_api_key=None,
@@ -156,26 +154,21 @@ def test_agent_builder_dispatch_success(monkeypatch) -> None:
 
     captured: dict = {}
 
-    class _Response:
+    class _Pool:
         status = 202
-
-        def __enter__(self):
+        reason = "Accepted"
+        data = b""
+
+        def request(self, method, url, body=None, headers=None, timeout=None, pool_timeout=None):
+            lowered = {k.lower(): v for k, v in headers.items()}
+            captured["full_url"] = url
+            captured["timeout"] = timeout
+            captured["auth"] = lowered.get("authorization")
+            captured["content_type"] = lowered.get("content-type")
             return self
 
-        def __exit__(self, exc_type, exc, tb):
-            return None
-
-    def _fake_urlopen(req, timeout):
-        headers = {k.lower(): v for k, v in req.header_items()}
-        captured["full_url"] = req.full_url
-        captured["timeout"] = timeout
-        captured["auth"] = headers.get("authorization")
-        captured["content_type"] = headers.get("content-type")
-        return _Response()
-
-    monkeypatch.setattr("app.agent_builder_client.request.urlopen", _fake_urlopen)
-
     service = AgentBuilderService(settings)
+    service._pool = _Pool()
     report = service.dispatch_incident(_sample_incident(), _sample_result())
 
     assert report["status"] == "ok"
@@ -187,7 +180,7 @@ def test_agent_builder_dispatch_success(monkeypatch) -> None:
     assert captured["content_type"] == "application/json"
 
 
-def test_agent_builder_dispatch_http_error(monkeypatch) -> None:
+def test_agent_builder_dispatch_http_error() -> None:
     settings = Settings(
         elastic_cloud_id=None,
         elastic_api_key=None,
@@ -201,12 +194,16 @@ def test_agent_builder_dispatch_http_error(monkeypatch) -> None:
         request_timeout_seconds=10,
     )
 
-    def _fake_urlopen(req, timeout):
-        raise HTTPError(req.full_url, 503, "service unavailable", hdrs=None, fp=None)
+    class _Pool:
+        status = 503
+        reason = "service unavailable"
+        data = b""
 
-    monkeypatch.setattr("app.agent_builder_client.request.urlopen", _fake_urlopen)
+        def request(self, method, url, body=None, headers=None, timeout=None, pool_timeout=None):
+            return self
 
     service = AgentBuilderService(settings)
+    service._pool = _Pool()
     report = service.dispatch_incident(_sample_incident(), _sample_result())
 
     assert report["status"] == "error"
@@ -1,3 +1,4 @@
+import json
 import uuid
 
 from fastapi.testclient import TestClient
@@ -74,3 +75,91 @@ def test_invalid_incident_payload_rejected() -> None:
 
     response = client.post("/incidents/run", json=invalid_payload)
     assert response.status_code == 422
+
+
+def test_batch_run_returns_result_per_incident() -> None:
+    payload = {
+        "incidents": [
+            {
+                "service": "checkout-api",
+                "severity": "high",
+                "summary": "Latency spikes after deploy",
+                "signals": ["p95 latency > 2.5s"],
+                "recent_deploy_sha": "abc1234",
+            },
+            {
+                "service": "search-api",
+                "severity": "medium",
+                "summary": "Latency regression under traffic surge",
+                "signals": ["queue depth rising"],
+                "recent_deploy_sha": None,
+            },
+        ]
+    }
+
+    response = client.post("/incidents/run:batch", json=payload)
+    assert response.status_code == 200
+
+    body = response.json()
+    assert body["succeeded"] == 2
+    assert body["failed"] == 0
+    assert body["elastic"]["status"] == "skipped"
+    assert [result["service"] for result in body["results"]] == ["checkout-api", "search-api"]
+    assert all(result["elastic"]["reason"] == "elastic_not_configured" for result in body["results"])
+
+
+def test_batch_run_rejects_empty_batch() -> None:
+    response = client.post("/incidents/run:batch", json={"incidents": []})
+    assert response.status_code == 422
+
+
+def test_stream_emits_steps_then_integrations_then_result() -> None:
+    payload = {
+        "service": "checkout-api",
+        "severity": "high",
+        "summary": "Latency spikes after deploy",
+        "signals": ["p95 latency > 2.5s"],
+        "recent_deploy_sha": "abc1234",
+    }
+
+    with client.stream("POST", "/incidents/run/stream", json=payload) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        raw = "".join(response.iter_text())
+
+    events = []
+    for block in raw.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+
+    names = [name for name, _ in events]
+    assert names[:4] == ["step"] * 4
+    assert [data["agent"] for _, data in events[:4]] == ["triage", "diagnosis", "remediation", "communication"]
+    assert sorted(names[4:6]) == ["agent_builder", "elastic"]
+    assert names[6:] == ["result", "done"]
+
+    result = events[6][1]
+    assert result["elastic"]["status"] == "skipped"
+    assert result["agent_builder"]["status"] == "skipped"
+    assert events[7][1] == {"incident_id": result["incident_id"]}
+
+
+def test_stream_reports_workflow_failure_as_error_event(monkeypatch) -> None:
+    import app.main as main_module
+
+    async def failing_run(*_args, **_kwargs):
+        raise RuntimeError("diagnosis exploded")
+
+    monkeypatch.setattr(main_module.workflow, "arun", failing_run)
+    payload = {
+        "service": "checkout-api",
+        "severity": "high",
+        "summary": "Latency spikes after deploy",
+        "signals": ["p95 latency > 2.5s"],
+    }
+
+    with client.stream("POST", "/incidents/run/stream", json=payload) as response:
+        assert response.status_code == 200
+        raw = "".join(response.iter_text())
+
+    assert raw == 'event: error\ndata: {"error":"diagnosis exploded"}\n\n'
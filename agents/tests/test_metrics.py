@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import gc
+import os
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.metrics import Counter, Gauge, Histogram, render_prometheus
+
+
+def test_counter_sums_shards_from_every_thread() -> None:
+    counter = Counter("test_total", "test", labelnames=("status",))
+
+    def work() -> None:
+        for _ in range(1000):
+            counter.inc(status="ok")
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counter.value(status="ok") == 4000
+
+
+def test_gauge_balances_inc_and_dec_across_threads() -> None:
+    gauge = Gauge("test_in_flight", "test")
+    gauge.inc()
+    worker = threading.Thread(target=gauge.dec)
+    worker.start()
+    worker.join()
+
+    assert gauge.value() == 0
+
+
+def test_shards_of_exited_threads_are_folded_into_the_base() -> None:
+    counter = Counter("test_total", "test")
+    histogram = Histogram("test_seconds", "test", buckets=(0.1, 1))
+
+    def work(value: float) -> None:
+        counter.inc()
+        histogram.observe(value)
+
+    for index in range(50):
+        thread = threading.Thread(target=work, args=(2.0 if index == 7 else 0.05,))
+        thread.start()
+        thread.join()
+    gc.collect()
+
+    counts, total, count, maximum = histogram._child({}).totals()
+    assert counter._child({})._shards._live == {}
+    assert histogram._child({})._shards._live == {}
+    assert counter.value() == 50
+    assert counts == [49, 0, 1]
+    assert count == 50
+    assert total == pytest.approx(49 * 0.05 + 2.0)
+    assert maximum == 2.0
+
+
+def test_prometheus_exposition_for_histogram() -> None:
+    histogram = Histogram("test_seconds", "Test latency.", labelnames=("route",), buckets=(0.1, 1))
+    histogram.observe(0.05, route="/incidents/run")
+    histogram.observe(2, route="/incidents/run")
+
+    text = render_prometheus([histogram])
+
+    assert "# TYPE test_seconds histogram" in text
+    assert 'test_seconds_bucket{route="/incidents/run",le="0.1"} 1' in text
+    assert 'test_seconds_bucket{route="/incidents/run",le="+Inf"} 2' in text
+    assert 'test_seconds_sum{route="/incidents/run"} 2.05' in text
+    assert 'test_seconds_count{route="/incidents/run"} 2' in text
+
+
+def test_prometheus_const_labels_follow_series_labels() -> None:
+    histogram = Histogram("test_seconds", "Test latency.", labelnames=("route",), buckets=(0.1,))
+    histogram.observe(0.05, route="/health")
+    gauge = Gauge("test_in_flight", "test")
+    gauge.inc()
+
+    text = render_prometheus([histogram, gauge], const_labels={"worker": 42})
+
+    assert 'test_seconds_bucket{route="/health",worker="42",le="0.1"} 1' in text
+    assert 'test_seconds_count{route="/health",worker="42"} 1' in text
+    assert 'test_in_flight{worker="42"} 1' in text
+
+
+def test_metrics_endpoint_reports_routes_and_outcomes() -> None:
+    client = TestClient(main.app)
+    payload = {
+        "service": "checkout-api",
+        "severity": "high",
+        "summary": "Latency spikes after deploy",
+        "signals": ["p95 latency > 2.5s"],
+        "recent_deploy_sha": "abc1234",
+    }
+    assert client.post("/incidents/run", json=payload).status_code == 200
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    worker = f'worker="{os.getpid()}"'
+    assert f'http_request_duration_seconds_count{{method="POST",route="/incidents/run",status="200",{worker}}}' in text
+    assert f"http_requests_in_flight{{{worker}}}" in text
+    assert f'incident_elastic_outcomes_total{{status="skipped",phase="",reason="elastic_not_configured",{worker}}}' in text
+    assert (
+        "incident_agent_builder_outcomes_total"
+        f'{{status="skipped",phase="dispatch",reason="agent_builder_not_configured",{worker}}}' in text
+    )
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.metrics import Histogram
+from app.profiling import in_current_context, profiled, span
+
+
+def test_spans_reach_active_profile_across_pool_threads() -> None:
+    with profiled() as profile, ThreadPoolExecutor(max_workers=1) as pool:
+        with span("elastic", "ping"):
+            pass
+
+        def search() -> None:
+            with span("elastic", "search_recent"):
+                pass
+
+        pool.submit(in_current_context(search)).result()
+
+    spans = profile.to_dict()["spans"]
+    assert [span["name"] for span in spans] == ["ping", "search_recent"]
+    assert all(span["end_ms"] >= span["start_ms"] for span in spans)
+
+
+def test_span_without_profile_records_histogram_and_error_status() -> None:
+    with profiled(False) as profile:
+        try:
+            with span("elastic", "index_document"):
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+
+    assert profile is None
+    assert main.SPAN_DURATION_MS.snapshot()["elastic/index_document"]["count"] >= 1
+
+
+def test_histogram_summarizes_buckets() -> None:
+    histogram = Histogram("test_ms", "test", labelnames=("name",), buckets=(10, 100))
+    for value in (1, 2, 50, 500):
+        histogram.observe(value, name="ping")
+
+    summary = histogram.snapshot()["ping"]
+    assert summary["count"] == 4
+    assert summary["p50"] == 10
+    assert summary["p95"] == 500
+    assert summary["max"] == 500
+
+
+def test_run_returns_profile_only_when_requested(monkeypatch) -> None:
+    def fake_dispatch(incident, result):
+        with span("agent_builder", "dispatch"):
+            return {"enabled": True, "status": "ok"}
+
+    monkeypatch.setattr(main.agent_builder_service, "dispatch_incident", fake_dispatch)
+    client = TestClient(main.app)
+    payload = {
+        "service": "checkout-api",
+        "severity": "high",
+        "summary": "Latency spikes after deploy",
+        "signals": ["p95 latency > 2.5s"],
+        "recent_deploy_sha": "abc1234",
+    }
+
+    assert client.post("/incidents/run", json=payload).json()["profile"] is None
+
+    body = client.post("/incidents/run?profile=true", json=payload).json()
+    names = [(span["category"], span["name"]) for span in body["profile"]["spans"]]
+    assert names == [
+        ("agent", "triage"),
+        ("agent", "diagnosis"),
+        ("agent", "remediation"),
+        ("agent", "communication"),
+        ("agent_builder", "dispatch"),
+    ]
+    assert all(step["duration_ms"] is not None for step in body["timeline"])
+    assert "agent/triage" in client.get("/stats").json()["latency_ms"]
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import pytest
+
+import app.resilience as resilience_module
+from app.resilience import CircuitBreaker, RetryPolicy, call_with_retry, is_retryable_status
+
+
+def test_only_throttling_and_server_errors_are_retryable() -> None:
+    assert is_retryable_status(429)
+    assert is_retryable_status(503)
+    assert not is_retryable_status(404)
+    assert not is_retryable_status(None)
+
+
+def test_backoff_is_jittered_and_capped(monkeypatch) -> None:
+    monkeypatch.setattr(resilience_module.random, "uniform", lambda low, high: high)
+    policy = RetryPolicy(max_attempts=5, base_delay_seconds=0.1, max_delay_seconds=0.3)
+
+    assert policy.backoff(1) == pytest.approx(0.1)
+    assert policy.backoff(2) == pytest.approx(0.2)
+    assert policy.backoff(4) == pytest.approx(0.3)
+
+
+def test_call_with_retry_stops_after_max_attempts(monkeypatch) -> None:
+    monkeypatch.setattr(resilience_module.time, "sleep", lambda _: None)
+    calls = []
+
+    def flaky() -> str:
+        calls.append(1)
+        raise RuntimeError("unavailable")
+
+    with pytest.raises(RuntimeError):
+        call_with_retry(flaky, RetryPolicy(max_attempts=3), lambda exc: True)
+    assert len(calls) == 3
+
+
+def test_call_with_retry_does_not_retry_final_errors() -> None:
+    calls = []
+
+    def bad_request() -> str:
+        calls.append(1)
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        call_with_retry(bad_request, RetryPolicy(max_attempts=3), lambda exc: False)
+    assert len(calls) == 1
+
+
+def test_breaker_opens_then_lets_a_single_trial_through(monkeypatch) -> None:
+    now = [100.0]
+    monkeypatch.setattr(resilience_module, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker("elasticsearch", failure_threshold=2, reset_timeout_seconds=10)
+
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    now[0] += 11
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+    stats = breaker.stats()
+    assert stats["trips"] == 1
+    assert stats["rejected"] == 2
+
+
+def test_failed_trial_reopens_breaker(monkeypatch) -> None:
+    now = [100.0]
+    monkeypatch.setattr(resilience_module, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker("agent-builder", failure_threshold=1, reset_timeout_seconds=5)
+
+    breaker.record_failure()
+    now[0] += 6
+    assert breaker.allow()
+    breaker.record_failure()
+
+    assert breaker.state == "open"
+    assert breaker.stats()["trips"] == 2
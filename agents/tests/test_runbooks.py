@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+
+from app.agents import IncidentWorkflow
+from app.models import IncidentInput
+from app.runbooks import RunbookCatalog
+
+
+def write_runbooks(path, entries, mtime_ns: int) -> None:
+    path.write_text(json.dumps(entries), encoding="utf-8")
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+RUNBOOKS = [
+    {"id": "rb-1", "service": "checkout-api", "trigger": "latency_after_deploy", "action": "rollback_latest_deploy", "risk": "medium"},
+    {"id": "rb-2", "service": "*", "trigger": "traffic_spike", "action": "scale_service_replicas", "risk": "low"},
+    {"id": "rb-3", "service": "checkout-api", "trigger": "*", "action": "page_checkout_oncall", "risk": "low"},
+    {"id": "rb-dup", "service": "checkout-api", "trigger": "latency_after_deploy", "action": "ignored", "risk": "high"},
+]
+
+
+def test_resolve_prefers_exact_match_then_wildcards(tmp_path) -> None:
+    path = tmp_path / "runbooks.json"
+    write_runbooks(path, RUNBOOKS, 1_000_000_000)
+    catalog = RunbookCatalog(path)
+
+    assert catalog.resolve("checkout-api", "latency_after_deploy").id == "rb-1"
+    assert catalog.resolve("search-api", "traffic_spike").id == "rb-2"
+    assert catalog.resolve("checkout-api", "disk_full").id == "rb-3"
+    assert catalog.resolve("search-api", "disk_full") is None
+    assert catalog.stats()["duplicates"] == 1
+
+
+def test_catalog_hot_reloads_when_file_changes(tmp_path) -> None:
+    path = tmp_path / "runbooks.json"
+    write_runbooks(path, RUNBOOKS[:1], 1_000_000_000)
+    catalog = RunbookCatalog(path, reload_interval_seconds=0)
+    assert catalog.resolve("search-api", "traffic_spike") is None
+
+    write_runbooks(path, RUNBOOKS, 2_000_000_000)
+    assert catalog.resolve("search-api", "traffic_spike") is None
+    assert catalog.reload() is True
+    assert catalog.resolve("search-api", "traffic_spike").id == "rb-2"
+
+    path.write_text("{not json", encoding="utf-8")
+    os.utime(path, ns=(3_000_000_000, 3_000_000_000))
+    assert catalog.reload() is False
+    assert catalog.resolve("search-api", "traffic_spike").id == "rb-2"
+    assert catalog.stats()["last_error"]
+    assert catalog.stats()["reloads"] == 2
+
+
+def test_watcher_reloads_in_the_background(tmp_path) -> None:
+    path = tmp_path / "runbooks.json"
+    write_runbooks(path, RUNBOOKS[:1], 1_000_000_000)
+    catalog = RunbookCatalog(path, reload_interval_seconds=0.01)
+    catalog.start_watcher()
+    try:
+        write_runbooks(path, RUNBOOKS, 2_000_000_000)
+        deadline = time.monotonic() + 2
+        while catalog.stats()["reloads"] < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        catalog.stop_watcher()
+
+    assert catalog.resolve("search-api", "traffic_spike").id == "rb-2"
+
+
+def test_missing_file_leaves_catalog_empty(tmp_path) -> None:
+    catalog = RunbookCatalog(tmp_path / "missing.json")
+
+    assert len(catalog) == 0
+    assert catalog.resolve("checkout-api", "traffic_spike") is None
+
+
+def test_remediation_uses_catalog_and_falls_back_to_severity(tmp_path) -> None:
+    path = tmp_path / "runbooks.json"
+    write_runbooks(path, RUNBOOKS[:1] + [RUNBOOKS[2]], 1_000_000_000)
+    workflow = IncidentWorkflow(runbooks=RunbookCatalog(path))
+
+    checkout = workflow.run(
+        IncidentInput(service="checkout-api", severity="medium", summary="Queue depth rising")
+    )
+    remediation = checkout.timeline[2].output
+    assert remediation["runbook_action"] == "page_checkout_oncall"
+    assert remediation["runbook_id"] == "rb-3"
+
+    payments = workflow.run(
+        IncidentInput(service="payments-api", severity="high", summary="Errors after release", recent_deploy_sha="d34db33f")
+    )
+    remediation = payments.timeline[2].output
+    assert remediation["runbook_action"] == "rollback_latest_deploy"
+    assert remediation["risk"] == "medium"
+    assert remediation["runbook_id"] is None
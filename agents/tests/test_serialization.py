@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import json
+from datetime import UTC, datetime
+
+from app.agents import IncidentWorkflow
+from app.models import IncidentInput
+from app.serialization import agent_builder_batch_body, agent_builder_body, dumps, result_json, workflow_json
+
+
+def _run() -> tuple:
+    incident = IncidentInput(
+        service="checkout-api",
+        severity="high",
+        summary="Latency spikes after deploy",
+        signals=["p95 latency > 2.5s", "error rate 7%"],
+        recent_deploy_sha="abc1234",
+    )
+    workflow = IncidentWorkflow()
+    try:
+        result = workflow.run(incident)
+    finally:
+        workflow.close()
+    result.elastic = {"enabled": True, "status": "ok", "duration_ms": 1.25}
+    result.agent_builder = {"enabled": False, "status": "skipped"}
+    return incident, result
+
+
+def test_result_json_matches_model_dump_json() -> None:
+    _, result = _run()
+
+    spliced = json.loads(result_json(result))
+    reference = json.loads(result.model_dump_json())
+
+    assert spliced == reference
+    assert list(spliced) == list(reference)
+
+
+def test_workflow_json_is_serialized_once_and_excludes_integrations() -> None:
+    _, result = _run()
+
+    first = workflow_json(result)
+    result.profile = {"total_ms": 3.0}
+
+    assert workflow_json(result) is first
+    assert not {"elastic", "agent_builder", "profile", "dedup"} & set(json.loads(first))
+    assert json.loads(result_json(result))["profile"] == {"total_ms": 3.0}
+
+
+def test_agent_builder_bodies_match_the_dict_payload() -> None:
+    incident, result = _run()
+    expected = {
+        "incident": incident.model_dump(),
+        "workflow": result.model_dump(exclude={"elastic", "agent_builder", "profile", "dedup"}),
+    }
+
+    assert json.loads(agent_builder_body(incident, result)) == expected
+    assert json.loads(agent_builder_batch_body([(incident, result)] * 2)) == {"incidents": [expected, expected]}
+
+
+def test_dumps_handles_datetimes_and_falls_back_to_str() -> None:
+    class Opaque:
+        def __str__(self) -> str:
+            return "opaque"
+
+    stamp = datetime(2026, 1, 2, tzinfo=UTC)
+
+    decoded = json.loads(dumps({"at": stamp, "value": Opaque()}))
+
+    assert decoded["at"].startswith("2026-01-02T00:00:00")
+    assert decoded["value"] == "opaque"
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import app.server as server
+from app.server import APP_IMPORT_PATH, ServerConfig, uvicorn_options
+
+
+def test_server_config_defaults_to_one_worker_per_available_core(monkeypatch) -> None:
+    for name in ("SERVER_WORKERS", "SERVER_BACKLOG", "SERVER_LIMIT_CONCURRENCY", "PORT"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr(server, "available_cpus", lambda: 16)
+
+    config = ServerConfig.from_env()
+
+    assert config.workers == 16
+    assert config.port == 8000
+    assert config.backlog == 2048
+    assert config.limit_concurrency is None
+
+
+def test_server_config_reads_tuning_from_env(monkeypatch) -> None:
+    monkeypatch.setenv("SERVER_WORKERS", "4")
+    monkeypatch.setenv("SERVER_BACKLOG", "4096")
+    monkeypatch.setenv("SERVER_KEEPALIVE_SECONDS", "75")
+    monkeypatch.setenv("SERVER_GRACEFUL_TIMEOUT_SECONDS", "45")
+    monkeypatch.setenv("SERVER_LIMIT_CONCURRENCY", "512")
+    monkeypatch.setenv("PORT", "9000")
+
+    options = uvicorn_options(ServerConfig.from_env())
+
+    assert options["workers"] == 4
+    assert options["backlog"] == 4096
+    assert options["timeout_keep_alive"] == 75
+    assert options["timeout_graceful_shutdown"] == 45
+    assert options["limit_concurrency"] == 512
+    assert options["port"] == 9000
+    assert options["lifespan"] == "on"
+    assert "limit_max_requests_jitter" not in options
+
+
+def test_uvicorn_options_prefer_uvloop_and_httptools_when_installed(monkeypatch) -> None:
+    monkeypatch.setattr(server.importlib.util, "find_spec", lambda name: object())
+    options = uvicorn_options(ServerConfig())
+    assert (options["loop"], options["http"]) == ("uvloop", "httptools")
+
+    monkeypatch.setattr(server.importlib.util, "find_spec", lambda name: None)
+    options = uvicorn_options(ServerConfig())
+    assert (options["loop"], options["http"]) == ("asyncio", "h11")
+
+
+def test_main_passes_the_app_as_an_import_string(monkeypatch) -> None:
+    import uvicorn
+
+    calls: list = []
+    monkeypatch.setenv("SERVER_WORKERS", "2")
+    monkeypatch.setattr(uvicorn, "run", lambda app, **options: calls.append((app, options)))
+
+    server.main()
+
+    # Workers import the app themselves, so no client built in the supervisor crosses a fork.
+    assert calls[0][0] == APP_IMPORT_PATH
+    assert calls[0][1]["workers"] == 2
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import pytest
+
+from app.agents import IncidentWorkflow, TriageAgent
+from app.models import IncidentInput
+from app.signals import parse_signal, score_suspects
+
+
+@pytest.mark.parametrize(
+    ("raw", "metric", "family", "operator", "value", "unit"),
+    [
+        ("p95 latency > 2.5s", "p95_latency", "latency", ">", 2500.0, "ms"),
+        ("error rate 7%", "error_rate", "error_rate", "=", 7.0, "%"),
+        ("5xx > 8%", "5xx", "error_rate", ">", 8.0, "%"),
+        ("queue depth rising", "queue_depth", "saturation", "rising", None, None),
+        ("checkout failures", "checkout", "error_rate", "failures", None, None),
+        ("pager fired twice", "pager_fired_twice", "other", None, None, None),
+    ],
+)
+def test_parse_signal(raw, metric, family, operator, value, unit) -> None:
+    signal = parse_signal(raw)
+
+    assert (signal.metric, signal.family, signal.operator, signal.value, signal.unit) == (
+        metric,
+        family,
+        operator,
+        value,
+        unit,
+    )
+
+
+def test_scores_follow_signal_evidence() -> None:
+    deploy, traffic = score_suspects(
+        [[parse_signal("5xx > 8%")], [parse_signal("traffic 3x"), parse_signal("cpu 85%")]],
+        [True, False],
+    )
+
+    assert deploy["recent_deploy"] > deploy["traffic_spike"]
+    assert traffic["traffic_spike"] == pytest.approx(1.3)
+    assert traffic["recent_deploy"] == 0.0
+
+
+def test_triage_keeps_suspects_and_derives_confidence_from_signals() -> None:
+    quiet, noisy = TriageAgent().run_batch(
+        [
+            IncidentInput(service="search-api", severity="low", summary="Minor blip observed"),
+            IncidentInput(
+                service="search-api",
+                severity="low",
+                summary="Traffic surge",
+                signals=["traffic 3x", "queue depth rising"],
+            ),
+        ]
+    )
+
+    assert quiet.output["suspects"] == noisy.output["suspects"] == ["traffic_spike"]
+    assert quiet.output["confidence"] == "low"
+    assert noisy.output["confidence"] == "high"
+    assert [signal["family"] for signal in noisy.output["signals"]] == ["traffic", "saturation"]
+
+
+def test_triage_picks_the_best_scoring_suspect_without_a_deploy() -> None:
+    (step,) = TriageAgent().run_batch(
+        [
+            IncidentInput(
+                service="checkout-api",
+                severity="critical",
+                summary="Checkout errors",
+                signals=["error rate 12%", "5xx > 8%"],
+            )
+        ]
+    )
+
+    assert step.output["suspect_scores"] == {"recent_deploy": 1.2, "traffic_spike": 0.0}
+    assert step.output["suspects"] == ["recent_deploy"]
+    assert step.output["confidence"] == "high"
+
+
+def test_run_many_matches_individual_runs() -> None:
+    workflow = IncidentWorkflow()
+    incidents = [
+        IncidentInput(service="checkout-api", severity="high", summary="Errors after deploy", recent_deploy_sha="abc1234"),
+        IncidentInput(service="search-api", severity="medium", summary="Traffic surge", signals=["cpu 85%"]),
+    ]
+
+    batched = workflow.run_many(incidents)
+    single = [workflow.run(incident) for incident in incidents]
+
+    for left, right in zip(batched, single):
+        assert [step.output for step in left.timeline] == [step.output for step in right.timeline]
+        assert left.timeline[0].duration_ms is not None
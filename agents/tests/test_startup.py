@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from app.config import Settings
+from app.async_elasticsearch_client import AsyncElasticsearchService
+from app.elasticsearch_client import BaseElasticsearchService, ElasticsearchService
+from app.models import IncidentInput, IncidentRunResult
+
+AGENTS_DIR = Path(__file__).resolve().parents[1]
+CLIENT_LIBRARIES = ("elasticsearch", "elastic_transport", "aiohttp", "urllib3")
+
+
+def _settings(**overrides) -> Settings:
+    base = {
+        "elastic_cloud_id": None,
+        "elastic_api_key": "api-key",
+        "elastic_url": "http://localhost:9200",
+        "incidents_index": "incidents-logs",
+        "logs_index_pattern": "logs-*",
+        "metrics_index_pattern": "metrics-*",
+        "agent_builder_base_url": None,
+        "agent_builder_api_key": None,
+        "agent_builder_route": "/api/incident/execute",
+        "request_timeout_seconds": 5,
+    }
+    base.update(overrides)
+    return Settings(**base)
+
+
+def test_importing_the_app_does_not_load_client_libraries() -> None:
+    code = f"import json, sys, app.main; print(json.dumps([m for m in {CLIENT_LIBRARIES!r} if m in sys.modules]))"
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=AGENTS_DIR,
+        env={**os.environ, "ELASTIC_URL": "http://localhost:9200", "ELASTIC_API_KEY": "api-key"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert json.loads(completed.stdout) == []
+
+
+def test_client_is_built_on_first_use_and_rebuilt_after_close() -> None:
+    service = ElasticsearchService(_settings())
+    assert service.client_built is False
+
+    first = service.client
+    assert service.client_built is True
+    assert service.client is first
+
+    service.close()
+    assert service.client_built is False
+    assert service.client is not first
+
+
+def test_malformed_cloud_id_is_reported_instead_of_raising() -> None:
+    service = ElasticsearchService(_settings(elastic_cloud_id="cluster:not-base64", elastic_url=None))
+    incident = IncidentInput(service="checkout-api", severity="high", summary="Latency spikes after deploy")
+    result = IncidentRunResult(
+        incident_id="inc-1",
+        service="checkout-api",
+        severity="high",
+        status="investigating",
+        timeline=[],
+        recommendation="Rollback and verify",
+        stakeholder_update="Investigating",
+    )
+
+    report = service.record_incident_and_analyze(incident, result)
+
+    assert report["status"] == "error"
+    assert report["reason"] == "elastic_client_error"
+    assert service.warm_up(4)["status"] == "error"
+
+
+def test_lifespan_restart_reopens_background_queues() -> None:
+    import app.main as main
+
+    with TestClient(main.app):
+        pass
+    assert main.write_behind.stats()["closed"] is True
+
+    with TestClient(main.app):
+        assert main.write_behind.stats()["closed"] is False
+        assert main.deduplicator.stats()["bumps"]["closed"] is False
+        assert main.dispatch_tracker._closed is False
+
+
+def test_lifespan_reports_warmup_and_leaves_services_reusable() -> None:
+    import app.main as main
+
+    with TestClient(main.app) as client:
+        warmup = client.get("/stats").json()["warmup"]
+
+    assert warmup["elasticsearch"] == {"status": "skipped"}
+    assert warmup["agent_builder"] == {"status": "skipped"}
+    response = TestClient(main.app).post(
+        "/incidents/run",
+        json={"service": "checkout-api", "severity": "low", "summary": "Queue depth rising"},
+    )
+    assert response.status_code == 200
+
+
+class _CountingIndices:
+    def __init__(self, calls: list[str]) -> None:
+        self.calls = calls
+
+    def create(self, index, mappings):
+        self.calls.append("indices.create")
+        return {"acknowledged": True, "index": index}
+
+
+class _CountingClient:
+    def __init__(self, calls: list[str]) -> None:
+        self.calls = calls
+        self.indices = _CountingIndices(calls)
+
+    def ping(self):
+        self.calls.append("ping")
+        return True
+
+    def options(self, ignore_status):
+        return self
+
+    def close(self):
+        pass
+
+
+class _AsyncCountingIndices(_CountingIndices):
+    async def create(self, index, mappings):
+        return super().create(index, mappings)
+
+
+class _AsyncCountingClient(_CountingClient):
+    def __init__(self, calls: list[str]) -> None:
+        super().__init__(calls)
+        self.indices = _AsyncCountingIndices(calls)
+
+    async def ping(self):
+        return super().ping()
+
+
+def test_base_service_requires_a_client_builder() -> None:
+    try:
+        BaseElasticsearchService(_settings())
+    except TypeError as exc:
+        assert "_build_client" in str(exc)
+    else:
+        raise AssertionError("BaseElasticsearchService should be abstract")
+
+
+def test_warm_up_bootstraps_the_shared_index_once(monkeypatch) -> None:
+    import app.main as main
+
+    calls: list[str] = []
+    sync_service = ElasticsearchService(_settings())
+    sync_service.client = _CountingClient(calls)
+    async_service = AsyncElasticsearchService(_settings())
+    async_service.client = _AsyncCountingClient(calls)
+    monkeypatch.setattr(main, "elastic_service", sync_service)
+    monkeypatch.setattr(main, "async_elastic_service", async_service)
+
+    report = asyncio.run(main.warm_up_clients())
+    index_ready = sync_service.index_ready
+    sync_service.close()
+
+    assert calls.count("indices.create") == 1
+    assert report["elasticsearch"]["index_ready"] is True
+    assert index_ready is True
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from app.batching import MicroBatcher
+from app.config import Settings
+from app.models import IncidentInput, IncidentRunResult
+from app.write_behind import IncidentWriteBehind
+
+
+def _settings(**overrides) -> Settings:
+    base = {
+        "elastic_cloud_id": None,
+        "elastic_api_key": "secret",
+        "elastic_url": "http://localhost:9200",
+        "incidents_index": "incidents-logs",
+        "logs_index_pattern": "logs-*",
+        "metrics_index_pattern": "metrics-*",
+        "agent_builder_base_url": None,
+        "agent_builder_api_key": None,
+        "agent_builder_route": "/api/incident/execute",
+        "request_timeout_seconds": 5,
+        "elastic_write_mode": "write_behind",
+        "write_behind_batch_size": 2,
+        "write_behind_flush_ms": 20,
+    }
+    base.update(overrides)
+    return Settings(**base)
+
+
+def _pair(incident_id: str) -> tuple[IncidentInput, IncidentRunResult]:
+    incident = IncidentInput(
+        service="checkout-api",
+        severity="high",
+        summary="Latency spikes after deploy",
+    )
+    result = IncidentRunResult(
+        incident_id=incident_id,
+        service="checkout-api",
+        severity="high",
+        status="investigating",
+        timeline=[],
+        recommendation="Rollback and verify",
+        stakeholder_update="Investigating",
+    )
+    return incident, result
+
+
+class _FakeElasticService:
+    def __init__(self) -> None:
+        self.client = object()
+        self.batches: list[list[str]] = []
+
+    def record_incidents_bulk(self, pairs):
+        self.batches.append([result.incident_id for _, result in pairs])
+        return {"status": "ok", "indexed": len(pairs), "failed": 0, "items": []}
+
+
+def test_micro_batcher_flushes_by_size_and_drains_on_stop() -> None:
+    flushed: list[list[int]] = []
+    batcher = MicroBatcher(
+        flushed.append,
+        name="test-batcher",
+        max_queue=10,
+        batch_size=2,
+        flush_interval_ms=1000,
+        enqueue_timeout_ms=0,
+    )
+
+    for value in range(5):
+        assert batcher.submit(value) is True
+    batcher.stop(timeout=2)
+
+    assert [value for batch in flushed for value in batch] == [0, 1, 2, 3, 4]
+    assert max(len(batch) for batch in flushed) == 2
+    stats = batcher.stats()
+    assert stats["enqueued"] == 5
+    assert stats["flushed"] == 5
+    assert stats["queue_depth"] == 0
+
+
+def test_micro_batcher_drops_when_queue_stays_full() -> None:
+    release = threading.Event()
+    batcher = MicroBatcher(
+        lambda batch: release.wait(2),
+        name="test-batcher",
+        max_queue=1,
+        batch_size=1,
+        flush_interval_ms=0,
+        enqueue_timeout_ms=10,
+    )
+
+    batcher.submit(1)
+    time.sleep(0.05)  # worker picks up the first item and blocks in flush
+    batcher.submit(2)
+    accepted = batcher.submit(3)
+    release.set()
+    batcher.stop(timeout=2)
+
+    assert accepted is False
+    assert batcher.stats()["dropped"] == 1
+
+
+def test_write_behind_returns_queued_and_flushes_in_batches() -> None:
+    elastic_service = _FakeElasticService()
+    write_behind = IncidentWriteBehind(_settings(), elastic_service)
+
+    reports = [write_behind.submit(*_pair(f"inc-{n}")) for n in range(3)]
+    write_behind.stop(timeout=2)
+
+    assert all(report["status"] == "queued" for report in reports)
+    assert [incident_id for batch in elastic_service.batches for incident_id in batch] == [
+        "inc-0",
+        "inc-1",
+        "inc-2",
+    ]
+    stats = write_behind.stats()
+    assert stats["flushed"] == 3
+    assert stats["failed_items"] == 0
+
+
+def test_write_behind_accepts_writes_again_after_start() -> None:
+    elastic_service = _FakeElasticService()
+    write_behind = IncidentWriteBehind(_settings(), elastic_service)
+    write_behind.stop(timeout=2)
+    write_behind.start()
+
+    report = write_behind.submit(*_pair("inc-restart"))
+    write_behind.stop(timeout=2)
+
+    assert report["status"] == "queued"
+    assert elastic_service.batches == [["inc-restart"]]
+
+
+def test_write_behind_disabled_in_sync_mode() -> None:
+    write_behind = IncidentWriteBehind(_settings(elastic_write_mode="sync"), _FakeElasticService())
+
+    assert write_behind.enabled is False
+
+
+def test_micro_batcher_rejects_submits_after_stop_until_restarted() -> None:
+    flushed: list[int] = []
+    batcher = MicroBatcher(
+        flushed.extend,
+        name="test-batcher",
+        max_queue=10,
+        batch_size=10,
+        flush_interval_ms=0,
+        enqueue_timeout_ms=0,
+    )
+
+    batcher.submit(1)
+    batcher.stop(timeout=2)
+
+    assert batcher.submit(2) is False
+    assert batcher.running is False
+    assert batcher.stats()["rejected"] == 1
+
+    batcher.start()
+    assert batcher.submit(3) is True
+    batcher.stop(timeout=2)
+    assert flushed == [1, 3]
+
+
+def test_micro_batcher_stop_timeout_leaves_drain_to_the_worker() -> None:
+    release = threading.Event()
+    flushing_threads: list[str] = []
+
+    def slow_flush(batch: list[int]) -> None:
+        flushing_threads.append(threading.current_thread().name)
+        release.wait(2)
+
+    batcher = MicroBatcher(
+        slow_flush,
+        name="test-batcher",
+        max_queue=10,
+        batch_size=1,
+        flush_interval_ms=0,
+        enqueue_timeout_ms=0,
+    )
+
+    batcher.submit(1)
+    time.sleep(0.05)  # worker is blocked flushing the first item
+    batcher.submit(2)
+    batcher.stop(timeout=0.05)
+
+    assert batcher.running is True
+    assert batcher.depth == 1
+    release.set()
+    batcher.stop(timeout=2)
+    assert flushing_threads == ["test-batcher", "test-batcher"]
@@ -2,12 +2,102 @@ const form = document.getElementById('incident-form');
 const output = document.getElementById('output');
 
 const LOCAL_ENDPOINT = 'http://localhost:8000/incidents/run';
+const LOCAL_STREAM_ENDPOINT = 'http://localhost:8000/incidents/run/stream';
 const VERCEL_FALLBACK_ENDPOINT = '/api/incidents/run';
 
 const RUN_ENDPOINT =
   window.INCIDENT_RUN_ENDPOINT ||
   (window.location.hostname === 'localhost' ? LOCAL_ENDPOINT : VERCEL_FALLBACK_ENDPOINT);
 
+// The Vercel proxy buffers responses, so streaming is only used against the backend directly.
+const STREAM_ENDPOINT =
+  window.INCIDENT_STREAM_ENDPOINT ||
+  (window.location.hostname === 'localhost' ? LOCAL_STREAM_ENDPOINT : null);
+
+function render(view) {
+  output.textContent = JSON.stringify(view, null, 2);
+}
+
+function parseEvent(block) {
+  let event = 'message';
+  const data = [];
+  for (const line of block.split('\n')) {
+    if (line.startsWith('event:')) {
+      event = line.slice(6).trim();
+    } else if (line.startsWith('data:')) {
+      data.push(line.slice(5).trim());
+    }
+  }
+  return { event, data: data.length ? JSON.parse(data.join('\n')) : null };
+}
+
+function applyEvent(view, { event, data }) {
+  switch (event) {
+    case 'step':
+      view.timeline.push(data);
+      return view;
+    case 'elastic':
+    case 'agent_builder':
+      view[event] = data;
+      return view;
+    case 'result':
+      return data;
+    case 'error':
+      throw new Error(data?.error || 'stream failed');
+    default:
+      return view;
+  }
+}
+
+async function runStreaming(payload) {
+  const res = await fetch(STREAM_ENDPOINT, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json', Accept: 'text/event-stream' },
+    body: JSON.stringify(payload),
+  });
+
+  if (!res.ok || !res.body) {
+    throw new Error(`API failed: ${res.status}`);
+  }
+
+  let view = { status: 'running', timeline: [], elastic: 'pending', agent_builder: 'pending' };
+  render(view);
+
+  const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = '';
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) {
+      break;
+    }
+    buffer += value;
+
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      if (block.trim()) {
+        view = applyEvent(view, parseEvent(block));
+        render(view);
+      }
+    }
+  }
+}
+
+async function runBuffered(payload) {
+  const res = await fetch(RUN_ENDPOINT, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(payload),
+  });
+
+  if (!res.ok) {
+    throw new Error(`API failed: ${res.status}`);
+  }
+
+  render(await res.json());
+}
+
 form.addEventListener('submit', async (e) => {
   e.preventDefault();
   output.textContent = 'Running workflow...';
@@ -25,18 +115,11 @@ form.addEventListener('submit', async (e) => {
   };
 
   try {
-    const res = await fetch(RUN_ENDPOINT, {
-      method: 'POST',
-      headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify(payload),
-    });
-
-    if (!res.ok) {
-      throw new Error(`API failed: ${res.status}`);
+    if (STREAM_ENDPOINT && window.TextDecoderStream) {
+      await runStreaming(payload);
+    } else {
+      await runBuffered(payload);
     }
-
-    const data = await res.json();
-    output.textContent = JSON.stringify(data, null, 2);
   } catch (err) {
     output.textContent = `Error: ${err.message}`;
   }
@@ -1,31 +1,161 @@
-"""Run a deterministic incident scenario against local API."""
+"""Run a deterministic incident scenario against local API.
+
+With no options, one incident is posted and the response is printed. With ``--rps`` the
+script becomes an open-loop load generator: requests are scheduled at a fixed rate for
+``--duration`` seconds across ``--concurrency`` workers, and latency percentiles are
+reported at the end. ``--local`` starts the API in-process against the fake
+Elasticsearch and Agent Builder servers from ``agents/benchmarks``, so no network or
+credentials are needed.
+"""
 
 from __future__ import annotations
 
+import argparse
 import json
+import os
+import statistics
+import sys
+import threading
+import time
+import urllib.error
 import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from typing import Iterator
 
+AGENTS_DIR = Path(__file__).resolve().parents[1] / "agents"
 
-def main() -> None:
-    payload = {
-        "service": "checkout-api",
-        "severity": "high",
-        "summary": "Latency spikes after deploy",
-        "signals": ["p95 latency > 2.5s", "error rate 7%"],
-        "recent_deploy_sha": "abc1234",
-    }
+PAYLOAD = {
+    "service": "checkout-api",
+    "severity": "high",
+    "summary": "Latency spikes after deploy",
+    "signals": ["p95 latency > 2.5s", "error rate 7%"],
+    "recent_deploy_sha": "abc1234",
+}
 
+
+def post_incident(url: str, timeout: float = 10) -> tuple[int, bytes]:
     req = urllib.request.Request(
-        "http://localhost:8000/incidents/run",
-        data=json.dumps(payload).encode("utf-8"),
+        url,
+        data=json.dumps(PAYLOAD).encode("utf-8"),
         headers={"Content-Type": "application/json"},
         method="POST",
     )
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return resp.status, resp.read()
+    except urllib.error.HTTPError as exc:
+        return exc.code, exc.read()
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    rank = (len(sorted_values) - 1) * q / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (rank - lower)
+
+
+def run_load(url: str, rps: float, duration: float, concurrency: int, timeout: float) -> dict:
+    """Open-loop load: request ``i`` is due at ``start + i / rps`` whether or not earlier ones finished.
+
+    Latency is measured from the scheduled send time, so queueing inside the driver (when
+    all workers are busy) shows up in the percentiles instead of being hidden.
+    """
+    total = max(1, int(rps * duration))
+    latencies: list[float] = []
+    outcomes: Counter[str] = Counter()
+    lock = threading.Lock()
+    start = time.perf_counter() + 0.05
+
+    def fire(index: int) -> None:
+        due = start + index / rps
+        delay = due - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        try:
+            status, _ = post_incident(url, timeout)
+            outcome = str(status)
+        except (OSError, urllib.error.URLError) as exc:
+            outcome = type(exc).__name__
+        elapsed_ms = (time.perf_counter() - due) * 1000
+        with lock:
+            latencies.append(elapsed_ms)
+            outcomes[outcome] += 1
 
-    with urllib.request.urlopen(req, timeout=10) as resp:
-        body = json.loads(resp.read().decode("utf-8"))
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for index in range(total):
+            pool.submit(fire, index)
+    wall = time.perf_counter() - start
+
+    ordered = sorted(latencies)
+    return {
+        "url": url,
+        "target_rps": rps,
+        "achieved_rps": round(total / wall, 1),
+        "requests": total,
+        "concurrency": concurrency,
+        "outcomes": dict(outcomes),
+        "latency_ms": {
+            "mean": round(statistics.fmean(ordered), 2),
+            "p50": round(percentile(ordered, 50), 2),
+            "p95": round(percentile(ordered, 95), 2),
+            "p99": round(percentile(ordered, 99), 2),
+            "max": round(ordered[-1], 2),
+        },
+    }
+
+
+@contextmanager
+def local_api(port: int) -> Iterator[str]:
+    """Serve ``app.main`` with uvicorn on ``port``, wired to in-process fake backends."""
+    sys.path[:0] = [str(AGENTS_DIR), str(AGENTS_DIR / "benchmarks")]
+    from fake_servers import backend_env, fake_agent_builder, fake_elasticsearch
+
+    with ExitStack() as stack:
+        elastic_url, _ = stack.enter_context(fake_elasticsearch())
+        builder_url, _ = stack.enter_context(fake_agent_builder())
+        os.environ.pop("ELASTIC_CLOUD_ID", None)
+        os.environ.update(backend_env(elastic_url, builder_url))
+
+        import uvicorn
+
+        server = uvicorn.Server(uvicorn.Config("app.main:app", host="127.0.0.1", port=port, log_level="warning"))
+        thread = threading.Thread(target=server.run, name="local-api", daemon=True)
+        thread.start()
+        while not server.started:
+            if not thread.is_alive():
+                raise RuntimeError("local API failed to start")
+            time.sleep(0.05)
+        try:
+            yield f"http://127.0.0.1:{port}/incidents/run"
+        finally:
+            server.should_exit = True
+            thread.join(timeout=10)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8000/incidents/run")
+    parser.add_argument("--rps", type=float, help="target request rate; omit to send a single request")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of load (default: 10)")
+    parser.add_argument("--concurrency", type=int, default=32, help="max in-flight requests (default: 32)")
+    parser.add_argument("--timeout", type=float, default=10.0, help="per-request timeout in seconds")
+    parser.add_argument("--local", action="store_true", help="start the API against fake backends")
+    parser.add_argument("--port", type=int, default=8765, help="port for --local (default: 8765)")
+    args = parser.parse_args()
 
-    print(json.dumps(body, indent=2))
+    with ExitStack() as stack:
+        url = stack.enter_context(local_api(args.port)) if args.local else args.url
+        if args.rps is None:
+            status, raw = post_incident(url, args.timeout)
+            if status >= 400:
+                raise SystemExit(f"request failed with HTTP {status}: {raw.decode('utf-8', 'replace')}")
+            print(json.dumps(json.loads(raw.decode("utf-8")), indent=2))
+            return
+        report = run_load(url, args.rps, args.duration, args.concurrency, args.timeout)
+        print(json.dumps(report, indent=2))
 
 
 if __name__ == "__main__":